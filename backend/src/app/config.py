@@ -41,6 +41,7 @@ class Settings(BaseSettings):
     
     # Vector Database (FAISS)
     vector_db_path: str = Field(default="./data/vector_db", env="VECTOR_DB_PATH")
+    vector_index_type: str = Field(default="flat", env="VECTOR_INDEX_TYPE")  # flat | quantized
     
     # Graph Database (Neo4j)
     neo4j_url: str = Field(default="bolt://localhost:7687", env="NEO4J_URL")
@@ -49,6 +50,7 @@ class Settings(BaseSettings):
     
     # Memory Database (SQLite)
     memory_db_path: str = Field(default="./data/memory.db", env="MEMORY_DB_PATH")
+    memory_db_max_readers: int = Field(default=4, env="MEMORY_DB_MAX_READERS")
     code_health_db_path: str = Field(default="./data/code_health.db", env="CODE_HEALTH_DB_PATH")
     
     # Indexing Settings
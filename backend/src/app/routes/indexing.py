@@ -18,6 +18,7 @@ from ...indexing.ast_parser import ASTParser
 from ...indexing.chunker import CodeChunker
 from ...embeddings.embedding_service import EmbeddingService
 from ...graphs.neo4j_client import Neo4jClient
+from ...retrieval.error_path_retrieval import invalidate_caller_cache
 
 logger = logging.getLogger(__name__)
 
@@ -360,3 +361,6 @@ async def run_indexing(session_id: str, repo_path: str, force_reindex: bool):
         # Clean up
         if neo4j_client:
             neo4j_client.close()
+        
+        # The call graph may have changed, even on a partial run
+        invalidate_caller_cache()
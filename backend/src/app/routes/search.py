@@ -297,3 +297,38 @@ async def search_file(file_path: str):
             'total': 0,
             'error': str(e)
         }
+
+
+@router.get("/cache/stats")
+async def get_cache_stats():
+    """
+    Get query embedding cache statistics.
+    
+    Returns:
+        Size, bound, hits and misses of the embedding cache (empty when the
+        embedding service is unavailable)
+    """
+    embedding_service = _embedding_service
+    
+    return {
+        'embedding_cache': embedding_service.get_cache_stats() if embedding_service else {}
+    }
+
+
+@router.post("/cache/clear")
+async def clear_cache():
+    """
+    Clear the query embedding cache.
+    
+    Returns:
+        Number of entries cleared
+    """
+    embedding_service = _embedding_service
+    
+    if not embedding_service:
+        return {'cleared': 0}
+    
+    cleared = embedding_service.get_cache_size()
+    embedding_service.clear_cache()
+    
+    return {'cleared': cleared}
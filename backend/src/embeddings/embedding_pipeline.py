@@ -185,7 +185,8 @@ def main():
     
     vector_store = VectorStore(
         dimension=embedding_service.embedding_dim,
-        index_path=settings.vector_db_path
+        index_path=settings.vector_db_path,
+        index_type=settings.vector_index_type
     )
     
     # Run pipeline
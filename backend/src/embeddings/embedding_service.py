@@ -4,7 +4,8 @@ Embedding Service
 Generates embeddings using BGE-M3 model (local).
 """
 
-from typing import List, Union, Optional
+from typing import Dict, List, Union, Optional, Tuple
+from collections import OrderedDict
 import numpy as np
 import logging
 from pathlib import Path
@@ -17,8 +18,20 @@ except ImportError:
     HAS_EMBEDDINGS = False
     print("Warning: sentence-transformers not installed")
 
+try:
+    import simsimd
+    HAS_SIMSIMD = True
+except ImportError:
+    HAS_SIMSIMD = False
+
 logger = logging.getLogger(__name__)
 
+# Maps unit-norm embedding components onto the int8 range
+INT8_SCALE = 127.0
+
+# Maximum embeddings kept in the text cache
+EMBEDDING_CACHE_SIZE = 2048
+
 
 class EmbeddingService:
     """
@@ -57,8 +70,13 @@ class EmbeddingService:
         self.embedding_dim = self.model.get_sentence_embedding_dimension()
         logger.info(f"Model loaded. Embedding dimension: {self.embedding_dim}")
         
-        # Cache for repeated texts
-        self._cache: dict[str, np.ndarray] = {}
+        # Cache for repeated texts (LRU); keyed by the text itself, which
+        # caches its own hash
+        self._cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._cache_hits = 0
+        self._cache_misses = 0
+        # int8 copies of cached embeddings, for similarity(quantized=True)
+        self._cache_i8: dict[str, np.ndarray] = {}
     
     def encode(
         self,
@@ -86,18 +104,24 @@ class EmbeddingService:
         
         # Check cache
         if use_cache:
-            embeddings = []
-            uncached_texts = []
-            uncached_indices = []
+            cache = self._cache
             
-            for i, text in enumerate(texts):
-                if text in self._cache:
-                    embeddings.append(self._cache[text])
-                else:
+            # Each distinct uncached text is encoded once
+            cached: Dict[str, np.ndarray] = {}
+            uncached_texts = []
+            for text in dict.fromkeys(texts):
+                embedding = cache.get(text)
+                if embedding is None:
                     uncached_texts.append(text)
-                    uncached_indices.append(i)
+                else:
+                    cache.move_to_end(text)
+                    cached[text] = embedding
+            
+            self._cache_hits += len(cached)
+            self._cache_misses += len(uncached_texts)
             
-            # Generate embeddings for uncached texts
+            # Generate embeddings for uncached texts (sentence-transformers
+            # sorts them by length so each batch pads only to its longest)
             if uncached_texts:
                 new_embeddings = self.model.encode(
                     uncached_texts,
@@ -107,26 +131,15 @@ class EmbeddingService:
                 )
                 
                 # Cache new embeddings
-                for text, emb in zip(uncached_texts, new_embeddings):
-                    self._cache[text] = emb
+                cached.update(zip(uncached_texts, new_embeddings))
+                cache.update(zip(uncached_texts, new_embeddings))
                 
-                # Merge cached and new embeddings in correct order
-                result = [None] * len(texts)
-                
-                # Fill cached
-                cached_idx = 0
-                for i in range(len(texts)):
-                    if i not in uncached_indices:
-                        result[i] = embeddings[cached_idx]
-                        cached_idx += 1
-                
-                # Fill uncached
-                for i, emb in zip(uncached_indices, new_embeddings):
-                    result[i] = emb
-                
-                embeddings = np.array(result)
-            else:
-                embeddings = np.array(embeddings)
+                while len(cache) > EMBEDDING_CACHE_SIZE:
+                    evicted, _ = cache.popitem(last=False)
+                    self._cache_i8.pop(evicted, None)
+            
+            # Assemble in input order (a copy, so callers can't touch the cache)
+            embeddings = np.array([cached[text] for text in texts])
         else:
             # Direct encoding without cache
             embeddings = self.model.encode(
@@ -151,30 +164,103 @@ class EmbeddingService:
         """Convenience method for batch encoding."""
         return self.encode(texts, batch_size=batch_size, normalize=normalize, use_cache=False)
     
-    def similarity(self, text1: str, text2: str) -> float:
+    def similarity(self, text1: str, text2: str, quantized: bool = False) -> float:
         """
         Calculate cosine similarity between two texts.
         
         Args:
             text1: First text
             text2: Second text
+            quantized: Compare int8-quantized embeddings (within ~0.02
+                of the float result, a quarter of the bytes)
         
         Returns:
             Cosine similarity score
         """
+        if quantized:
+            return self.similarity_i8(self.encode_i8(text1), self.encode_i8(text2))
+        
         emb1 = self.encode(text1, normalize=True)
         emb2 = self.encode(text2, normalize=True)
         
         return float(np.dot(emb1, emb2))
     
+    def encode_i8(self, text: str) -> np.ndarray:
+        """
+        Generate the int8-quantized embedding of a text.
+        
+        Args:
+            text: Text to encode
+        
+        Returns:
+            int8 embedding (divide by INT8_SCALE to approximate the float one)
+        """
+        quantized = self._cache_i8.get(text)
+        if quantized is None:
+            quantized, _ = self.quantize(self.encode(text, normalize=True))
+            self._cache_i8[text] = quantized
+        return quantized
+    
+    @staticmethod
+    def quantize(embeddings: np.ndarray) -> Tuple[np.ndarray, float]:
+        """
+        Quantize L2-normalized embeddings to int8.
+        
+        Args:
+            embeddings: Float embeddings (single or batch)
+        
+        Returns:
+            Tuple of (int8 embeddings, scale), where embeddings ≈ int8 / scale
+        """
+        quantized = np.clip(np.rint(embeddings * INT8_SCALE), -127, 127).astype(np.int8)
+        return quantized, INT8_SCALE
+    
+    @staticmethod
+    def similarity_i8(a_i8: np.ndarray, b_i8: np.ndarray) -> float:
+        """
+        Cosine similarity between two int8 embeddings.
+        
+        Uses SimSIMD's int8 kernels when installed, otherwise an int32
+        dot product in NumPy.
+        
+        Args:
+            a_i8: First int8 embedding
+            b_i8: Second int8 embedding
+        
+        Returns:
+            Cosine similarity score
+        """
+        if HAS_SIMSIMD:
+            # SimSIMD returns cosine distance
+            return 1.0 - float(simsimd.cosine(a_i8, b_i8))
+        
+        a = a_i8.astype(np.int32)
+        b = b_i8.astype(np.int32)
+        norms = np.sqrt(float(np.dot(a, a)) * float(np.dot(b, b)))
+        if norms == 0:
+            return 0.0
+        return float(np.dot(a, b)) / norms
+    
     def clear_cache(self):
         """Clear embedding cache."""
         self._cache.clear()
+        self._cache_i8.clear()
+        self._cache_hits = 0
+        self._cache_misses = 0
         logger.info("Embedding cache cleared")
     
     def get_cache_size(self) -> int:
         """Get number of cached embeddings."""
         return len(self._cache)
+    
+    def get_cache_stats(self) -> Dict[str, int]:
+        """Get embedding cache statistics."""
+        return {
+            'size': len(self._cache),
+            'max_size': EMBEDDING_CACHE_SIZE,
+            'hits': self._cache_hits,
+            'misses': self._cache_misses,
+        }
 
 
 def main():
@@ -5,8 +5,10 @@ Manages vector storage and similarity search using FAISS.
 """
 
 from typing import List, Dict, Any, Optional, Tuple
+from collections import defaultdict
 import numpy as np
 import logging
+import os
 from pathlib import Path
 import json
 import pickle
@@ -20,33 +22,68 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+# Supported index layouts: exact FP32, or int8 scalar-quantized with exact re-scoring
+INDEX_TYPES = ('flat', 'quantized')
+
+# Candidates fetched from a quantized index per requested result
+RERANK_FACTOR = 4
+
 
 class VectorStore:
     """
     FAISS-based vector store for code chunks.
     """
     
-    def __init__(self, dimension: int, index_path: Optional[str] = None):
+    def __init__(
+        self,
+        dimension: int,
+        index_path: Optional[str] = None,
+        index_type: str = 'flat'
+    ):
         """
         Initialize vector store.
         
         Args:
             dimension: Embedding dimension
             index_path: Path to save/load index
+            index_type: 'flat' for exact FP32 search, or 'quantized' to scan
+                int8 codes (4x less memory traffic) and re-score the best
+                candidates exactly; a saved index keeps its own type
         """
         if not HAS_FAISS:
             raise RuntimeError("faiss not installed")
         
+        if index_type not in INDEX_TYPES:
+            raise ValueError(f"Unknown index type: {index_type} (expected one of {INDEX_TYPES})")
+        
         self.dimension = dimension
         self.index_path = Path(index_path) if index_path else None
+        self.index_type = index_type
+        
+        # Create FAISS index (inner product on normalized vectors = cosine similarity)
+        if index_type == 'quantized':
+            self.index = faiss.IndexScalarQuantizer(
+                dimension, faiss.ScalarQuantizer.QT_8bit, faiss.METRIC_INNER_PRODUCT
+            )
+            # Normalized vectors lie in [-1, 1], so the codes use that fixed
+            # range instead of one learned from whichever batch comes first
+            bounds = np.array([[-1.0] * dimension, [1.0] * dimension], dtype=np.float32)
+            self.index.train(bounds)
+        else:
+            self.index = faiss.IndexFlatIP(dimension)
         
-        # Create FAISS index (using IndexFlatIP for inner product/cosine similarity)
-        self.index = faiss.IndexFlatIP(dimension)
+        # Exact vectors for re-scoring quantized candidates, as added batches
+        # (rows in id order); stacked on the next search
+        self._exact: List[np.ndarray] = []
         
         # Metadata storage (chunk_id -> metadata)
         self.metadata: Dict[int, Dict[str, Any]] = {}
         self.id_counter = 0
         
+        # Secondary indexes over metadata, kept in id order
+        self._by_file: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        self._by_chunk_id: Dict[str, Dict[str, Any]] = {}
+        
         logger.info(f"Initialized FAISS index with dimension {dimension}")
         
         # Load existing index if path provided
@@ -77,6 +114,9 @@ class VectorStore:
         # Normalize embeddings for cosine similarity
         faiss.normalize_L2(embeddings)
         
+        if self.index_type == 'quantized':
+            self._exact.append(embeddings.copy())
+        
         # Add to index
         self.index.add(embeddings)
         
@@ -84,6 +124,7 @@ class VectorStore:
         ids = []
         for metadata in metadata_list:
             self.metadata[self.id_counter] = metadata
+            self._index_metadata(metadata)
             ids.append(self.id_counter)
             self.id_counter += 1
         
@@ -116,7 +157,7 @@ class VectorStore:
         faiss.normalize_L2(query_embedding)
         
         # Search
-        scores, indices = self.index.search(query_embedding, k)
+        scores, indices = self._search(query_embedding, k)
         
         # Build results
         results = []
@@ -153,7 +194,7 @@ class VectorStore:
         faiss.normalize_L2(query_embeddings)
         
         # Search
-        scores, indices = self.index.search(query_embeddings, k)
+        scores, indices = self._search(query_embeddings, k)
         
         # Build results for each query
         all_results = []
@@ -174,6 +215,46 @@ class VectorStore:
         
         return all_results
     
+    def _search(self, queries: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Search normalized queries, re-scoring quantized hits exactly.
+        
+        Args:
+            queries: Normalized query embeddings (n x dimension)
+            k: Number of results per query
+        
+        Returns:
+            (scores, indices), both n x k, padded with -1 like faiss
+        """
+        if self.index_type != 'quantized' or self.index.ntotal == 0:
+            return self.index.search(queries, k)
+        
+        _, candidates = self.index.search(queries, k * RERANK_FACTOR)
+        vectors = self._exact_vectors()
+        
+        scores = np.full((len(queries), k), -1.0, dtype=np.float32)
+        indices = np.full((len(queries), k), -1, dtype=np.int64)
+        
+        for row, (query, found) in enumerate(zip(queries, candidates)):
+            found = found[found >= 0]
+            exact = vectors[found] @ query
+            best = np.argsort(-exact, kind='stable')[:k]
+            
+            scores[row, :len(best)] = exact[best]
+            indices[row, :len(best)] = found[best]
+        
+        return scores, indices
+    
+    def _exact_vectors(self) -> np.ndarray:
+        """Return the exact vectors as one array, stacking added batches once."""
+        if not self._exact:
+            return np.empty((0, self.dimension), dtype=np.float32)
+        
+        if len(self._exact) > 1:
+            self._exact = [np.concatenate(self._exact)]
+        
+        return self._exact[0]
+    
     def save(self, path: Optional[str] = None):
         """
         Save index and metadata to disk.
@@ -201,6 +282,19 @@ class VectorStore:
                 'dimension': self.dimension
             }, f)
         
+        # Exact vectors backing a quantized index. A loaded store maps
+        # vectors.npy itself, so the rows are read into memory (dropping
+        # the map) and written to a temporary file that replaces it
+        if self.index_type == 'quantized':
+            vectors = np.array(self._exact_vectors())
+            self._exact = [vectors]
+            
+            vectors_file = save_path / "vectors.npy"
+            tmp_file = save_path / "vectors.npy.tmp"
+            with open(tmp_file, 'wb') as f:
+                np.save(f, vectors)
+            os.replace(tmp_file, vectors_file)
+        
         logger.info(f"Saved index to {save_path}")
     
     def load(self, path: Optional[str] = None):
@@ -219,6 +313,9 @@ class VectorStore:
         index_file = str(load_path / "index.faiss")
         if Path(index_file).exists():
             self.index = faiss.read_index(index_file)
+            self.index_type = (
+                'quantized' if isinstance(self.index, faiss.IndexScalarQuantizer) else 'flat'
+            )
         else:
             logger.warning(f"Index file not found: {index_file}")
             return
@@ -231,13 +328,66 @@ class VectorStore:
                 self.metadata = data['metadata']
                 self.id_counter = data['id_counter']
                 self.dimension = data['dimension']
+            
+            self._reindex_metadata()
         else:
             logger.warning(f"Metadata file not found: {metadata_file}")
         
+        # Exact vectors are memory-mapped: only re-scored rows are read
+        vectors_file = load_path / "vectors.npy"
+        if self.index_type == 'quantized':
+            if vectors_file.exists():
+                self._exact = [np.load(vectors_file, mmap_mode='r')]
+            else:
+                logger.warning(f"Vectors file not found: {vectors_file}; re-scoring with decoded vectors")
+                self._exact = [self.index.reconstruct_n(0, self.index.ntotal)]
+        
         logger.info(f"Loaded index from {load_path}")
         logger.info(f"  Total vectors: {self.index.ntotal}")
         logger.info(f"  Metadata entries: {len(self.metadata)}")
     
+    def get_file_chunks(self, file_path: str) -> List[Dict[str, Any]]:
+        """
+        Get metadata of all chunks from a file.
+        
+        Args:
+            file_path: File path
+        
+        Returns:
+            Chunk metadata in insertion order (do not mutate)
+        """
+        return self._by_file.get(file_path, [])
+    
+    def get_chunk(self, chunk_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get chunk metadata by chunk ID.
+        
+        Args:
+            chunk_id: Chunk ID
+        
+        Returns:
+            Metadata of the first chunk added with this ID, or None
+        """
+        return self._by_chunk_id.get(chunk_id)
+    
+    def _index_metadata(self, metadata: Dict[str, Any]):
+        """Add one metadata entry to the secondary indexes."""
+        file_path = metadata.get('file_path')
+        if file_path is not None:
+            self._by_file[file_path].append(metadata)
+        
+        chunk_id = metadata.get('chunk_id')
+        if chunk_id is not None:
+            self._by_chunk_id.setdefault(chunk_id, metadata)
+    
+    def _reindex_metadata(self):
+        """Rebuild the secondary indexes from metadata."""
+        self._by_file.clear()
+        self._by_chunk_id.clear()
+        
+        for metadata in self.metadata.values():
+            self._index_metadata(metadata)
+    
     def get_stats(self) -> Dict[str, Any]:
         """Get index statistics."""
         return {
@@ -250,7 +400,9 @@ class VectorStore:
     def clear(self):
         """Clear the index and metadata."""
         self.index.reset()
+        self._exact = []
         self.metadata.clear()
+        self._reindex_metadata()
         self.id_counter = 0
         logger.info("Index cleared")
 
@@ -6,13 +6,18 @@ Excludes: node_modules, .git, dist, __pycache__, .venv, etc.
 """
 
 import os
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from pathlib import Path
-from typing import List, Dict, Any, Set, Optional
+from typing import List, Dict, Any, Set, Optional, Tuple
 from dataclasses import dataclass, asdict
 from datetime import datetime
 import json
 
 
+# Threads scanning directories and stat-ing files (both release the GIL)
+WALK_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+
+
 @dataclass
 class FileMetadata:
     """Metadata for a discovered file."""
@@ -128,35 +133,91 @@ class FileWalker:
         """
         Walk the directory tree and collect file metadata.
         
+        Directories are scanned concurrently on a thread pool: each scan
+        stats its own files and hands its subdirectories back to be
+        scheduled, so slow directory reads and stats overlap.
+        
         Returns:
-            List of FileMetadata objects for all discovered source files
+            List of FileMetadata objects for all discovered source files,
+            sorted by relative path
         """
         discovered_files: List[FileMetadata] = []
         
-        for root, dirs, files in os.walk(self.root_path, followlinks=False):
-            root_path = Path(root)
+        with ThreadPoolExecutor(max_workers=WALK_WORKERS, thread_name_prefix='file-walker') as pool:
+            pending = {pool.submit(self._scan_dir, str(self.root_path), '')}
             
-            # Filter out excluded directories (modify in-place to prune walk)
-            dirs[:] = [d for d in dirs if not self.should_exclude_dir(d)]
-            
-            # Process files
-            for filename in files:
-                file_path = root_path / filename
-                
-                # Skip excluded files
-                if self.should_exclude_file(file_path):
-                    continue
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
                 
-                # Add file metadata
-                try:
-                    metadata = self.get_file_metadata(file_path)
-                    discovered_files.append(metadata)
-                except (OSError, PermissionError) as e:
-                    print(f"Warning: Could not access {file_path}: {e}")
-                    continue
+                for future in done:
+                    files, subdirs = future.result()
+                    discovered_files.extend(files)
+                    pending.update(pool.submit(self._scan_dir, *subdir) for subdir in subdirs)
+        
+        # Scans finish in any order; keep the manifest deterministic
+        discovered_files.sort(key=lambda f: f.relative_path)
         
         return discovered_files
     
+    def _scan_dir(
+        self,
+        dir_path: str,
+        rel_prefix: str
+    ) -> Tuple[List[FileMetadata], List[Tuple[str, str]]]:
+        """
+        Scan one directory.
+        
+        Args:
+            dir_path: Directory to scan
+            rel_prefix: Its path relative to the root, with a trailing separator
+        
+        Returns:
+            Tuple of (metadata for its source files, (path, rel_prefix) of
+            subdirectories to descend into)
+        """
+        files: List[FileMetadata] = []
+        subdirs: List[Tuple[str, str]] = []
+        
+        try:
+            entries = list(os.scandir(dir_path))
+        except OSError:
+            return files, subdirs  # Skip unreadable directories, as os.walk does
+        
+        for entry in entries:
+            try:
+                is_dir = entry.is_dir()
+            except OSError:
+                is_dir = False
+            
+            if is_dir:
+                # Symlinked directories are listed but not followed
+                if not entry.is_symlink() and not self.should_exclude_dir(entry.name):
+                    subdirs.append((entry.path, rel_prefix + entry.name + os.sep))
+                continue
+            
+            file_path = Path(entry.path)
+            
+            # Skip excluded files
+            if self.should_exclude_file(file_path):
+                continue
+            
+            # Add file metadata
+            try:
+                stat = entry.stat()
+            except (OSError, PermissionError) as e:
+                print(f"Warning: Could not access {file_path}: {e}")
+                continue
+            
+            files.append(FileMetadata(
+                path=entry.path,
+                relative_path=rel_prefix + entry.name,
+                size_bytes=stat.st_size,
+                modified_time=datetime.fromtimestamp(stat.st_mtime).isoformat(),
+                language=self.get_language(file_path)
+            ))
+        
+        return files, subdirs
+    
     def generate_manifest(self, output_path: Optional[str] = None) -> Dict[str, Any]:
         """
         Generate a complete manifest of discovered files.
@@ -6,10 +6,24 @@ Detects code smells, complexity issues, and quality metrics.
 
 from typing import Dict, Any, List, Optional
 from dataclasses import dataclass
+from functools import lru_cache
 import re
 from pathlib import Path
 
 
+# Decision points for the complexity estimate, matched in a single pass
+DECISION_PATTERN = re.compile(
+    r'\b(?:if|elif|else|for|while|case|switch|and|or)\b|\?|&&|\|\|',
+    re.IGNORECASE
+)
+
+# Distinct function bodies whose complexity is kept per analyzer
+COMPLEXITY_CACHE_SIZE = 1024
+
+# Operators and keywords that make comment text look like code
+CODE_INDICATOR_PATTERN = re.compile(r'[=(){}\[\];]|def |class |import |const |let |var ')
+
+
 @dataclass
 class CodeSmell:
     """Represents a detected code smell."""
@@ -34,7 +48,10 @@ class StaticAnalyzer:
     
     def __init__(self):
         """Initialize static analyzer."""
-        pass
+        # The analyzer is stateless, so results depend on the content alone.
+        # A function's complexity is asked for by analyze_file, the
+        # maintainability index and HealthScanner, so it is worth keeping.
+        self._complexity = lru_cache(maxsize=COMPLEXITY_CACHE_SIZE)(self._count_decision_points)
     
     def analyze_file(
         self,
@@ -194,21 +211,12 @@ class StaticAnalyzer:
         
         Real complexity = 1 + number of decision points
         """
-        complexity = 1
-        
-        # Count decision points
-        decision_keywords = [
-            r'\bif\b', r'\belif\b', r'\belse\b',
-            r'\bfor\b', r'\bwhile\b',
-            r'\bcase\b', r'\bswitch\b',
-            r'\band\b', r'\bor\b',
-            r'\?', r'\&\&', r'\|\|'
-        ]
-        
-        for keyword in decision_keywords:
-            complexity += len(re.findall(keyword, content, re.IGNORECASE))
-        
-        return complexity
+        return self._complexity(content)
+    
+    @staticmethod
+    def _count_decision_points(content: str) -> int:
+        """Complexity estimate for content (1 + decision points)."""
+        return 1 + len(DECISION_PATTERN.findall(content))
     
     def _count_parameters(self, signature: str, language: str) -> int:
         """Count function parameters from signature."""
@@ -255,6 +263,10 @@ class StaticAnalyzer:
         comment_prefix = '#' if language == 'python' else '//'
         
         for i, line in enumerate(lines, 1):
+            # Cheap substring test first; most lines are not comments
+            if comment_prefix not in line:
+                continue
+            
             stripped = line.strip()
             
             if stripped.startswith(comment_prefix):
@@ -268,13 +280,7 @@ class StaticAnalyzer:
     
     def _looks_like_code(self, text: str, language: str) -> bool:
         """Check if text looks like commented-out code."""
-        code_indicators = ['=', '(', ')', '{', '}', '[', ']', ';', 'def ', 'class ', 'import ', 'const ', 'let ', 'var ']
-        
-        for indicator in code_indicators:
-            if indicator in text:
-                return True
-        
-        return False
+        return CODE_INDICATOR_PATTERN.search(text) is not None
     
     def _find_todos(self, lines: List[str]) -> List[int]:
         """Find TODO/FIXME comments."""
@@ -5,7 +5,10 @@ Stores error snapshots and debugging history.
 """
 
 import sqlite3
-from typing import Dict, List, Any, Optional
+import queue
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Any, Optional, Tuple
 from pathlib import Path
 from datetime import datetime
 import json
@@ -13,30 +16,229 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+# SQLite 3.45+ can store JSON in its binary JSONB form
+HAS_JSONB = sqlite3.sqlite_version_info >= (3, 45, 0)
+
+# Stored in PRAGMA user_version; bump when _create_schema changes shape
+SCHEMA_VERSION = 2
+
+# Append-only tables keyed by an app-assigned id instead of a rowid
+APPEND_ONLY_TABLES = ('error_resolutions', 'conversation_history')
+
+# db_path that opens a private in-memory database (e.g. for tests)
+IN_MEMORY_PATH = ':memory:'
+
+# Insert new, or bump the counters of an existing snapshot
+UPSERT_SNAPSHOT_SQL = '''
+    INSERT INTO error_snapshots
+    (error_hash, error_type, error_message, file_path, line_number, 
+     function_name, stack_trace, context_code)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(error_hash) DO UPDATE
+    SET last_seen = CURRENT_TIMESTAMP,
+        occurrence_count = occurrence_count + 1
+'''
+
+
+def _conversation_turn(cursor: sqlite3.Cursor, row: Tuple[Any, ...]) -> Dict[str, Any]:
+    """Row factory for (role, content, timestamp) conversation rows."""
+    return {'role': row[0], 'content': row[1], 'timestamp': row[2]}
+
 
 class ErrorMemoryDB:
     """
     SQLite database for error tracking and debugging history.
+    
+    Uses one dedicated writer connection (``self.conn``) guarded by a lock,
+    plus a pool of read-only connections so lookups don't queue behind
+    writes. All connections run in autocommit mode; writes open their own
+    transaction via ``_rw()``.
+    
+    With ``db_path=':memory:'`` the database lives on the writer connection
+    alone, so there is no reader pool and reads share that connection.
     """
     
-    def __init__(self, db_path: str):
+    def __init__(self, db_path: str, max_readers: int = 4):
         """
         Initialize error memory database.
         
         Args:
-            db_path: Path to SQLite database
+            db_path: Path to SQLite database, or ':memory:'
+            max_readers: Number of pooled read-only connections (at least 1)
+        
+        Raises:
+            ValueError: If max_readers is below 1
         """
+        if max_readers < 1:
+            # Queue(maxsize=0) is unbounded and would leave readers waiting forever
+            raise ValueError(f"max_readers must be at least 1, got {max_readers}")
+        
         self.db_path = Path(db_path)
-        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.in_memory = str(db_path) == IN_MEMORY_PATH
+        if not self.in_memory:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
         
-        self.conn = sqlite3.connect(str(self.db_path))
+        self.conn = sqlite3.connect(
+            str(self.db_path), check_same_thread=False, isolation_level=None
+        )
         self.conn.row_factory = sqlite3.Row
+        self._configure_connection(self.conn)
+        self._write_lock = threading.RLock()
         
         self._create_tables()
+        
+        # Readers are opened after the schema exists (read-only opens fail otherwise)
+        self._readers: queue.Queue = queue.Queue(maxsize=max_readers)
+        if not self.in_memory:
+            for _ in range(max_readers):
+                self._readers.put(self._open_reader())
+    
+    @staticmethod
+    def _configure_connection(conn: sqlite3.Connection, readonly: bool = False):
+        """
+        Apply performance PRAGMAs to a connection.
+        
+        WAL with synchronous=NORMAL avoids an fsync per commit and lets
+        readers run concurrently with the writer. journal_mode=WAL is
+        persistent, so re-applying it on startup is a no-op.
+        """
+        if not readonly:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('PRAGMA journal_size_limit=6144000')
+            conn.execute('PRAGMA foreign_keys=ON')
+        conn.execute('PRAGMA temp_store=MEMORY')
+        conn.execute('PRAGMA cache_size=-20000')  # ~20MB page cache
+        conn.execute('PRAGMA mmap_size=268435456')  # 256MB
+        conn.execute('PRAGMA busy_timeout=5000')
+    
+    def _open_reader(self) -> sqlite3.Connection:
+        """Open a read-only connection for the reader pool."""
+        conn = sqlite3.connect(
+            f"{self.db_path.resolve().as_uri()}?mode=ro",
+            uri=True,
+            check_same_thread=False,
+            isolation_level=None,
+        )
+        conn.row_factory = sqlite3.Row
+        self._configure_connection(conn, readonly=True)
+        return conn
+    
+    @contextmanager
+    def _rw(self):
+        """
+        Yield the writer connection inside a transaction.
+        
+        Only one thread writes at a time. If a transaction is already open
+        (e.g. inside batch()), the caller joins it instead of committing.
+        """
+        with self._write_lock:
+            if self.conn.in_transaction:
+                yield self.conn
+                return
+            
+            self.conn.execute('BEGIN')
+            try:
+                yield self.conn
+            except BaseException:
+                self.conn.execute('ROLLBACK')
+                raise
+            else:
+                self.conn.execute('COMMIT')
+    
+    @contextmanager
+    def _ro(self):
+        """Borrow a read-only connection from the pool."""
+        if self.in_memory:
+            # Other connections can't see an in-memory database
+            with self._write_lock:
+                yield self.conn
+            return
+        
+        conn = self._readers.get()
+        try:
+            yield conn
+        finally:
+            self._readers.put(conn)
     
     def _create_tables(self):
-        """Create database tables."""
-        cursor = self.conn.cursor()
+        """Create database tables, migrating older schemas in place."""
+        # v1 databases were written without foreign key enforcement and may
+        # hold orphan rows, which the migration copies as they are. The
+        # pragma is a no-op inside a transaction, so it is set around it.
+        self.conn.execute('PRAGMA foreign_keys=OFF')
+        try:
+            self._create_tables_unchecked()
+        finally:
+            self.conn.execute('PRAGMA foreign_keys=ON')
+    
+    def _create_tables_unchecked(self):
+        """Create or migrate the schema (foreign key checks off)."""
+        with self._rw() as conn:
+            cursor = conn.cursor()
+            
+            version = cursor.execute('PRAGMA user_version').fetchone()[0]
+            if version < SCHEMA_VERSION and self._table_exists(cursor, 'conversation_history'):
+                self._migrate_to_without_rowid(cursor)
+            else:
+                self._create_schema(cursor)
+            
+            cursor.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+            
+            # Refresh planner statistics
+            cursor.execute('ANALYZE')
+            
+            # Next ids for the WITHOUT ROWID tables, handed out under the write lock
+            self._next_ids = {
+                table: cursor.execute(f'SELECT COALESCE(MAX(id), 0) + 1 FROM {table}').fetchone()[0]
+                for table in APPEND_ONLY_TABLES
+            }
+    
+    @staticmethod
+    def _table_exists(cursor: sqlite3.Cursor, table: str) -> bool:
+        """Check whether a table exists."""
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,))
+        return cursor.fetchone() is not None
+    
+    def _migrate_to_without_rowid(self, cursor: sqlite3.Cursor):
+        """
+        Rebuild the v1 append-only tables as WITHOUT ROWID tables.
+        
+        Runs inside the caller's transaction, so a failure leaves the old
+        tables untouched.
+        """
+        logger.info("Migrating error memory schema to version %d", SCHEMA_VERSION)
+        
+        for table in APPEND_ONLY_TABLES:
+            cursor.execute(f'ALTER TABLE {table} RENAME TO {table}_v1')
+        
+        self._create_schema(cursor)
+        
+        cursor.execute('''
+            INSERT INTO error_resolutions
+            (id, error_hash, resolution_type, patch_applied, llm_model, success,
+             resolution_time_ms, resolved_at, notes)
+            SELECT id, error_hash, resolution_type, patch_applied, llm_model, success,
+                   resolution_time_ms, COALESCE(resolved_at, CURRENT_TIMESTAMP), notes
+            FROM error_resolutions_v1
+        ''')
+        cursor.execute('''
+            INSERT INTO conversation_history (id, session_id, role, content, timestamp)
+            SELECT id, session_id, role, content, COALESCE(timestamp, CURRENT_TIMESTAMP)
+            FROM conversation_history_v1
+        ''')
+        
+        for table in APPEND_ONLY_TABLES:
+            cursor.execute(f'DROP TABLE {table}_v1')
+    
+    def _allocate_ids(self, table: str, count: int = 1) -> range:
+        """Reserve ``count`` ids for an append-only table (call under _rw())."""
+        start = self._next_ids[table]
+        self._next_ids[table] = start + count
+        return range(start, start + count)
+    
+    def _create_schema(self, cursor: sqlite3.Cursor):
+        """Create tables and indexes if they don't exist."""
         
         # Error snapshots table
         cursor.execute('''
@@ -60,17 +262,18 @@ class ErrorMemoryDB:
         # Error resolutions table
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS error_resolutions (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                id INTEGER NOT NULL,
                 error_hash TEXT NOT NULL,
                 resolution_type TEXT NOT NULL,
                 patch_applied TEXT,
                 llm_model TEXT,
                 success BOOLEAN NOT NULL,
                 resolution_time_ms INTEGER,
-                resolved_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                resolved_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
                 notes TEXT,
+                PRIMARY KEY (error_hash, resolved_at, id),
                 FOREIGN KEY (error_hash) REFERENCES error_snapshots(error_hash)
-            )
+            ) WITHOUT ROWID
         ''')
         
         # Debugging sessions table
@@ -80,7 +283,7 @@ class ErrorMemoryDB:
                 session_id TEXT NOT NULL UNIQUE,
                 error_hash TEXT,
                 query TEXT NOT NULL,
-                retrieved_chunks TEXT,
+                retrieved_chunks BLOB,  -- JSONB when supported, JSON text otherwise
                 reasoning_tier TEXT,
                 llm_calls INTEGER DEFAULT 0,
                 total_tokens INTEGER DEFAULT 0,
@@ -94,22 +297,58 @@ class ErrorMemoryDB:
         # Conversation history table
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS conversation_history (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                id INTEGER NOT NULL,
                 session_id TEXT NOT NULL,
                 role TEXT NOT NULL,
                 content TEXT NOT NULL,
-                timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                timestamp TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (session_id, timestamp, id),
                 FOREIGN KEY (session_id) REFERENCES debug_sessions(session_id)
-            )
+            ) WITHOUT ROWID
         ''')
         
         # Create indexes
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_error_hash ON error_snapshots(error_hash)')
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_error_file ON error_snapshots(file_path)')
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_session ON debug_sessions(session_id)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_conversation_session ON conversation_history(session_id)')
         
-        self.conn.commit()
+        # Index backing the get_similar_errors filter and sort; the join side
+        # is served by the error_resolutions primary key
+        cursor.execute(
+            'CREATE INDEX IF NOT EXISTS idx_snap_type_resolved_lastseen '
+            'ON error_snapshots(error_type, resolved, last_seen DESC)'
+        )
+    
+    @contextmanager
+    def batch(self):
+        """
+        Group several writes into a single transaction.
+        
+        Mutating methods called inside the block skip their own commit, so
+        the whole batch pays for one commit instead of one per call.
+        Nested calls join the outer transaction.
+        
+        Example:
+            with db.batch():
+                for role, content in turns:
+                    db.save_conversation_turn(session_id, role, content)
+        """
+        with self._rw():
+            yield
+    
+    @staticmethod
+    def _snapshot_row(error_data: Dict[str, Any]) -> Tuple[Any, ...]:
+        """Bind parameters for UPSERT_SNAPSHOT_SQL."""
+        return (
+            error_data['error_hash'],
+            error_data.get('error_type'),
+            error_data.get('error_message'),
+            error_data.get('file_path'),
+            error_data.get('line_number'),
+            error_data.get('function_name'),
+            error_data.get('stack_trace'),
+            error_data.get('context_code')
+        )
     
     def save_error_snapshot(self, error_data: Dict[str, Any]) -> str:
         """
@@ -121,169 +360,232 @@ class ErrorMemoryDB:
         Returns:
             Error hash
         """
-        cursor = self.conn.cursor()
+        with self._rw() as conn:
+            error_hash = error_data['error_hash']
+            
+            conn.execute(UPSERT_SNAPSHOT_SQL, self._snapshot_row(error_data))
+            
+            logger.info(f"Saved error snapshot: {error_hash}")
+            
+            return error_hash
+    
+    def save_error_snapshots(self, errors: Iterable[Dict[str, Any]]) -> List[str]:
+        """
+        Save or update many error snapshots in one transaction.
         
-        error_hash = error_data['error_hash']
+        Uses a single prepared statement for all rows. Repeated hashes
+        bump the occurrence count, as with save_error_snapshot.
         
-        # Check if error exists
-        cursor.execute('SELECT id, occurrence_count FROM error_snapshots WHERE error_hash = ?', (error_hash,))
-        existing = cursor.fetchone()
+        Args:
+            errors: Error information dicts
         
-        if existing:
-            # Update existing
-            cursor.execute('''
-                UPDATE error_snapshots
-                SET last_seen = CURRENT_TIMESTAMP,
-                    occurrence_count = occurrence_count + 1
-                WHERE error_hash = ?
-            ''', (error_hash,))
-        else:
-            # Insert new
-            cursor.execute('''
-                INSERT INTO error_snapshots
-                (error_hash, error_type, error_message, file_path, line_number, 
-                 function_name, stack_trace, context_code)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                error_hash,
-                error_data.get('error_type'),
-                error_data.get('error_message'),
-                error_data.get('file_path'),
-                error_data.get('line_number'),
-                error_data.get('function_name'),
-                error_data.get('stack_trace'),
-                error_data.get('context_code')
-            ))
+        Returns:
+            Error hashes, in input order
+        """
+        rows = [self._snapshot_row(error_data) for error_data in errors]
         
-        self.conn.commit()
-        logger.info(f"Saved error snapshot: {error_hash}")
+        with self._rw() as conn:
+            conn.executemany(UPSERT_SNAPSHOT_SQL, rows)
         
-        return error_hash
+        logger.info(f"Saved {len(rows)} error snapshots")
+        
+        return [row[0] for row in rows]
     
     def save_error_resolution(self, resolution_data: Dict[str, Any]):
         """Save error resolution attempt."""
-        cursor = self.conn.cursor()
-        
-        cursor.execute('''
-            INSERT INTO error_resolutions
-            (error_hash, resolution_type, patch_applied, llm_model, success, resolution_time_ms, notes)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            resolution_data['error_hash'],
-            resolution_data.get('resolution_type', 'patch'),
-            resolution_data.get('patch_applied'),
-            resolution_data.get('llm_model'),
-            resolution_data['success'],
-            resolution_data.get('resolution_time_ms'),
-            resolution_data.get('notes')
-        ))
-        
-        # Mark error as resolved if successful
-        if resolution_data['success']:
+        with self._rw() as conn:
+            cursor = conn.cursor()
+            
+            (resolution_id,) = self._allocate_ids('error_resolutions')
             cursor.execute('''
-                UPDATE error_snapshots
-                SET resolved = 1
-                WHERE error_hash = ?
-            ''', (resolution_data['error_hash'],))
-        
-        self.conn.commit()
+                INSERT INTO error_resolutions
+                (id, error_hash, resolution_type, patch_applied, llm_model, success, resolution_time_ms, notes)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (
+                resolution_id,
+                resolution_data['error_hash'],
+                resolution_data.get('resolution_type', 'patch'),
+                resolution_data.get('patch_applied'),
+                resolution_data.get('llm_model'),
+                resolution_data['success'],
+                resolution_data.get('resolution_time_ms'),
+                resolution_data.get('notes')
+            ))
+            
+            # Mark error as resolved if successful
+            if resolution_data['success']:
+                cursor.execute('''
+                    UPDATE error_snapshots
+                    SET resolved = 1
+                    WHERE error_hash = ?
+                ''', (resolution_data['error_hash'],))
     
     def create_debug_session(self, session_id: str, query: str, error_hash: Optional[str] = None) -> str:
         """Create a new debugging session."""
-        cursor = self.conn.cursor()
-        
-        cursor.execute('''
-            INSERT INTO debug_sessions (session_id, error_hash, query)
-            VALUES (?, ?, ?)
-        ''', (session_id, error_hash, query))
-        
-        self.conn.commit()
-        
-        return session_id
+        with self._rw() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute('''
+                INSERT INTO debug_sessions (session_id, error_hash, query)
+                VALUES (?, ?, ?)
+            ''', (session_id, error_hash, query))
+            
+            return session_id
     
     def update_debug_session(self, session_id: str, updates: Dict[str, Any]):
         """Update debugging session."""
-        cursor = self.conn.cursor()
-        
-        set_clauses = []
-        values = []
-        
-        for key, value in updates.items():
-            if key == 'retrieved_chunks' and isinstance(value, (list, dict)):
-                value = json.dumps(value)
+        with self._rw() as conn:
+            cursor = conn.cursor()
             
-            set_clauses.append(f"{key} = ?")
-            values.append(value)
-        
-        values.append(session_id)
-        
-        query = f"UPDATE debug_sessions SET {', '.join(set_clauses)} WHERE session_id = ?"
-        cursor.execute(query, values)
-        
-        self.conn.commit()
+            set_clauses = []
+            values = []
+            
+            for key, value in updates.items():
+                if key == 'retrieved_chunks' and isinstance(value, (list, dict)):
+                    value = json.dumps(value)
+                    # Let SQLite convert once and store the binary form
+                    set_clauses.append(f"{key} = jsonb(?)" if HAS_JSONB else f"{key} = ?")
+                else:
+                    set_clauses.append(f"{key} = ?")
+                values.append(value)
+            
+            values.append(session_id)
+            
+            query = f"UPDATE debug_sessions SET {', '.join(set_clauses)} WHERE session_id = ?"
+            cursor.execute(query, values)
+    
+    def get_debug_session(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Get a debugging session with its retrieved chunks decoded."""
+        chunks_column = 'json(retrieved_chunks)' if HAS_JSONB else 'retrieved_chunks'
+        
+        with self._ro() as conn:
+            row = conn.execute(f'''
+                SELECT session_id, error_hash, query, {chunks_column} AS retrieved_chunks,
+                       reasoning_tier, llm_calls, total_tokens, success,
+                       created_at, completed_at
+                FROM debug_sessions
+                WHERE session_id = ?
+            ''', (session_id,)).fetchone()
+        
+        if row is None:
+            return None
+        
+        session = dict(row)
+        if session['retrieved_chunks'] is not None:
+            session['retrieved_chunks'] = json.loads(session['retrieved_chunks'])
+        
+        return session
     
     def save_conversation_turn(self, session_id: str, role: str, content: str):
-        """Save a conversation turn."""
-        cursor = self.conn.cursor()
+        """
+        Save a conversation turn.
         
-        cursor.execute('''
-            INSERT INTO conversation_history (session_id, role, content)
-            VALUES (?, ?, ?)
-        ''', (session_id, role, content))
+        When saving many turns, wrap the calls in ``with db.batch():`` so
+        they share a single commit.
+        """
+        with self._rw() as conn:
+            cursor = conn.cursor()
+            
+            (turn_id,) = self._allocate_ids('conversation_history')
+            cursor.execute('''
+                INSERT INTO conversation_history (id, session_id, role, content)
+                VALUES (?, ?, ?, ?)
+            ''', (turn_id, session_id, role, content))
+    
+    def save_conversation_turns(self, session_id: str, turns: List[Tuple[str, str]]):
+        """
+        Save several conversation turns with a single prepared statement.
         
-        self.conn.commit()
+        Args:
+            session_id: Session the turns belong to
+            turns: (role, content) pairs in conversation order
+        """
+        with self._rw() as conn:
+            turn_ids = self._allocate_ids('conversation_history', len(turns))
+            conn.executemany('''
+                INSERT INTO conversation_history (id, session_id, role, content)
+                VALUES (?, ?, ?, ?)
+            ''', [
+                (turn_id, session_id, role, content)
+                for turn_id, (role, content) in zip(turn_ids, turns)
+            ])
     
     def get_conversation_history(self, session_id: str, limit: int = 50) -> List[Dict[str, Any]]:
         """Get conversation history for a session."""
-        cursor = self.conn.cursor()
+        return list(self.iter_conversation_history(session_id, limit))
+    
+    def iter_conversation_history(
+        self,
+        session_id: str,
+        limit: int = -1
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Stream conversation history for a session, oldest first.
         
-        cursor.execute('''
-            SELECT role, content, timestamp
-            FROM conversation_history
-            WHERE session_id = ?
-            ORDER BY timestamp ASC
-            LIMIT ?
-        ''', (session_id, limit))
+        Rows are yielded straight from the cursor, so long histories are
+        never materialized as a list. The reader connection is held until
+        the iterator is exhausted or closed.
         
-        return [dict(row) for row in cursor.fetchall()]
+        Args:
+            session_id: Session to read
+            limit: Maximum number of turns (negative for no limit)
+        """
+        with self._ro() as conn:
+            cursor = conn.cursor()
+            # Build plain dicts directly instead of going through sqlite3.Row
+            cursor.row_factory = _conversation_turn
+            
+            cursor.execute('''
+                SELECT role, content, timestamp
+                FROM conversation_history
+                WHERE session_id = ?
+                ORDER BY timestamp ASC, id ASC
+                LIMIT ?
+            ''', (session_id, limit))
+            
+            yield from cursor
     
     def get_similar_errors(self, error_type: str, limit: int = 10) -> List[Dict[str, Any]]:
         """Find similar errors that were resolved."""
-        cursor = self.conn.cursor()
-        
-        cursor.execute('''
-            SELECT e.*, r.resolution_type, r.patch_applied
-            FROM error_snapshots e
-            JOIN error_resolutions r ON e.error_hash = r.error_hash
-            WHERE e.error_type = ? AND e.resolved = 1 AND r.success = 1
-            ORDER BY e.last_seen DESC
-            LIMIT ?
-        ''', (error_type, limit))
-        
-        return [dict(row) for row in cursor.fetchall()]
+        with self._ro() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute('''
+                SELECT e.*, r.resolution_type, r.patch_applied
+                FROM error_snapshots e
+                JOIN error_resolutions r ON e.error_hash = r.error_hash
+                WHERE e.error_type = ? AND e.resolved = 1 AND r.success = 1
+                ORDER BY e.last_seen DESC
+                LIMIT ?
+            ''', (error_type, limit))
+            
+            return [dict(row) for row in cursor.fetchall()]
     
     def get_error_stats(self) -> Dict[str, Any]:
         """Get error statistics."""
-        cursor = self.conn.cursor()
-        
-        cursor.execute('SELECT COUNT(*) as total FROM error_snapshots')
-        total = cursor.fetchone()['total']
-        
-        cursor.execute('SELECT COUNT(*) as resolved FROM error_snapshots WHERE resolved = 1')
-        resolved = cursor.fetchone()['resolved']
-        
-        cursor.execute('SELECT error_type, COUNT(*) as count FROM error_snapshots GROUP BY error_type ORDER BY count DESC LIMIT 5')
-        top_types = [dict(row) for row in cursor.fetchall()]
-        
-        return {
-            'total_errors': total,
-            'resolved_errors': resolved,
-            'unresolved_errors': total - resolved,
-            'top_error_types': top_types
-        }
+        with self._ro() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute('SELECT COUNT(*) as total FROM error_snapshots')
+            total = cursor.fetchone()['total']
+            
+            cursor.execute('SELECT COUNT(*) as resolved FROM error_snapshots WHERE resolved = 1')
+            resolved = cursor.fetchone()['resolved']
+            
+            cursor.execute('SELECT error_type, COUNT(*) as count FROM error_snapshots GROUP BY error_type ORDER BY count DESC LIMIT 5')
+            top_types = [dict(row) for row in cursor.fetchall()]
+            
+            return {
+                'total_errors': total,
+                'resolved_errors': resolved,
+                'unresolved_errors': total - resolved,
+                'top_error_types': top_types
+            }
     
     def close(self):
-        """Close database connection."""
+        """Close writer and pooled reader connections."""
+        while not self._readers.empty():
+            self._readers.get_nowait().close()
         if self.conn:
             self.conn.close()
     
@@ -300,7 +602,7 @@ def main():
     
     settings = get_settings()
     
-    with ErrorMemoryDB(settings.memory_db_path) as db:
+    with ErrorMemoryDB(settings.memory_db_path, settings.memory_db_max_readers) as db:
         # Test error snapshot
         error_data = {
             'error_hash': 'test_error_123',
@@ -4,13 +4,45 @@ Diff Generator
 Generates unified diffs for code patches.
 """
 
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple, Union
+from functools import lru_cache
 import difflib
+import numpy as np
 from pathlib import Path
 import logging
+import mmap
+import os
+import shutil
+import tempfile
+
+from unidiff import PatchSet
+from unidiff.constants import LINE_TYPE_NO_NEWLINE
+
+try:
+    import pygit2
+    # git's xdiff (C) with the indent heuristic git uses for readable hunks
+    XDIFF_FLAGS = int(pygit2.enums.DiffOption.INDENT_HEURISTIC)
+    HAS_XDIFF = True
+except (ImportError, AttributeError):
+    HAS_XDIFF = False
 
 logger = logging.getLogger(__name__)
 
+# Distinct file contents whose line splits are kept per generator
+SPLIT_CACHE_SIZE = 256
+
+# Context lines per hunk (difflib.unified_diff default)
+CONTEXT_LINES = 3
+
+# Marker following a diff line that has no trailing newline
+NO_NEWLINE_MARKER = '\n\\ No newline at end of file\n'
+
+_PLUS, _MINUS, _NEWLINE = ord('+'), ord('-'), ord('\n')
+
+# pygit2 line origins for content lines; others are "no newline" markers
+# whose content already is NO_NEWLINE_MARKER
+_XDIFF_ORIGINS = frozenset(' +-')
+
 
 class DiffGenerator:
     """
@@ -19,7 +51,26 @@ class DiffGenerator:
     
     def __init__(self):
         """Initialize diff generator."""
-        pass
+        # Keyed by the content string itself: str caches its hash, so repeat
+        # lookups for the same content are cheap
+        self._split_lines = lru_cache(maxsize=SPLIT_CACHE_SIZE)(self._split)
+    
+    @staticmethod
+    def _split(content: str) -> Tuple[str, ...]:
+        """
+        Split content into lines, keeping line endings.
+        
+        Splits on '\\n' only (like git and patch), so other line-break
+        characters inside a line don't desync diffs from the applier.
+        """
+        lines = [line + '\n' for line in content.split('\n')]
+        # Drop the empty remainder after a trailing newline, or the
+        # newline we added to an unterminated last line
+        if lines[-1] == '\n':
+            lines.pop()
+        else:
+            lines[-1] = lines[-1][:-1]
+        return tuple(lines)
     
     def generate_diff(
         self,
@@ -38,18 +89,70 @@ class DiffGenerator:
         Returns:
             Unified diff string
         """
-        original_lines = original_content.splitlines(keepends=True)
-        modified_lines = modified_content.splitlines(keepends=True)
+        if HAS_XDIFF:
+            diff = self._xdiff(original_content, modified_content, file_path)
+            if diff is not None:
+                return diff
+        
+        original_lines = self._split_lines(original_content)
+        modified_lines = self._split_lines(modified_content)
         
-        diff = difflib.unified_diff(
+        parts = []
+        for line in difflib.unified_diff(
             original_lines,
             modified_lines,
             fromfile=f"a/{file_path}",
-            tofile=f"b/{file_path}",
-            lineterm=''
+            tofile=f"b/{file_path}"
+        ):
+            parts.append(line)
+            if not line.endswith('\n'):
+                parts.append(NO_NEWLINE_MARKER)
+        
+        return ''.join(parts)
+    
+    def _xdiff(
+        self,
+        original_content: str,
+        modified_content: str,
+        file_path: str
+    ) -> Optional[str]:
+        """
+        Generate a unified diff with git's C xdiff engine.
+        
+        Output uses the same layout as the difflib path. Returns None when
+        xdiff treats the content as binary.
+        """
+        patch = pygit2.Patch.create_from(
+            original_content,
+            modified_content,
+            context_lines=CONTEXT_LINES,
+            flag=XDIFF_FLAGS
         )
         
-        return ''.join(diff)
+        if patch.delta.is_binary:
+            return None
+        if not patch.hunks:
+            return ''
+        
+        parts = [f"--- a/{file_path}\n", f"+++ b/{file_path}\n"]
+        for hunk in patch.hunks:
+            parts.append(
+                f"@@ -{self._format_range(hunk.old_start, hunk.old_lines)} "
+                f"+{self._format_range(hunk.new_start, hunk.new_lines)} @@\n"
+            )
+            parts.extend(
+                line.origin + line.content if line.origin in _XDIFF_ORIGINS else line.content
+                for line in hunk.lines
+            )
+        
+        return ''.join(parts)
+    
+    @staticmethod
+    def _format_range(start: int, length: int) -> str:
+        """Format a hunk range like difflib (git already uses 1-based starts)."""
+        if length == 1:
+            return str(start)
+        return f"{start},{length}"
     
     def generate_patch(
         self,
@@ -65,20 +168,26 @@ class DiffGenerator:
             Patch dictionary with diffs and metadata
         """
         patches = []
+        diffs: Dict[Tuple[str, str, str], str] = {}
         
         for change in changes:
             file_path = change['file_path']
             original = change.get('original_content', '')
             modified = change.get('modified_content', '')
             
-            diff = self.generate_diff(original, modified, file_path)
+            # Identical changes (e.g. repeated hunks for one file) are diffed once
+            key = (file_path, original, modified)
+            diff = diffs.get(key)
+            if diff is None:
+                diff = diffs[key] = self.generate_diff(original, modified, file_path)
             
             if diff:
+                additions, deletions = self._count_changes(diff)
                 patches.append({
                     'file': file_path,
                     'diff': diff,
-                    'additions': self._count_additions(diff),
-                    'deletions': self._count_deletions(diff)
+                    'additions': additions,
+                    'deletions': deletions
                 })
         
         return {
@@ -88,13 +197,28 @@ class DiffGenerator:
             'total_deletions': sum(p['deletions'] for p in patches)
         }
     
-    def _count_additions(self, diff: str) -> int:
-        """Count added lines in diff."""
-        return sum(1 for line in diff.splitlines() if line.startswith('+') and not line.startswith('+++'))
-    
-    def _count_deletions(self, diff: str) -> int:
-        """Count deleted lines in diff."""
-        return sum(1 for line in diff.splitlines() if line.startswith('-') and not line.startswith('---'))
+    def _count_changes(self, diff: str) -> Tuple[int, int]:
+        """
+        Count added and deleted lines in diff in a single pass.
+        
+        Looks only at the first three bytes of each line, skipping the
+        ``+++``/``---`` file headers.
+        
+        Returns:
+            (additions, deletions)
+        """
+        if not diff:
+            return 0, 0
+        
+        # Pad so the 3-byte lookahead never runs past the end
+        data = np.frombuffer(diff.encode('utf-8') + b'\0\0\0', dtype=np.uint8)
+        starts = np.concatenate(([0], np.flatnonzero(data[:-3] == _NEWLINE) + 1))
+        first, second, third = data[starts], data[starts + 1], data[starts + 2]
+        
+        additions = (first == _PLUS) & ~((second == _PLUS) & (third == _PLUS))
+        deletions = (first == _MINUS) & ~((second == _MINUS) & (third == _MINUS))
+        
+        return int(additions.sum()), int(deletions.sum())
     
     def apply_patch(
         self,
@@ -114,19 +238,27 @@ class DiffGenerator:
             Result dictionary
         """
         try:
-            # Read original file
-            with open(file_path, 'r', encoding='utf-8') as f:
-                original_content = f.read()
+            hunks = self._parse_single_file(patch_content)
+            
+            tmp_path = None
             
-            # Parse patch and apply
-            # This is simplified - production would use proper patch library
-            modified_content = self._apply_unified_diff(original_content, patch_content)
+            # Map the file instead of reading it: only the regions hunks
+            # touch get decoded, the rest is copied through as bytes
+            with open(file_path, 'rb') as f:
+                if os.fstat(f.fileno()).st_size == 0:
+                    segments = self._splice_hunks(b'', hunks)
+                    if not dry_run:
+                        tmp_path = self._write_temp(file_path, b'', segments)
+                else:
+                    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                        segments = self._splice_hunks(mapped, hunks)
+                        if not dry_run:
+                            tmp_path = self._write_temp(file_path, mapped, segments)
             
-            if not dry_run:
-                # Write modified content
-                with open(file_path, 'w', encoding='utf-8') as f:
-                    f.write(modified_content)
-                
+            # Swapped in only once the map and handle are closed: Windows
+            # refuses to replace a file that is open or mapped
+            if tmp_path is not None:
+                self._replace(tmp_path, file_path)
                 logger.info(f"Applied patch to {file_path}")
             
             return {
@@ -145,10 +277,167 @@ class DiffGenerator:
             }
     
     def _apply_unified_diff(self, original: str, diff: str) -> str:
-        """Apply unified diff to content (simplified)."""
-        # In production, use a proper patch library
-        # This is a placeholder
-        return original
+        """
+        Apply a single-file unified diff to content.
+        
+        Hunks are spliced into the original line list and joined once.
+        
+        Raises:
+            ValueError: If the diff spans several files or a hunk's
+                context doesn't match the original
+        """
+        hunks = self._parse_single_file(diff)
+        if not hunks:
+            return original
+        
+        original_lines = self._split_lines(original)
+        result: List[str] = []
+        cursor = 0
+        
+        for hunk in hunks:
+            source, target = self._hunk_lines(hunk)
+            
+            start = self._hunk_start(hunk)
+            if start < cursor or list(original_lines[start:start + len(source)]) != source:
+                raise ValueError(
+                    f"Hunk @@ -{hunk.source_start},{hunk.source_length} @@ does not apply"
+                )
+            
+            result.extend(original_lines[cursor:start])
+            result.extend(target)
+            cursor = start + len(source)
+        
+        result.extend(original_lines[cursor:])
+        
+        return ''.join(result)
+    
+    def _splice_hunks(self, data, hunks) -> List[Union[bytes, Tuple[int, int]]]:
+        """
+        Apply hunks to UTF-8 file bytes without decoding the whole file.
+        
+        Args:
+            data: File contents as bytes or an mmap
+            hunks: Hunks of a single-file diff, in order
+        
+        Returns:
+            Segments that concatenate to the patched file: encoded hunk
+            output as bytes, untouched regions as (start, end) offsets
+            into data
+        
+        Raises:
+            ValueError: If a hunk's context doesn't match the file
+        """
+        size = len(data)
+        segments: List[Union[bytes, Tuple[int, int]]] = []
+        line_no = 0  # 0-based line at `offset`
+        offset = 0
+        cursor = 0  # end of the bytes already emitted
+        
+        def skip_lines(count: int, pos: int) -> int:
+            for _ in range(count):
+                end = data.find(b'\n', pos)
+                pos = size if end < 0 else end + 1
+            return pos
+        
+        for hunk in hunks:
+            source, target = self._hunk_lines(hunk)
+            
+            start = self._hunk_start(hunk)
+            if start < line_no:
+                raise ValueError(
+                    f"Hunk @@ -{hunk.source_start},{hunk.source_length} @@ overlaps previous hunk"
+                )
+            start_offset = skip_lines(start - line_no, offset)
+            end_offset = skip_lines(len(source), start_offset)
+            
+            if data[start_offset:end_offset].decode('utf-8') != ''.join(source):
+                raise ValueError(
+                    f"Hunk @@ -{hunk.source_start},{hunk.source_length} @@ does not apply"
+                )
+            
+            segments.append((cursor, start_offset))
+            segments.append(''.join(target).encode('utf-8'))
+            cursor = offset = end_offset
+            line_no = start + len(source)
+        
+        segments.append((cursor, size))
+        
+        return segments
+    
+    @staticmethod
+    def _write_temp(file_path: str, data, segments: List[Union[bytes, Tuple[int, int]]]) -> str:
+        """Write segments to a temp file next to file_path and return its path."""
+        directory = os.path.dirname(os.path.abspath(file_path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.patch-')
+        try:
+            with os.fdopen(fd, 'wb') as f, memoryview(data) as view:
+                for segment in segments:
+                    if isinstance(segment, tuple):
+                        # Zero-copy slice of the original bytes
+                        f.write(view[segment[0]:segment[1]])
+                    else:
+                        f.write(segment)
+            shutil.copymode(file_path, tmp_path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        return tmp_path
+    
+    @staticmethod
+    def _replace(tmp_path: str, file_path: str):
+        """Swap a temp file from _write_temp in for file_path."""
+        try:
+            os.replace(tmp_path, file_path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+    
+    @staticmethod
+    def _parse_single_file(diff: str) -> list:
+        """Parse a unified diff and return the hunks of its only file."""
+        if not diff:
+            return []
+        
+        patch_set = PatchSet.from_string(diff)
+        if len(patch_set) != 1:
+            raise ValueError(f"Expected a single-file diff, got {len(patch_set)} files")
+        
+        return list(patch_set[0])
+    
+    @staticmethod
+    def _hunk_start(hunk) -> int:
+        """0-based index of the first original line a hunk replaces."""
+        # Pure insertions point at the line before the insertion point
+        return hunk.source_start if hunk.source_length == 0 else hunk.source_start - 1
+    
+    @staticmethod
+    def _hunk_lines(hunk) -> Tuple[List[str], List[str]]:
+        """
+        Split a hunk into its source and target lines.
+        
+        Returns:
+            (source lines, target lines), with line endings
+        """
+        source: List[str] = []
+        target: List[str] = []
+        previous = None
+        
+        for line in hunk:
+            if line.line_type == LINE_TYPE_NO_NEWLINE:
+                # The marker strips the newline from the line before it
+                if previous is not None and (previous.is_context or previous.is_removed):
+                    source[-1] = source[-1][:-1]
+                if previous is not None and (previous.is_context or previous.is_added):
+                    target[-1] = target[-1][:-1]
+                continue
+            
+            if line.is_context or line.is_removed:
+                source.append(line.value)
+            if line.is_context or line.is_added:
+                target.append(line.value)
+            previous = line
+        
+        return source, target
 
 
 def main():
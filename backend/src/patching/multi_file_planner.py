@@ -6,13 +6,32 @@ Plans atomic multi-file changes considering dependencies and conflicts.
 
 from typing import List, Dict, Any, Set, Optional, Tuple
 import logging
+from collections import Counter, deque
 from dataclasses import dataclass
-from pathlib import Path
+import hashlib
+import numpy as np
+
+try:
+    import blake3
+    HAS_BLAKE3 = True
+except ImportError:
+    HAS_BLAKE3 = False
 
 logger = logging.getLogger(__name__)
 
+# Change types, indexed by their code in ChangeColumns.types
+CHANGE_TYPES = ('modify', 'create', 'delete')
+
+# Change sets whose conflicts / dependency order are remembered per planner
+PLAN_CACHE_SIZE = 128
+
 
-@dataclass
+def _new_hasher():
+    """Return a fresh BLAKE3 hasher, or BLAKE2b when blake3 isn't installed."""
+    return blake3.blake3() if HAS_BLAKE3 else hashlib.blake2b()
+
+
+@dataclass(slots=True, frozen=True)
 class FileChange:
     """Represents a change to a single file."""
     file_path: str
@@ -22,7 +41,7 @@ class FileChange:
     dependencies: List[str]  # Other files this change depends on
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class MultiFilePatch:
     """Represents a multi-file patch with dependencies."""
     patch_id: str
@@ -33,6 +52,42 @@ class MultiFilePatch:
     impact_analysis: Dict[str, Any]
 
 
+@dataclass(slots=True, frozen=True)
+class ChangeColumns:
+    """
+    Column-oriented view of a change list.
+    
+    The planner's passes each read one or two fields per change, so they
+    run over these parallel arrays instead of walking FileChange objects.
+    """
+    paths: List[str]
+    dependencies: List[List[str]]
+    types: np.ndarray  # uint8 index into CHANGE_TYPES (len(CHANGE_TYPES) if unknown)
+    original_lines: np.ndarray  # int64 newline counts
+    patched_lines: np.ndarray  # int64 newline counts
+    
+    @classmethod
+    def from_changes(cls, changes: List[FileChange]) -> "ChangeColumns":
+        """Build columns from file changes in one pass per field."""
+        type_codes = {name: code for code, name in enumerate(CHANGE_TYPES)}
+        count = len(changes)
+        
+        return cls(
+            paths=[c.file_path for c in changes],
+            dependencies=[c.dependencies for c in changes],
+            types=np.fromiter(
+                (type_codes.get(c.change_type, len(CHANGE_TYPES)) for c in changes),
+                dtype=np.uint8, count=count
+            ),
+            original_lines=np.fromiter(
+                (c.original_content.count('\n') for c in changes), dtype=np.int64, count=count
+            ),
+            patched_lines=np.fromiter(
+                (c.patched_content.count('\n') for c in changes), dtype=np.int64, count=count
+            ),
+        )
+
+
 class MultiFilePatchPlanner:
     """
     Plan atomic multi-file changes.
@@ -44,7 +99,7 @@ class MultiFilePatchPlanner:
     - Atomic application (all or nothing)
     """
     
-    def __init__(self, neo4j_client=None, symbol_tracer=None):
+    def __init__(self, neo4j_client: Optional[Any] = None, symbol_tracer: Optional[Any] = None):
         """
         Initialize planner.
         
@@ -54,6 +109,10 @@ class MultiFilePatchPlanner:
         """
         self.neo4j_client = neo4j_client
         self.symbol_tracer = symbol_tracer
+        
+        # Results of the pure planning passes, keyed by change-set digest
+        self._order_cache: Dict[bytes, Tuple[str, ...]] = {}
+        self._conflict_cache: Dict[bytes, Tuple[Dict[str, Any], ...]] = {}
     
     def create_multi_file_patch(
         self,
@@ -84,17 +143,19 @@ class MultiFilePatchPlanner:
             for c in changes
         ]
         
+        columns = ChangeColumns.from_changes(file_changes)
+        
         # Resolve dependency order
-        dependency_order = self._resolve_dependencies(file_changes)
+        dependency_order = self._resolve_dependencies(columns)
         
         # Detect conflicts
-        conflicts = self._detect_conflicts(file_changes)
+        conflicts = self._detect_conflicts(columns)
         
         # Analyze impact
-        impact = self._analyze_impact(file_changes)
+        impact = self._analyze_impact(columns, conflicts)
         
         patch = MultiFilePatch(
-            patch_id=f"mfp_{hash(description)}",
+            patch_id=f"mfp_{self._patch_digest(file_changes, description)[:16]}",
             description=description,
             changes=file_changes,
             dependency_order=dependency_order,
@@ -104,56 +165,141 @@ class MultiFilePatchPlanner:
         
         return patch
     
+    @staticmethod
+    def _patch_digest(changes: List[FileChange], description: str) -> str:
+        """
+        Hash the description and change set into a stable hex digest.
+        
+        Unlike hash(), the result doesn't depend on PYTHONHASHSEED, so the
+        same patch gets the same ID across processes.
+        """
+        digest = _new_hasher()
+        digest.update(description.encode('utf-8'))
+        
+        for change in sorted(changes, key=lambda c: c.file_path):
+            for field in (change.file_path, change.change_type, change.patched_content):
+                digest.update(b'\0')
+                digest.update(field.encode('utf-8'))
+        
+        return digest.hexdigest()
+    
+    @staticmethod
+    def _columns_digest(columns: ChangeColumns, with_dependencies: bool) -> bytes:
+        """Digest the (ordered) paths, and optionally dependencies, of a change set."""
+        digest = _new_hasher()
+        
+        for file_path, deps in zip(columns.paths, columns.dependencies):
+            digest.update(b'\0')
+            digest.update(file_path.encode('utf-8'))
+            if with_dependencies:
+                for dep in deps:
+                    digest.update(b'\1')
+                    digest.update(dep.encode('utf-8'))
+        
+        return digest.digest()
+    
+    @staticmethod
+    def _remember(cache: Dict[bytes, Any], key: bytes, value: Any):
+        """Store a cache entry, evicting the oldest one when full."""
+        if len(cache) >= PLAN_CACHE_SIZE:
+            cache.pop(next(iter(cache)))
+        cache[key] = value
+    
     def _resolve_dependencies(
         self,
-        changes: List[FileChange]
+        columns: ChangeColumns
     ) -> List[str]:
         """
         Resolve dependency order for applying changes.
         
+        The order depends only on paths and dependencies, so repeated
+        change sets are served from cache.
+        """
+        key = self._columns_digest(columns, with_dependencies=True)
+        
+        order = self._order_cache.get(key)
+        if order is None:
+            order = tuple(self._topological_order(columns))
+            self._remember(self._order_cache, key, order)
+        
+        return list(order)
+    
+    def _topological_order(
+        self,
+        columns: ChangeColumns
+    ) -> List[str]:
+        """
+        Order files so dependencies are applied before their dependents.
+        
         Uses topological sort.
         """
         # Build dependency graph
         graph: Dict[str, Set[str]] = {}
-        in_degree: Dict[str, int] = {}
         
-        for change in changes:
-            graph[change.file_path] = set(change.dependencies)
-            in_degree[change.file_path] = 0
+        for file_path, deps in zip(columns.paths, columns.dependencies):
+            graph.setdefault(file_path, set()).update(deps)
+        
+        # In-degree = dependencies inside this patch; reverse edges point
+        # from a dependency to its dependents
+        in_degree: Dict[str, int] = {}
+        dependents: Dict[str, List[str]] = {}
         
-        # Calculate in-degrees
-        for file_path in graph:
-            for dep in graph[file_path]:
-                if dep in in_degree:
-                    in_degree[dep] += 1
+        for file_path, file_deps in graph.items():
+            in_degree[file_path] = 0
+            for dep in file_deps:
+                if dep in graph and dep != file_path:
+                    in_degree[file_path] += 1
+                    dependents.setdefault(dep, []).append(file_path)
         
-        # Topological sort (Kahn's algorithm)
-        queue = [f for f in graph if in_degree[f] == 0]
+        # Topological sort (Kahn's algorithm), O(V + E)
+        queue = deque(f for f in graph if in_degree[f] == 0)
         order = []
         
         while queue:
-            current = queue.pop(0)
+            current = queue.popleft()
             order.append(current)
             
-            for neighbor in graph.get(current, set()):
-                if neighbor in in_degree:
-                    in_degree[neighbor] -= 1
-                    if in_degree[neighbor] == 0:
-                        queue.append(neighbor)
+            for neighbor in dependents.get(current, ()):
+                in_degree[neighbor] -= 1
+                if in_degree[neighbor] == 0:
+                    queue.append(neighbor)
         
         # Check for cycles
-        if len(order) != len(changes):
+        if len(order) != len(graph):
             logger.warning("Circular dependencies detected in patch")
         
         return order
     
     def _detect_conflicts(
         self,
-        changes: List[FileChange]
+        columns: ChangeColumns
     ) -> List[Dict[str, Any]]:
         """
         Detect conflicts between changes.
         
+        Without a symbol tracer, conflicts depend only on the paths, so
+        repeated change sets are served from cache.
+        """
+        if self.symbol_tracer:
+            return self._find_conflicts(columns)
+        
+        key = self._columns_digest(columns, with_dependencies=False)
+        
+        conflicts = self._conflict_cache.get(key)
+        if conflicts is None:
+            conflicts = tuple(self._find_conflicts(columns))
+            self._remember(self._conflict_cache, key, conflicts)
+        
+        # Callers own the returned dicts
+        return [dict(conflict) for conflict in conflicts]
+    
+    def _find_conflicts(
+        self,
+        columns: ChangeColumns
+    ) -> List[Dict[str, Any]]:
+        """
+        Find conflicts between changes.
+        
         Conflicts occur when:
         - Multiple changes to same file/lines
         - Symbol renames that clash
@@ -161,20 +307,16 @@ class MultiFilePatchPlanner:
         """
         conflicts = []
         
-        # Group changes by file
-        by_file: Dict[str, List[FileChange]] = {}
-        for change in changes:
-            if change.file_path not in by_file:
-                by_file[change.file_path] = []
-            by_file[change.file_path].append(change)
+        # Count changes per file
+        by_file = Counter(columns.paths)
         
         # Check for multiple changes to same file
-        for file_path, file_changes in by_file.items():
-            if len(file_changes) > 1:
+        for file_path, count in by_file.items():
+            if count > 1:
                 conflicts.append({
                     'type': 'multiple_changes',
                     'file': file_path,
-                    'count': len(file_changes),
+                    'count': count,
                     'severity': 'high',
                     'message': f"Multiple changes to {file_path}",
                 })
@@ -188,49 +330,50 @@ class MultiFilePatchPlanner:
     
     def _analyze_impact(
         self,
-        changes: List[FileChange]
+        columns: ChangeColumns,
+        conflicts: Optional[List[Dict[str, Any]]] = None
     ) -> Dict[str, Any]:
         """
         Analyze impact of multi-file patch.
         
+        Args:
+            columns: Column view of the file changes in the patch
+            conflicts: Conflicts already found by _detect_conflicts
+                (detected here if not given)
+        
         Returns:
             Impact analysis data
         """
-        impact = {
-            'total_files': len(changes),
-            'total_additions': 0,
-            'total_deletions': 0,
-            'files_modified': 0,
-            'files_created': 0,
-            'files_deleted': 0,
+        total_files = len(columns.paths)
+        type_counts = np.bincount(columns.types, minlength=len(CHANGE_TYPES) + 1)
+        
+        # Net line delta per file, split into additions and deletions
+        line_delta = columns.patched_lines - columns.original_lines
+        
+        impact: Dict[str, Any] = {
+            'total_files': total_files,
+            'total_additions': int(np.maximum(line_delta, 0).sum()),
+            'total_deletions': int(np.maximum(-line_delta, 0).sum()),
+            'files_modified': int(type_counts[0]),
+            'files_created': int(type_counts[1]),
+            'files_deleted': int(type_counts[2]),
             'risk_score': 0.0,
             'affected_modules': set(),
         }
         
-        for change in changes:
-            if change.change_type == 'modify':
-                impact['files_modified'] += 1
-            elif change.change_type == 'create':
-                impact['files_created'] += 1
-            elif change.change_type == 'delete':
-                impact['files_deleted'] += 1
-            
-            # Calculate line changes
-            original_lines = change.original_content.count('\n')
-            patched_lines = change.patched_content.count('\n')
-            
-            if patched_lines > original_lines:
-                impact['total_additions'] += patched_lines - original_lines
+        # Track modules (parent directory, as Path(...).parent would give)
+        for file_path in columns.paths:
+            idx = file_path.rfind('/')
+            if idx > 0:
+                impact['affected_modules'].add(file_path[:idx])
             else:
-                impact['total_deletions'] += original_lines - patched_lines
-            
-            # Track modules
-            module = str(Path(change.file_path).parent)
-            impact['affected_modules'].add(module)
+                impact['affected_modules'].add('/' if idx == 0 else '.')
         
         # Calculate risk score (0-100)
-        base_risk = len(changes) * 10  # More files = more risk
-        conflict_risk = len(self._detect_conflicts(changes)) * 20
+        base_risk = total_files * 10  # More files = more risk
+        if conflicts is None:
+            conflicts = self._detect_conflicts(columns)
+        conflict_risk = len(conflicts) * 20
         impact['risk_score'] = min(100, base_risk + conflict_risk)
         
         # Convert set to list for JSON serialization
@@ -245,7 +388,7 @@ class MultiFilePatchPlanner:
         Returns:
             Validation result
         """
-        result = {
+        result: Dict[str, Any] = {
             'valid': True,
             'errors': [],
             'warnings': [],
@@ -11,13 +11,225 @@ Validates code patches before applying them:
 import subprocess
 import tempfile
 import os
-from typing import Dict, Any, List, Optional
+import atexit
+import re
+import json
+import copy
+import hashlib
+import contextlib
+import multiprocessing
+import queue
+import threading
+from collections import OrderedDict, defaultdict
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple
 from pathlib import Path
 import logging
 import shutil
 
+try:
+    from mypy import api as mypy_api
+    HAS_MYPY_API = True
+except ImportError:
+    HAS_MYPY_API = False
+
+try:
+    from flake8.api import legacy as flake8_legacy
+    from flake8.formatting.default import Default as Flake8Formatter
+    HAS_FLAKE8_API = True
+except ImportError:
+    HAS_FLAKE8_API = False
+
 logger = logging.getLogger(__name__)
 
+# Seconds to wait for a single checker run
+CHECK_TIMEOUT = 30
+
+# Languages whose syntax is checked by node
+NODE_LANGUAGES = ('typescript', 'javascript')
+
+# Languages that have a linter wired up
+LINTED_LANGUAGES = ('python', *NODE_LANGUAGES)
+
+# Seconds to wait for the node syntax worker
+NODE_CHECK_TIMEOUT = 10
+
+# Long-lived node process: reads one JSON-encoded path per line and answers
+# with one JSON line. Sources are compiled with the CommonJS wrapper, like
+# `node --check`, so a top-level return is accepted; sources that fail there
+# and use import/export are parsed again as ES modules.
+NODE_CHECK_SCRIPT = r"""
+const fs = require('fs');
+const vm = require('vm');
+const params = ['exports', 'require', 'module', '__filename', '__dirname'];
+const moduleSyntax = /^\s*(import|export)\b/m;
+function check(path) {
+  const source = fs.readFileSync(path, 'utf8');
+  try {
+    vm.compileFunction(source, params, {filename: path});
+  } catch (e) {
+    if (!(e instanceof SyntaxError) || !moduleSyntax.test(source)) throw e;
+    if (vm.SourceTextModule) {
+      new vm.SourceTextModule(source, {identifier: path});
+    } else {
+      const run = require('child_process').spawnSync(
+        process.execPath, ['--check', path], {encoding: 'utf8'});
+      if (run.status !== 0) throw new SyntaxError(run.stderr.trim());
+    }
+  }
+}
+require('readline').createInterface({input: process.stdin}).on('line', (line) => {
+  const path = JSON.parse(line);
+  try {
+    check(path);
+    console.log(JSON.stringify({ok: true}));
+  } catch (e) {
+    console.log(JSON.stringify({ok: false, err: String(e.stack).split('\n    at ')[0]}));
+  }
+});
+"""
+
+# Number of validation results kept, keyed by patched content
+VALIDATION_CACHE_SIZE = 512
+
+# Long-lived workers that keep mypy/flake8 imported between validations
+_POOL: Optional[ProcessPoolExecutor] = None
+_POOL_LOCK = threading.Lock()
+
+# Threads that wait on checkers concurrently; checks spend their time in
+# subprocesses or worker processes, so the GIL is free meanwhile
+_THREADS: Optional[ThreadPoolExecutor] = None
+
+# mypy daemon shared by the process; keeps the stub graph resident
+DMYPY_FLAGS = ['--follow-imports=skip', '--no-error-summary']
+_DMYPY_START: Optional[subprocess.Popen] = None
+_DMYPY_STATUS_FILE = os.path.join(tempfile.gettempdir(), f"dmypy-{os.getpid()}.json")
+_DMYPY_LOCK = threading.Lock()
+
+# "path:line:" prefix shared by mypy and flake8 diagnostics
+DIAGNOSTIC_RE = re.compile(r'^(?P<path>[^:]+):(?P<line>\d+):')
+
+
+def _read_lines(stream, lines: "queue.Queue[str]"):
+    """Forward lines from a pipe to a queue; '' marks end of stream."""
+    for line in stream:
+        lines.put(line)
+    lines.put('')
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    """Return the shared checker pool, creating it on first use."""
+    global _POOL
+    
+    with _POOL_LOCK:
+        if _POOL is None:
+            # Spawned, not forked: the validator runs inside threaded servers
+            _POOL = ProcessPoolExecutor(
+                max_workers=os.cpu_count() or 1,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+        return _POOL
+
+
+def _get_threads() -> ThreadPoolExecutor:
+    """Return the shared checker thread pool, creating it on first use."""
+    global _THREADS
+    
+    with _POOL_LOCK:
+        if _THREADS is None:
+            _THREADS = ThreadPoolExecutor(thread_name_prefix='patch-check')
+        return _THREADS
+
+
+def _start_dmypy(dmypy: str) -> subprocess.Popen:
+    """
+    Start this process's mypy daemon once; it is stopped again at exit.
+    
+    Args:
+        dmypy: dmypy executable
+    
+    Returns:
+        The `dmypy start` process; wait on it before the first check
+    """
+    global _DMYPY_START
+    
+    with _DMYPY_LOCK:
+        if _DMYPY_START is None:
+            _DMYPY_START = subprocess.Popen(
+                [dmypy, '--status-file', _DMYPY_STATUS_FILE, 'start', '--', *DMYPY_FLAGS],
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL
+            )
+            atexit.register(_stop_dmypy, dmypy)
+        return _DMYPY_START
+
+
+def _stop_dmypy(dmypy: str):
+    """Stop the mypy daemon started by _start_dmypy."""
+    try:
+        subprocess.run(
+            [dmypy, '--status-file', _DMYPY_STATUS_FILE, 'stop'],
+            capture_output=True,
+            timeout=CHECK_TIMEOUT
+        )
+    except Exception as e:
+        logger.warning(f"Failed to stop dmypy: {e}")
+
+
+def _mypy_check(paths: List[str]) -> Tuple[str, int]:
+    """Run mypy in-process. Executes inside a pool worker."""
+    stdout, _stderr, status = mypy_api.run(['--no-error-summary', *paths])
+    return stdout, status
+
+
+def _flake8_check(paths: List[str]) -> List[str]:
+    """Run flake8 in-process and collect report lines. Executes inside a pool worker."""
+    lines: List[str] = []
+    
+    class _Collector(Flake8Formatter):
+        def write(self, line: Optional[str], source: Optional[str]) -> None:
+            if line:
+                lines.append(line)
+    
+    style = flake8_legacy.get_style_guide(select=['E', 'W'])
+    style.init_report(_Collector)
+    style.check_files(paths)
+    
+    return lines
+
+
+def _group_by_path(lines: List[str], paths: List[str]) -> Dict[str, List[str]]:
+    """
+    Split checker output into per-file diagnostics.
+    
+    Checkers may print paths relative to the working directory, so both
+    sides are compared as absolute paths. mypy can also replay cached
+    diagnostics under the path a module had on an earlier run, so lines
+    that match no path fall back to a file name match.
+    
+    Args:
+        lines: Checker output lines
+        paths: Files that were checked
+    
+    Returns:
+        Mapping of each input path to its diagnostic lines
+    """
+    by_abspath = {os.path.abspath(path): path for path in paths}
+    by_name = {os.path.basename(path): path for path in paths}
+    grouped: Dict[str, List[str]] = defaultdict(list)
+    
+    for line in lines:
+        match = DIAGNOSTIC_RE.match(line)
+        if not match:
+            continue
+        
+        reported = match.group('path')
+        path = by_abspath.get(os.path.abspath(reported)) or by_name.get(os.path.basename(reported))
+        if path is not None:
+            grouped[path].append(line)
+    
+    return {path: grouped.get(path, []) for path in paths}
+
 
 class PatchValidator:
     """
@@ -39,6 +251,40 @@ class PatchValidator:
             use_docker: Use Docker for isolation (recommended for production)
         """
         self.use_docker = use_docker
+        
+        # Native checkers are preferred when installed; resolve them once
+        self._ruff = shutil.which('ruff')
+        self._pyright = shutil.which('pyright')
+        
+        # mypy daemon for incremental checks when pyright is not available
+        self._dmypy = shutil.which('dmypy') if not self._pyright else None
+        if self._dmypy:
+            _start_dmypy(self._dmypy)
+        
+        # sha256(patched_content) + language + file name -> validation result (LRU)
+        self._cache: OrderedDict[bytes, Dict[str, Any]] = OrderedDict()
+        # Guards the LRU: one validator may serve several request threads
+        self._cache_lock = threading.Lock()
+        
+        # Node syntax worker, started on the first JS/TS check
+        self._node: Optional[subprocess.Popen] = None
+        self._node_replies: "queue.Queue[str]" = queue.Queue()
+        self._node_lock = threading.Lock()
+    
+    def close(self):
+        """Stop the node syntax worker."""
+        with self._node_lock:
+            if self._node is not None:
+                self._node.stdin.close()
+                self._node.terminate()
+                self._node.wait()
+                self._node = None
+    
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
     
     def validate_patch(
         self,
@@ -59,83 +305,285 @@ class PatchValidator:
         Returns:
             Validation result
         """
+        key = self._cache_key(file_path, patched_content, language)
+        cached = self._cache_get(key)
+        if cached is not None:
+            logger.debug(f"Validation cache hit for {file_path}")
+            return cached
+        
         logger.info(f"Validating patch for {file_path}")
         
-        results = {
-            'valid': True,
-            'checks': {},
-            'errors': [],
-            'warnings': [],
-        }
+        results = self._new_result()
         
         try:
-            # Create temporary directory
-            with tempfile.TemporaryDirectory() as tmpdir:
-                tmp_file = Path(tmpdir) / Path(file_path).name
+            with contextlib.ExitStack() as stack:
+                tmp_file: Optional[Path] = None
                 
-                # Write patched content
-                tmp_file.write_text(patched_content, encoding='utf-8')
+                def ensure_tmp() -> str:
+                    """Write the patched content to disk the first time a checker needs it."""
+                    nonlocal tmp_file
+                    if tmp_file is None:
+                        tmpdir = stack.enter_context(tempfile.TemporaryDirectory())
+                        tmp_file = Path(tmpdir) / Path(file_path).name
+                        tmp_file.write_text(patched_content, encoding='utf-8')
+                    return str(tmp_file)
                 
-                # Run syntax check
-                syntax_result = self._check_syntax(str(tmp_file), language)
-                results['checks']['syntax'] = syntax_result
+                # Checks are independent: start the external ones together
+                # so validation takes as long as the slowest, not the sum
+                threads = _get_threads()
+                syntax_future: Optional[Future] = None
+                type_future: Optional[Future] = None
+                lint_future: Optional[Future] = None
                 
-                if not syntax_result['passed']:
-                    results['valid'] = False
-                    results['errors'].extend(syntax_result.get('errors', []))
+                if language in NODE_LANGUAGES:
+                    syntax_future = threads.submit(
+                        self._check_syntax_subprocess, ensure_tmp(), language
+                    )
+                if language in ['python', 'typescript']:
+                    type_future = threads.submit(self._check_types, ensure_tmp(), language)
+                if language in LINTED_LANGUAGES:
+                    lint_future = threads.submit(self._run_linter, ensure_tmp(), language)
+                
+                # Run syntax check (in memory for Python)
+                if language == 'python':
+                    syntax_result = self._check_syntax_python(patched_content, file_path)
+                elif syntax_future is not None:
+                    syntax_result = syntax_future.result()
+                else:
+                    syntax_result = {'passed': True, 'errors': []}
+                self._record_syntax(results, syntax_result)
                 
                 # Run type checker
-                if language in ['python', 'typescript']:
-                    type_result = self._check_types(str(tmp_file), language)
-                    results['checks']['types'] = type_result
-                    
-                    if not type_result['passed']:
-                        # Type errors are warnings, not failures
-                        results['warnings'].extend(type_result.get('errors', []))
+                if type_future is not None:
+                    self._record_types(results, type_future.result())
                 
                 # Run linter
-                lint_result = self._run_linter(str(tmp_file), language)
-                results['checks']['lint'] = lint_result
-                
-                if not lint_result['passed']:
-                    results['warnings'].extend(lint_result.get('warnings', []))
+                if lint_future is not None:
+                    lint_result = lint_future.result()
+                else:
+                    lint_result = {'passed': True, 'warnings': []}
+                self._record_lint(results, lint_result)
         
         except Exception as e:
             logger.error(f"Validation error: {e}")
             results['valid'] = False
             results['errors'].append(str(e))
+            return results
+        
+        self._cache_put(key, results)
         
         return results
     
-    def _check_syntax(self, file_path: str, language: str) -> Dict[str, Any]:
-        """Check syntax validity."""
-        result = {'passed': True, 'errors': []}
+    def validate_patches(self, patches: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Validate several patches with a single type checker and linter run.
+        
+        Python files are written into one temporary directory and handed to
+        mypy and flake8 together, so their start-up cost is paid once per
+        batch instead of once per file. Output is split back per file by
+        its "path:line:" prefix.
+        
+        Args:
+            patches: Dicts with file_path, original_content, patched_content
+                     and language, as taken by validate_patch
+        
+        Returns:
+            Validation results in input order
+        """
+        keys = [
+            self._cache_key(p['file_path'], p['patched_content'], p['language'])
+            for p in patches
+        ]
+        cached = [self._cache_get(key) for key in keys]
+        
+        # Identical misses within the batch are validated once
+        pending: Dict[bytes, List[int]] = {}
+        for i, result in enumerate(cached):
+            if result is None:
+                pending.setdefault(keys[i], []).append(i)
+        
+        if pending:
+            fresh = self._validate_uncached(
+                [patches[indices[0]] for indices in pending.values()],
+                list(pending)
+            )
+            for indices, result in zip(pending.values(), fresh):
+                cached[indices[0]] = result
+                for i in indices[1:]:
+                    cached[i] = copy.deepcopy(result)
+        
+        return cached
+    
+    def _validate_uncached(
+        self,
+        patches: List[Dict[str, Any]],
+        keys: List[bytes]
+    ) -> List[Dict[str, Any]]:
+        """Batch-validate patches that missed the cache."""
+        logger.info(f"Validating {len(patches)} patches")
+        
+        all_results = [self._new_result() for _ in patches]
         
         try:
-            if language == 'python':
-                # Use Python's compile to check syntax
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    code = f.read()
+            with tempfile.TemporaryDirectory() as tmpdir:
+                tmp_paths = []
                 
-                try:
-                    compile(code, file_path, 'exec')
-                except SyntaxError as e:
-                    result['passed'] = False
-                    result['errors'].append(f"Syntax error at line {e.lineno}: {e.msg}")
+                for i, patch in enumerate(patches):
+                    # Index prefix keeps same-named files apart
+                    tmp_file = Path(tmpdir) / f"{i}_{Path(patch['file_path']).name}"
+                    tmp_file.write_text(patch['patched_content'], encoding='utf-8')
+                    tmp_paths.append(str(tmp_file))
+                
+                syntax_results = [
+                    self._check_syntax_python(patch['patched_content'], patch['file_path'])
+                    if patch['language'] == 'python'
+                    else self._check_syntax_subprocess(tmp_path, patch['language'])
+                    for tmp_path, patch in zip(tmp_paths, patches)
+                ]
+                
+                python_paths = [
+                    tmp_path for tmp_path, patch in zip(tmp_paths, patches)
+                    if patch['language'] == 'python'
+                ]
+                # A syntax error stops mypy for every file in the run,
+                # so broken files are type checked on their own
+                parsed_paths = [
+                    tmp_path for tmp_path, patch, syntax_result
+                    in zip(tmp_paths, patches, syntax_results)
+                    if patch['language'] == 'python' and syntax_result['passed']
+                ]
+                
+                threads = _get_threads()
+                type_future = threads.submit(self._check_types_python, parsed_paths) if parsed_paths else None
+                lint_future = threads.submit(self._run_linter_python, python_paths) if python_paths else None
+                
+                type_results = type_future.result() if type_future else {}
+                lint_results = lint_future.result() if lint_future else {}
+                
+                for tmp_path, patch, syntax_result, results in zip(
+                    tmp_paths, patches, syntax_results, all_results
+                ):
+                    language = patch['language']
+                    
+                    self._record_syntax(results, syntax_result)
+                    
+                    if language == 'python':
+                        if tmp_path not in type_results:
+                            type_results.update(self._check_types_python([tmp_path]))
+                        
+                        self._record_types(results, type_results[tmp_path])
+                        self._record_lint(results, lint_results[tmp_path])
+                    else:
+                        if language == 'typescript':
+                            self._record_types(results, self._check_types(tmp_path, language))
+                        
+                        self._record_lint(results, self._run_linter(tmp_path, language))
+        
+        except Exception as e:
+            logger.error(f"Validation error: {e}")
+            for results in all_results:
+                results['valid'] = False
+                results['errors'].append(str(e))
+            return all_results
+        
+        for key, results in zip(keys, all_results):
+            self._cache_put(key, results)
+        
+        return all_results
+    
+    def _cache_key(self, file_path: str, patched_content: str, language: str) -> bytes:
+        """
+        Content address of a validation: identical files validate identically.
+        
+        Checkers see the file under its base name, which appears in their
+        messages (and names the module for mypy), so it is part of the key.
+        """
+        # Raw 32-byte digest: half the size of hexdigest and a single memcmp
+        # on lookup; usedforsecurity=False lets OpenSSL pick its fastest path
+        digest = hashlib.sha256(patched_content.encode('utf-8'), usedforsecurity=False).digest()
+        return digest + language.encode('ascii') + b'/' + Path(file_path).name.encode('utf-8')
+    
+    def _cache_get(self, key: bytes) -> Optional[Dict[str, Any]]:
+        """Return a copy of a cached result, marking it most recently used."""
+        with self._cache_lock:
+            result = self._cache.get(key)
+            if result is None:
+                return None
             
-            elif language in ['typescript', 'javascript']:
-                # Use tsc or node to check syntax
-                cmd = ['node', '--check', file_path]
-                proc = subprocess.run(
-                    cmd,
-                    capture_output=True,
-                    text=True,
-                    timeout=10
-                )
+            self._cache.move_to_end(key)
+        
+        # Stored results are never mutated, so copying outside the lock is safe
+        return copy.deepcopy(result)
+    
+    def _cache_put(self, key: bytes, result: Dict[str, Any]):
+        """Cache a copy of a result, evicting the least recently used entry."""
+        result = copy.deepcopy(result)
+        
+        with self._cache_lock:
+            self._cache[key] = result
+            self._cache.move_to_end(key)
+            
+            if len(self._cache) > VALIDATION_CACHE_SIZE:
+                self._cache.popitem(last=False)
+    
+    def _new_result(self) -> Dict[str, Any]:
+        """Create an empty validation result."""
+        return {
+            'valid': True,
+            'checks': {},
+            'errors': [],
+            'warnings': [],
+        }
+    
+    def _record_syntax(self, results: Dict[str, Any], syntax_result: Dict[str, Any]):
+        """Record a syntax check; failures invalidate the patch."""
+        results['checks']['syntax'] = syntax_result
+        
+        if not syntax_result['passed']:
+            results['valid'] = False
+            results['errors'].extend(syntax_result.get('errors', []))
+    
+    def _record_types(self, results: Dict[str, Any], type_result: Dict[str, Any]):
+        """Record a type check."""
+        results['checks']['types'] = type_result
+        
+        if not type_result['passed']:
+            # Type errors are warnings, not failures
+            results['warnings'].extend(type_result.get('errors', []))
+    
+    def _record_lint(self, results: Dict[str, Any], lint_result: Dict[str, Any]):
+        """Record a lint run."""
+        results['checks']['lint'] = lint_result
+        
+        if not lint_result['passed']:
+            results['warnings'].extend(lint_result.get('warnings', []))
+    
+    def _check_syntax_python(self, content: str, file_path: str) -> Dict[str, Any]:
+        """Check Python syntax by compiling the source in memory."""
+        result = {'passed': True, 'errors': []}
+        
+        try:
+            compile(content, file_path, 'exec')
+        except SyntaxError as e:
+            result['passed'] = False
+            result['errors'].append(f"Syntax error at line {e.lineno}: {e.msg}")
+        except Exception as e:
+            result['passed'] = False
+            result['errors'].append(str(e))
+        
+        return result
+    
+    def _check_syntax_subprocess(self, file_path: str, language: str) -> Dict[str, Any]:
+        """Check syntax of a file on disk with an external tool."""
+        result = {'passed': True, 'errors': []}
+        
+        try:
+            if language in NODE_LANGUAGES:
+                reply = self._node_check(file_path)
                 
-                if proc.returncode != 0:
+                if not reply['ok']:
                     result['passed'] = False
-                    result['errors'].append(proc.stderr)
+                    result['errors'].append(reply['err'])
         
         except Exception as e:
             result['passed'] = False
@@ -143,24 +591,58 @@ class PatchValidator:
         
         return result
     
+    def _node_check(self, file_path: str) -> Dict[str, Any]:
+        """
+        Syntax check a JS/TS file with the persistent node worker.
+        
+        Node start-up is paid once per validator instead of once per file.
+        
+        Args:
+            file_path: File on disk to check
+        
+        Returns:
+            Worker reply: {'ok': True} or {'ok': False, 'err': message}
+        """
+        with self._node_lock:
+            if self._node is None or self._node.poll() is not None:
+                self._node = subprocess.Popen(
+                    ['node', '--experimental-vm-modules', '--no-warnings', '-e', NODE_CHECK_SCRIPT],
+                    stdin=subprocess.PIPE,
+                    stdout=subprocess.PIPE,
+                    text=True
+                )
+                self._node_replies = queue.Queue()
+                threading.Thread(
+                    target=_read_lines,
+                    args=(self._node.stdout, self._node_replies),
+                    daemon=True
+                ).start()
+            
+            node = self._node
+            node.stdin.write(json.dumps(file_path) + '\n')
+            node.stdin.flush()
+            
+            try:
+                line = self._node_replies.get(timeout=NODE_CHECK_TIMEOUT)
+            except queue.Empty:
+                line = ''
+            
+            if not line:
+                # Hung or crashed; the next check starts a fresh worker
+                node.kill()
+                node.wait()
+                self._node = None
+                raise RuntimeError("node syntax worker did not answer")
+        
+        return json.loads(line)
+    
     def _check_types(self, file_path: str, language: str) -> Dict[str, Any]:
         """Run type checker."""
         result = {'passed': True, 'errors': []}
         
         try:
             if language == 'python':
-                # Run mypy
-                cmd = ['mypy', '--no-error-summary', file_path]
-                proc = subprocess.run(
-                    cmd,
-                    capture_output=True,
-                    text=True,
-                    timeout=30
-                )
-                
-                if proc.returncode != 0:
-                    result['passed'] = False
-                    result['errors'] = proc.stdout.split('\n')
+                return self._check_types_python([file_path])[file_path]
             
             elif language == 'typescript':
                 # Run tsc
@@ -169,7 +651,7 @@ class PatchValidator:
                     cmd,
                     capture_output=True,
                     text=True,
-                    timeout=30
+                    timeout=CHECK_TIMEOUT
                 )
                 
                 if proc.returncode != 0:
@@ -192,18 +674,7 @@ class PatchValidator:
         
         try:
             if language == 'python':
-                # Run flake8
-                cmd = ['flake8', '--select=E,W', file_path]
-                proc = subprocess.run(
-                    cmd,
-                    capture_output=True,
-                    text=True,
-                    timeout=30
-                )
-                
-                if proc.returncode != 0:
-                    result['passed'] = False
-                    result['warnings'] = proc.stdout.split('\n')
+                return self._run_linter_python([file_path])[file_path]
             
             elif language in ['typescript', 'javascript']:
                 # Run eslint
@@ -212,7 +683,7 @@ class PatchValidator:
                     cmd,
                     capture_output=True,
                     text=True,
-                    timeout=30
+                    timeout=CHECK_TIMEOUT
                 )
                 
                 if proc.returncode != 0:
@@ -227,6 +698,172 @@ class PatchValidator:
         
         return result
     
+    def _check_types_python(self, file_paths: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Type check several files in one run and return a result per file."""
+        if self._pyright:
+            try:
+                return self._run_pyright(file_paths)
+            except FileNotFoundError:
+                logger.warning("pyright disappeared from PATH, falling back to mypy")
+                self._pyright = None
+            except ValueError as e:
+                logger.warning(f"Unreadable pyright output ({e}), falling back to mypy")
+        
+        try:
+            stdout, status = self._run_mypy(file_paths)
+        
+        except FileNotFoundError:
+            # Type checker not installed
+            return {
+                path: {'passed': True, 'errors': ['Type checker not available']}
+                for path in file_paths
+            }
+        except Exception as e:
+            return {path: {'passed': False, 'errors': [str(e)]} for path in file_paths}
+        
+        if status == 0:
+            return {path: {'passed': True, 'errors': []} for path in file_paths}
+        
+        grouped = _group_by_path(stdout.splitlines(), file_paths)
+        
+        if not any(grouped.values()):
+            # mypy failed without a per-file diagnostic (e.g. bad invocation)
+            return {path: {'passed': False, 'errors': stdout.split('\n')} for path in file_paths}
+        
+        return {
+            path: {'passed': not errors, 'errors': errors}
+            for path, errors in grouped.items()
+        }
+    
+    def _run_mypy(self, file_paths: List[str]) -> Tuple[str, int]:
+        """Run mypy over files, preferring the daemon, and return (stdout, status)."""
+        if self._dmypy:
+            try:
+                return self._run_dmypy(file_paths)
+            except Exception as e:
+                logger.warning(f"dmypy unavailable ({e}), falling back to mypy")
+                self._dmypy = None
+        
+        if HAS_MYPY_API:
+            return _get_pool().submit(
+                _mypy_check, file_paths
+            ).result(timeout=CHECK_TIMEOUT)
+        
+        cmd = ['mypy', '--no-error-summary', *file_paths]
+        proc = subprocess.run(
+            cmd,
+            capture_output=True,
+            text=True,
+            timeout=CHECK_TIMEOUT
+        )
+        
+        return proc.stdout, proc.returncode
+    
+    def _run_dmypy(self, file_paths: List[str]) -> Tuple[str, int]:
+        """Check files incrementally with the shared mypy daemon."""
+        starter = _start_dmypy(self._dmypy)
+        if starter.wait(timeout=CHECK_TIMEOUT) != 0:
+            raise RuntimeError("dmypy failed to start")
+        
+        cmd = [self._dmypy, '--status-file', _DMYPY_STATUS_FILE, 'check', *file_paths]
+        proc = subprocess.run(
+            cmd,
+            capture_output=True,
+            text=True,
+            timeout=CHECK_TIMEOUT
+        )
+        
+        # Status 2 means the daemon itself failed, not the checked code
+        if proc.returncode == 2:
+            raise RuntimeError(proc.stderr.strip() or proc.stdout.strip())
+        
+        return proc.stdout, proc.returncode
+    
+    def _run_linter_python(self, file_paths: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Lint several files in one run and return a result per file."""
+        if self._ruff:
+            try:
+                return self._run_ruff(file_paths)
+            except FileNotFoundError:
+                logger.warning("ruff disappeared from PATH, falling back to flake8")
+                self._ruff = None
+            except ValueError as e:
+                logger.warning(f"Unreadable ruff output ({e}), falling back to flake8")
+        
+        try:
+            if HAS_FLAKE8_API:
+                lines = _get_pool().submit(
+                    _flake8_check, file_paths
+                ).result(timeout=CHECK_TIMEOUT)
+            else:
+                cmd = ['flake8', '--select=E,W', '--jobs=auto', *file_paths]
+                proc = subprocess.run(
+                    cmd,
+                    capture_output=True,
+                    text=True,
+                    timeout=CHECK_TIMEOUT
+                )
+                lines = proc.stdout.splitlines()
+        
+        except FileNotFoundError:
+            # Linter not installed
+            return {path: {'passed': True, 'warnings': []} for path in file_paths}
+        except Exception as e:
+            return {path: {'passed': True, 'warnings': [str(e)]} for path in file_paths}
+        
+        grouped = _group_by_path(lines, file_paths)
+        
+        return {
+            path: {'passed': not warnings, 'warnings': warnings}
+            for path, warnings in grouped.items()
+        }
+    
+    def _run_ruff(self, file_paths: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Lint files with ruff, reporting in flake8's "path:line:col: code" form."""
+        cmd = [self._ruff, 'check', '--output-format=json', '--quiet', '--select=E,W', *file_paths]
+        proc = subprocess.run(
+            cmd,
+            capture_output=True,
+            text=True,
+            timeout=CHECK_TIMEOUT
+        )
+        
+        lines = [
+            f"{item['filename']}:{item['location']['row']}:{item['location']['column']}: "
+            f"{item['code']} {item['message']}"
+            for item in json.loads(proc.stdout or '[]')
+        ]
+        grouped = _group_by_path(lines, file_paths)
+        
+        return {
+            path: {'passed': not warnings, 'warnings': warnings}
+            for path, warnings in grouped.items()
+        }
+    
+    def _run_pyright(self, file_paths: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Type check files with pyright, reporting in mypy's "path:line: severity:" form."""
+        cmd = [self._pyright, '--outputjson', *file_paths]
+        proc = subprocess.run(
+            cmd,
+            capture_output=True,
+            text=True,
+            timeout=CHECK_TIMEOUT
+        )
+        
+        report = json.loads(proc.stdout)
+        lines = [
+            f"{diag['file']}:{diag['range']['start']['line'] + 1}: "
+            f"{diag['severity']}: {diag['message'].splitlines()[0]}"
+            for diag in report.get('generalDiagnostics', [])
+            if diag['severity'] in ('error', 'warning')
+        ]
+        grouped = _group_by_path(lines, file_paths)
+        
+        return {
+            path: {'passed': not errors, 'errors': errors}
+            for path, errors in grouped.items()
+        }
+    
     def validate_in_docker(
         self,
         file_path: str,
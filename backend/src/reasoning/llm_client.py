@@ -4,9 +4,16 @@ LLM Client
 Handles all interactions with Google Gemini API.
 """
 
-from typing import List, Dict, Any, Optional, Generator
+from typing import List, Dict, Any, Optional, Generator, Tuple
+import asyncio
+import functools
 import logging
+import queue
+import threading
 import time
+import weakref
+
+from ..retrieval.context_packer import count_tokens as count_tokens_local, get_encoding
 
 try:
     import google.generativeai as genai
@@ -17,6 +24,37 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+# Sentinel closing a streamed response
+_STREAM_DONE = object()
+
+# Chunks a streaming producer may read ahead of its consumer
+STREAM_QUEUE_SIZE = 64
+
+# Seconds a blocked producer waits before re-checking for a stopped consumer
+STREAM_PUT_INTERVAL = 0.1
+
+# API key genai is currently configured with (configuration is process-global)
+_CONFIGURED_KEY: Optional[str] = None
+_CONFIGURE_LOCK = threading.Lock()
+
+
+def _configure(api_key: str):
+    """Configure genai, skipping the call when the key is already active."""
+    global _CONFIGURED_KEY
+    
+    with _CONFIGURE_LOCK:
+        if _CONFIGURED_KEY != api_key:
+            genai.configure(api_key=api_key)
+            _CONFIGURED_KEY = api_key
+
+
+@functools.lru_cache(maxsize=32)
+def _get_model(model_name: str, system_instruction: Optional[str] = None) -> Any:
+    """Build a GenerativeModel once per (model, system instruction) and share it across clients."""
+    if system_instruction:
+        return genai.GenerativeModel(model_name, system_instruction=system_instruction)
+    return genai.GenerativeModel(model_name)
+
 
 class LLMClient:
     """
@@ -28,7 +66,8 @@ class LLMClient:
         api_key: str,
         model_name: str = "gemini-2.0-flash-exp",
         fallback_model: str = "gemini-1.5-pro",
-        max_output_tokens: int = 8192
+        max_output_tokens: int = 8192,
+        max_concurrency: int = 10
     ):
         """
         Initialize LLM client.
@@ -38,34 +77,128 @@ class LLMClient:
             model_name: Primary model name
             fallback_model: Fallback model for tier escalation
             max_output_tokens: Maximum tokens in response
+            max_concurrency: Maximum in-flight agenerate() calls per event loop
         """
         if not HAS_GENAI:
             raise RuntimeError("google-generativeai not installed")
         
-        genai.configure(api_key=api_key)
+        _configure(api_key)
         
         self.model_name = model_name
         self.fallback_model = fallback_model
         self.max_output_tokens = max_output_tokens
         
-        # Initialize models
-        self.model = genai.GenerativeModel(model_name)
-        self.fallback = genai.GenerativeModel(fallback_model)
+        # Initialize models (shared with other clients)
+        self.model = _get_model(model_name)
+        self.fallback = _get_model(fallback_model)
         
-        # Rate limiting
-        self.last_request_time = 0
-        self.min_request_interval = 0.1  # 100ms between requests
+        # Rate limiting: each request reserves the next free 100ms slot
+        self._interval_ns = 100_000_000
+        self._next_ok_ns = 0
+        self._rate_lock = threading.Lock()
+        
+        # Concurrency caps for agenerate(), one per event loop
+        self.max_concurrency = max_concurrency
+        self._semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = (
+            weakref.WeakKeyDictionary()
+        )
         
         logger.info(f"Initialized LLM client with model: {model_name}")
     
+    def _select_model(
+        self,
+        use_fallback: bool = False,
+        system_instruction: Optional[str] = None
+    ) -> Tuple[Any, str]:
+        """
+        Pick the model for a request.
+        
+        The system instruction is part of the model in the Gemini API, so
+        instructed models are built once per instruction and cached.
+        
+        Args:
+            use_fallback: Whether to use fallback model
+            system_instruction: Optional system instruction
+        
+        Returns:
+            Tuple of (model, model_name)
+        """
+        model_name = self.fallback_model if use_fallback else self.model_name
+        
+        if system_instruction:
+            return _get_model(model_name, system_instruction), model_name
+        
+        return (self.fallback if use_fallback else self.model), model_name
+    
+    def _reserve_slot(self) -> float:
+        """Reserve the next request slot and return the seconds to wait for it."""
+        # Only the slot reservation is serialized; callers sleep in parallel
+        with self._rate_lock:
+            now = time.monotonic_ns()
+            wait = self._next_ok_ns - now
+            self._next_ok_ns = max(now, self._next_ok_ns) + self._interval_ns
+        
+        return max(wait, 0) / 1e9
+    
     def _rate_limit(self):
         """Enforce rate limiting between requests."""
-        elapsed = time.time() - self.last_request_time
+        wait = self._reserve_slot()
+        
+        if wait > 0:
+            time.sleep(wait)
+    
+    def _semaphore(self) -> asyncio.Semaphore:
+        """Concurrency cap for the running event loop."""
+        loop = asyncio.get_running_loop()
+        sem = self._semaphores.get(loop)
+        
+        if sem is None:
+            sem = asyncio.Semaphore(self.max_concurrency)
+            self._semaphores[loop] = sem
         
-        if elapsed < self.min_request_interval:
-            time.sleep(self.min_request_interval - elapsed)
+        return sem
+    
+    def _generation_config(self, temperature: float) -> Dict[str, Any]:
+        """Generation settings for one request."""
+        return {
+            'temperature': temperature,
+            'max_output_tokens': self.max_output_tokens,
+        }
+    
+    def _success_response(self, response: Any, model_name: str, elapsed: float) -> Dict[str, Any]:
+        """Build the result dict for a completed generation."""
+        # Get token counts if available
+        try:
+            usage = {
+                'prompt_tokens': response.usage_metadata.prompt_token_count,
+                'completion_tokens': response.usage_metadata.candidates_token_count,
+                'total_tokens': response.usage_metadata.total_token_count
+            }
+        except AttributeError:
+            usage = {'total_tokens': 0}
         
-        self.last_request_time = time.time()
+        logger.info(f"Generated {usage.get('completion_tokens', 0)} tokens in {elapsed:.2f}s")
+        
+        return {
+            'text': response.text,
+            'model': model_name,
+            'usage': usage,
+            'elapsed_ms': int(elapsed * 1000),
+            'success': True
+        }
+    
+    def _failure_response(self, model_name: str, max_retries: int, last_error: Optional[Exception]) -> Dict[str, Any]:
+        """Build the result dict once every retry has failed."""
+        logger.error(f"Generation failed after {max_retries} attempts: {last_error}")
+        
+        return {
+            'text': '',
+            'model': model_name,
+            'usage': {'total_tokens': 0},
+            'elapsed_ms': 0,
+            'success': False,
+            'error': str(last_error)
+        }
     
     def generate(
         self,
@@ -90,27 +223,9 @@ class LLMClient:
         """
         self._rate_limit()
         
-        model = self.fallback if use_fallback else self.model
-        model_name = self.fallback_model if use_fallback else self.model_name
-        
-        generation_config = {
-            'temperature': temperature,
-            'max_output_tokens': self.max_output_tokens,
-        }
-        
-        # Build messages
-        messages = []
-        
-        if system_instruction:
-            messages.append({
-                'role': 'system',
-                'parts': [system_instruction]
-            })
+        model, model_name = self._select_model(use_fallback, system_instruction)
         
-        messages.append({
-            'role': 'user',
-            'parts': [prompt]
-        })
+        generation_config = self._generation_config(temperature)
         
         # Try generation with retries
         last_error = None
@@ -128,28 +243,7 @@ class LLMClient:
                 
                 elapsed = time.time() - start_time
                 
-                # Extract response
-                text = response.text
-                
-                # Get token counts if available
-                try:
-                    usage = {
-                        'prompt_tokens': response.usage_metadata.prompt_token_count,
-                        'completion_tokens': response.usage_metadata.candidates_token_count,
-                        'total_tokens': response.usage_metadata.total_token_count
-                    }
-                except AttributeError:
-                    usage = {'total_tokens': 0}
-                
-                logger.info(f"Generated {usage.get('completion_tokens', 0)} tokens in {elapsed:.2f}s")
-                
-                return {
-                    'text': text,
-                    'model': model_name,
-                    'usage': usage,
-                    'elapsed_ms': int(elapsed * 1000),
-                    'success': True
-                }
+                return self._success_response(response, model_name, elapsed)
             
             except Exception as e:
                 last_error = e
@@ -159,16 +253,66 @@ class LLMClient:
                     time.sleep(2 ** attempt)  # Exponential backoff
         
         # All retries failed
-        logger.error(f"Generation failed after {max_retries} attempts: {last_error}")
+        return self._failure_response(model_name, max_retries, last_error)
+    
+    async def agenerate(
+        self,
+        prompt: str,
+        system_instruction: Optional[str] = None,
+        temperature: float = 0.7,
+        use_fallback: bool = False,
+        max_retries: int = 3
+    ) -> Dict[str, Any]:
+        """
+        Generate a response without blocking the event loop.
         
-        return {
-            'text': '',
-            'model': model_name,
-            'usage': {'total_tokens': 0},
-            'elapsed_ms': 0,
-            'success': False,
-            'error': str(last_error)
-        }
+        Same contract as generate(); independent calls can be overlapped
+        with asyncio.gather(). At most max_concurrency calls are in flight
+        per event loop.
+        
+        Args:
+            prompt: User prompt
+            system_instruction: Optional system instruction
+            temperature: Sampling temperature
+            use_fallback: Whether to use fallback model
+            max_retries: Maximum retry attempts
+        
+        Returns:
+            Response dictionary with text and metadata
+        """
+        model, model_name = self._select_model(use_fallback, system_instruction)
+        
+        generation_config = self._generation_config(temperature)
+        
+        async with self._semaphore():
+            await asyncio.sleep(self._reserve_slot())
+            
+            last_error = None
+            
+            for attempt in range(max_retries):
+                try:
+                    logger.info(f"Generating with {model_name} (attempt {attempt + 1}/{max_retries})")
+                    
+                    start_time = time.time()
+                    
+                    response = await model.generate_content_async(
+                        prompt,
+                        generation_config=generation_config
+                    )
+                    
+                    elapsed = time.time() - start_time
+                    
+                    return self._success_response(response, model_name, elapsed)
+                
+                except Exception as e:
+                    last_error = e
+                    logger.warning(f"Generation attempt {attempt + 1} failed: {e}")
+                    
+                    if attempt < max_retries - 1:
+                        await asyncio.sleep(2 ** attempt)  # Exponential backoff
+        
+        # All retries failed
+        return self._failure_response(model_name, max_retries, last_error)
     
     def generate_streaming(
         self,
@@ -189,36 +333,69 @@ class LLMClient:
         """
         self._rate_limit()
         
-        generation_config = {
-            'temperature': temperature,
-            'max_output_tokens': self.max_output_tokens,
-        }
+        model, _ = self._select_model(system_instruction=system_instruction)
+        generation_config = self._generation_config(temperature)
         
-        try:
-            response = self.model.generate_content(
-                prompt,
-                generation_config=generation_config,
-                stream=True
-            )
+        # Network reads happen on a producer thread so the consumer only
+        # wakes up for ready chunks instead of holding the GIL while polling.
+        # The queue is bounded, and the producer stops reading once the
+        # consumer closes the generator.
+        chunks: queue.Queue = queue.Queue(maxsize=STREAM_QUEUE_SIZE)
+        stopped = threading.Event()
+        
+        def _put(item) -> bool:
+            """Queue an item unless the consumer has stopped; report success."""
+            while not stopped.is_set():
+                try:
+                    chunks.put(item, timeout=STREAM_PUT_INTERVAL)
+                    return True
+                except queue.Full:
+                    pass
+            return False
+        
+        def _producer():
+            try:
+                response = model.generate_content(
+                    prompt,
+                    generation_config=generation_config,
+                    stream=True
+                )
+                
+                for text in (chunk.text for chunk in response):
+                    if text and not _put(text):
+                        return
             
-            for chunk in response:
-                if chunk.text:
-                    yield chunk.text
+            except Exception as e:
+                logger.error(f"Streaming generation failed: {e}")
+                _put(f"Error: {str(e)}")
+            
+            finally:
+                _put(_STREAM_DONE)
         
-        except Exception as e:
-            logger.error(f"Streaming generation failed: {e}")
-            yield f"Error: {str(e)}"
+        threading.Thread(target=_producer, name="llm-stream", daemon=True).start()
+        
+        try:
+            yield from iter(chunks.get, _STREAM_DONE)
+        finally:
+            stopped.set()
     
-    def count_tokens(self, text: str) -> int:
+    def count_tokens(self, text: str, exact: bool = False) -> int:
         """
         Count tokens in text.
         
+        Tokens are counted locally with tiktoken. Its BPE is close to, but
+        not identical to, Gemini's tokenizer; pass exact=True to ask the API.
+        
         Args:
             text: Text to count
+            exact: Count with the model's own tokenizer (network call)
         
         Returns:
             Token count
         """
+        if not exact and get_encoding() is not None:
+            return count_tokens_local(text)
+        
         try:
             result = self.model.count_tokens(text)
             return result.total_tokens
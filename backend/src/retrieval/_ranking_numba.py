@@ -0,0 +1,138 @@
+"""
+Ranking Kernels
+
+Partial selection of the highest hybrid scores and span deduplication,
+JIT-compiled with numba when it is installed.
+"""
+
+import numpy as np
+
+try:
+    import numba
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+
+
+def _ranks_below(scores, a, b):
+    """Whether index a ranks below index b (lower score, or later on ties)."""
+    return scores[a] < scores[b] or (scores[a] == scores[b] and a > b)
+
+
+def _sift_down(heap, scores, pos, size):
+    """Restore the min-heap property below pos."""
+    while True:
+        child = 2 * pos + 1
+        if child >= size:
+            return
+        
+        if child + 1 < size and _ranks_below(scores, heap[child + 1], heap[child]):
+            child += 1
+        
+        if not _ranks_below(scores, heap[child], heap[pos]):
+            return
+        
+        heap[pos], heap[child] = heap[child], heap[pos]
+        pos = child
+
+
+def _topk_heap(scores, k):
+    """
+    Indices of the k best scores, best first, via a size-k min-heap.
+    
+    O(n log k). Ties rank by input position, matching a stable sort.
+    """
+    n = scores.shape[0]
+    k = min(k, n)
+    heap = np.arange(k)
+    
+    for pos in range(k // 2 - 1, -1, -1):
+        _sift_down(heap, scores, pos, k)
+    
+    for i in range(k, n):
+        # i is later than everything in the heap, so ties never displace
+        if k > 0 and scores[i] > scores[heap[0]]:
+            heap[0] = i
+            _sift_down(heap, scores, 0, k)
+    
+    # Pop the worst remaining into the back of the output
+    out = np.empty(k, dtype=np.int64)
+    for size in range(k, 0, -1):
+        out[size - 1] = heap[0]
+        heap[0] = heap[size - 1]
+        _sift_down(heap, scores, 0, size - 1)
+    
+    return out
+
+
+def _topk_numpy(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k best scores, best first, via argpartition."""
+    n = scores.shape[0]
+    if k >= n:
+        return np.argsort(-scores, kind='stable')
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    
+    # k-th best score; of the entries tied with it, the earliest win
+    threshold = -np.partition(-scores, k - 1)[k - 1]
+    above = np.flatnonzero(scores > threshold)
+    ties = np.flatnonzero(scores == threshold)[:k - len(above)]
+    
+    picked = np.concatenate([above, ties])
+    return picked[np.argsort(-scores[picked], kind='stable')]
+
+
+def _dedupe_spans(file_ids, starts, ends):
+    """
+    Keep mask for spans in rank order, dropping any that overlap a kept span.
+    
+    Spans only collide within a file. Kept spans never overlap each other,
+    so each file's are held sorted by start and checked by binary search.
+    """
+    n = starts.shape[0]
+    keep = np.ones(n, dtype=np.bool_)
+    # Stable: rank order is preserved within each file
+    order = np.argsort(file_ids, kind='mergesort')
+    kept_starts = np.empty(n, dtype=np.int64)
+    kept_ends = np.empty(n, dtype=np.int64)
+    size = 0
+    
+    for pos in range(n):
+        i = order[pos]
+        if pos > 0 and file_ids[i] != file_ids[order[pos - 1]]:
+            size = 0
+        
+        start = starts[i]
+        end = ends[i]
+        if end <= start:
+            continue  # Empty spans overlap nothing
+        
+        # Only the last kept span starting before this end can overlap
+        j = np.searchsorted(kept_starts[:size], end)
+        if j > 0 and kept_ends[j - 1] > start:
+            keep[i] = False
+            continue
+        
+        for k in range(size, j, -1):
+            kept_starts[k] = kept_starts[k - 1]
+            kept_ends[k] = kept_ends[k - 1]
+        kept_starts[j] = start
+        kept_ends[j] = end
+        size += 1
+    
+    return keep
+
+
+if HAS_NUMBA:
+    _ranks_below = numba.njit(cache=True)(_ranks_below)
+    _sift_down = numba.njit(cache=True)(_sift_down)
+    topk_indices = numba.njit(cache=True)(_topk_heap)
+    dedupe_spans = numba.njit(cache=True)(_dedupe_spans)
+    
+    # Compile now so the first ranking request doesn't pay for it
+    topk_indices(np.zeros(2, dtype=np.float64), 1)
+    dedupe_spans(np.zeros(2, dtype=np.int64), np.zeros(2, dtype=np.int64), np.ones(2, dtype=np.int64))
+else:
+    topk_indices = _topk_numpy
+    # Pure-Python dedupe is done by HybridRanker itself
+    dedupe_spans = None
@@ -4,11 +4,119 @@ Context Packer
 Packs retrieved chunks into LLM context with smart truncation.
 """
 
-from typing import List, Dict, Any, Optional
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+from dataclasses import dataclass
+from operator import attrgetter, itemgetter
+import functools
+import heapq
+import io
 import logging
 
+try:
+    import tiktoken
+    HAS_TIKTOKEN = True
+except ImportError:
+    HAS_TIKTOKEN = False
+
 logger = logging.getLogger(__name__)
 
+# BPE used for local token counting
+TOKEN_ENCODING = 'cl100k_base'
+
+# Characters encoded per kept token when truncating; code rarely exceeds ~4
+TRUNCATE_CHARS_PER_TOKEN = 8
+
+TRUNCATION_MARKER = "\n... [truncated]"
+
+# Typical chunk size, used to guess how many chunks can fit the budget
+AVG_CHUNK_TOKENS = 200
+
+# Fewest candidates taken from the top before falling back to a full sort
+MIN_CANDIDATES = 10
+
+# Sort key precomputed by HybridRanker
+SCORE_KEY = itemgetter('_score')
+
+
+def _fallback_score(chunk: Dict[str, Any]) -> float:
+    """Sort key for chunks that were not scored by HybridRanker."""
+    return chunk.get('hybrid_score', chunk.get('score', 0))
+
+
+@functools.lru_cache(maxsize=1)
+def get_encoding() -> Optional[Any]:
+    """
+    Load the shared tiktoken encoding once.
+    
+    Returns:
+        tiktoken Encoding, or None when tiktoken or its BPE file is unavailable
+    """
+    if not HAS_TIKTOKEN:
+        return None
+    
+    try:
+        return tiktoken.get_encoding(TOKEN_ENCODING)
+    except Exception as e:
+        logger.warning(f"tiktoken encoding unavailable, estimating tokens from length: {e}")
+        return None
+
+
+def count_tokens(text: str) -> int:
+    """
+    Count tokens locally.
+    
+    Args:
+        text: Text to count
+    
+    Returns:
+        Exact BPE token count, or ~4 characters per token without tiktoken
+    """
+    enc = get_encoding()
+    
+    if enc is None:
+        return len(text) >> 2
+    
+    return len(enc.encode(text, disallowed_special=()))
+
+
+@dataclass(slots=True)
+class PackChunk:
+    """
+    Fixed-layout view of a retrieved chunk.
+    
+    Built once per retrieval with from_chunk(); repeated packing of the
+    same pool (e.g. for different queries) then reads slots instead of
+    probing dicts.
+    """
+    content: str
+    score: float
+    token_count: int
+    file_path: str = 'unknown'
+    start_line: int = 0
+    end_line: int = 0
+    language: str = ''
+    chunk_id: Any = None
+    
+    @classmethod
+    def from_chunk(cls, chunk: Dict[str, Any]) -> "PackChunk":
+        """Build a view from a retrieved chunk dict."""
+        content = chunk.get('content', '')
+        
+        return cls(
+            content=content,
+            score=chunk['_score'] if '_score' in chunk else _fallback_score(chunk),
+            token_count=chunk.get('token_count') or count_tokens(content),
+            file_path=chunk.get('file_path', 'unknown'),
+            start_line=chunk.get('start_line', 0),
+            end_line=chunk.get('end_line', 0),
+            language=chunk.get('language', ''),
+            chunk_id=chunk.get('chunk_id'),
+        )
+
+
+# Sort key for PackChunk views
+VIEW_SCORE_KEY = attrgetter('score')
+
 
 class ContextPacker:
     """
@@ -54,46 +162,32 @@ class ContextPacker:
         Returns:
             Packed context dictionary
         """
-        # Sort chunks by score if requested
-        if prioritize_by_score:
-            chunks = sorted(chunks, key=lambda x: x.get('hybrid_score', x.get('score', 0)), reverse=True)
-        
         packed_chunks = []
-        total_tokens = 0
+        total_tokens = self._estimate_tokens(query)
+        truncated_count = 0
         
-        # Reserve tokens for query
-        query_tokens = self._estimate_tokens(query)
-        total_tokens += query_tokens
+        append = packed_chunks.append
         
-        # Pack chunks until we hit limit
-        for chunk in chunks:
-            content = chunk.get('content', '')
-            chunk_tokens = chunk.get('token_count', self._estimate_tokens(content))
+        for chunk, content, chunk_tokens, packed_tokens in self._select_chunks(
+            chunks, query, prioritize_by_score
+        ):
+            if packed_tokens < chunk_tokens:
+                append({
+                    **chunk,
+                    'content': content,
+                    'truncated': True,
+                    'original_tokens': chunk_tokens,
+                    'packed_tokens': packed_tokens
+                })
+                truncated_count += 1
+            else:
+                append({
+                    **chunk,
+                    'truncated': False,
+                    'packed_tokens': packed_tokens
+                })
             
-            if total_tokens + chunk_tokens > self.available_tokens:
-                # Try to fit truncated version
-                remaining = self.available_tokens - total_tokens
-                
-                if remaining > 50:  # Only if we have reasonable space
-                    truncated = self._truncate_to_tokens(content, remaining)
-                    packed_chunks.append({
-                        **chunk,
-                        'content': truncated,
-                        'truncated': True,
-                        'original_tokens': chunk_tokens,
-                        'packed_tokens': remaining
-                    })
-                    total_tokens += remaining
-                
-                break
-            
-            packed_chunks.append({
-                **chunk,
-                'truncated': False,
-                'packed_tokens': chunk_tokens
-            })
-            
-            total_tokens += chunk_tokens
+            total_tokens += packed_tokens
         
         logger.info(f"Packed {len(packed_chunks)}/{len(chunks)} chunks ({total_tokens} tokens)")
         
@@ -101,15 +195,16 @@ class ContextPacker:
             'chunks': packed_chunks,
             'total_chunks': len(packed_chunks),
             'total_tokens': total_tokens,
-            'truncated_count': sum(1 for c in packed_chunks if c.get('truncated', False))
+            'truncated_count': truncated_count
         }
     
     def build_prompt(
         self,
         packed_context: Dict[str, Any],
         query: str,
-        system_instruction: Optional[str] = None
-    ) -> str:
+        system_instruction: Optional[str] = None,
+        as_bytes: bool = False
+    ) -> Union[str, bytes]:
         """
         Build final prompt with packed context.
         
@@ -117,52 +212,302 @@ class ContextPacker:
             packed_context: Packed context from pack()
             query: User query
             system_instruction: Optional system instruction
+            as_bytes: Return UTF-8 bytes ready for a request body
         
         Returns:
-            Complete prompt string
+            Complete prompt string (bytes if as_bytes)
         """
-        prompt_parts = []
-        
-        # System instruction
-        if system_instruction:
-            prompt_parts.append(system_instruction)
-            prompt_parts.append("\n\n")
+        write, getvalue = self._prompt_buffer(as_bytes)
         
-        # Context
-        prompt_parts.append("# Relevant Code Context\n\n")
+        self._write_header(write, system_instruction)
         
         for i, chunk in enumerate(packed_context['chunks'], 1):
-            file_path = chunk.get('file_path', 'unknown')
-            start_line = chunk.get('start_line', 0)
-            end_line = chunk.get('end_line', 0)
-            content = chunk.get('content', '')
+            self._write_chunk(write, i, chunk, chunk.get('content', ''))
+        
+        self._write_footer(write, query)
+        
+        return getvalue()
+    
+    def pack_and_build(
+        self,
+        chunks: List[Dict[str, Any]],
+        query: str,
+        system_instruction: Optional[str] = None,
+        prioritize_by_score: bool = True,
+        as_bytes: bool = False
+    ) -> Tuple[Union[str, bytes], List[Tuple[Any, bool, int]]]:
+        """
+        Select chunks and write the prompt in a single pass.
+        
+        Equivalent to build_prompt(pack(...)), but each selected chunk is
+        written straight into the prompt instead of being copied into a
+        packed dict first.
+        
+        Args:
+            chunks: Retrieved chunks with metadata
+            query: User query
+            system_instruction: Optional system instruction
+            prioritize_by_score: Whether to prioritize by relevance score
+            as_bytes: Return the prompt as UTF-8 bytes
+        
+        Returns:
+            Tuple of (prompt, [(chunk_id, truncated, packed_tokens), ...])
+        """
+        write, getvalue = self._prompt_buffer(as_bytes)
+        stats: List[Tuple[Any, bool, int]] = []
+        
+        self._write_header(write, system_instruction)
+        
+        for i, (chunk, content, chunk_tokens, packed_tokens) in enumerate(
+            self._select_chunks(chunks, query, prioritize_by_score), 1
+        ):
+            self._write_chunk(write, i, chunk, content)
+            stats.append((chunk.get('chunk_id'), packed_tokens < chunk_tokens, packed_tokens))
+        
+        self._write_footer(write, query)
+        
+        return getvalue(), stats
+    
+    def pack_views(
+        self,
+        views: List[PackChunk],
+        query: str,
+        system_instruction: Optional[str] = None,
+        prioritize_by_score: bool = True,
+        as_bytes: bool = False
+    ) -> Tuple[Union[str, bytes], List[Tuple[Any, bool, int]]]:
+        """
+        pack_and_build() over PackChunk views.
+        
+        Args:
+            views: Chunks converted with PackChunk.from_chunk
+            query: User query
+            system_instruction: Optional system instruction
+            prioritize_by_score: Whether to prioritize by relevance score
+            as_bytes: Return the prompt as UTF-8 bytes
+        
+        Returns:
+            Tuple of (prompt, [(chunk_id, truncated, packed_tokens), ...])
+        """
+        write, getvalue = self._prompt_buffer(as_bytes)
+        stats: List[Tuple[Any, bool, int]] = []
+        append = stats.append
+        
+        self._write_header(write, system_instruction)
+        
+        ordered = self._ranked(views, VIEW_SCORE_KEY) if prioritize_by_score else views
+        candidates = ((view, view.content, view.token_count) for view in ordered)
+        
+        for i, (view, content, chunk_tokens, packed_tokens) in enumerate(
+            self._fit_budget(candidates, query), 1
+        ):
+            self._write_block(
+                write, i, view.file_path, view.start_line, view.end_line, view.language, content
+            )
+            append((view.chunk_id, packed_tokens < chunk_tokens, packed_tokens))
+        
+        self._write_footer(write, query)
+        
+        return getvalue(), stats
+    
+    def _select_chunks(
+        self,
+        chunks: List[Dict[str, Any]],
+        query: str,
+        prioritize_by_score: bool
+    ) -> Iterator[Tuple[Dict[str, Any], str, int, int]]:
+        """
+        Choose the chunks that fit the token budget, best first.
+        
+        Yields:
+            (chunk, content to pack, chunk tokens, packed tokens), as
+            _fit_budget does
+        """
+        # Order chunks by score if requested
+        ordered = self._ranked(chunks) if prioritize_by_score else chunks
+        
+        def candidates():
+            for chunk in ordered:
+                content = chunk.get('content', '')
+                # token_count is set at chunking time; count only when missing
+                yield chunk, content, chunk.get('token_count') or count_tokens(content)
+        
+        yield from self._fit_budget(candidates(), query)
+    
+    def _fit_budget(
+        self,
+        candidates: Iterable[Tuple[Any, str, int]],
+        query: str
+    ) -> Iterator[Tuple[Any, str, int, int]]:
+        """
+        Take candidates in order until the token budget is spent.
+        
+        The candidate that overflows the budget is truncated to fit when
+        enough room is left, and selection stops there.
+        
+        Args:
+            candidates: (chunk, content, chunk tokens), best first
+            query: User query; its tokens are reserved first
+        
+        Yields:
+            (chunk, content to pack, chunk tokens, packed tokens); packed
+            tokens are below chunk tokens only for the truncated chunk
+        """
+        # Reserve tokens for query
+        total_tokens = self._estimate_tokens(query)
+        avail = self.available_tokens
+        
+        # Pack chunks until we hit limit
+        for chunk, content, chunk_tokens in candidates:
+            if total_tokens + chunk_tokens > avail:
+                # Try to fit truncated version
+                remaining = avail - total_tokens
+                
+                if remaining > 50:  # Only if we have reasonable space
+                    yield chunk, self._truncate_to_tokens(content, remaining), chunk_tokens, remaining
+                
+                return
+            
+            yield chunk, content, chunk_tokens, chunk_tokens
             
-            prompt_parts.append(f"## Chunk {i}: {file_path} (lines {start_line}-{end_line})\n\n")
-            prompt_parts.append(f"```{chunk.get('language', '')}\\n{content}\\n```\n\n")
+            total_tokens += chunk_tokens
+    
+    def _ranked(self, chunks: List[Any], key: Optional[Callable[[Any], float]] = None) -> Iterator[Any]:
+        """
+        Yield chunks best first without sorting the whole pool up front.
+        
+        Only about as many chunks as the budget can hold are ever packed, so
+        the top candidates come from heapq.nlargest in O(N log K). The full
+        sort runs only if packing consumes all of them.
+        
+        Args:
+            chunks: Chunk dicts, or PackChunk views with an explicit key
+            key: Score key; defaults to '_score' with a fallback for dicts
+        """
+        k_est = max(MIN_CANDIDATES, self.available_tokens // AVG_CHUNK_TOKENS)
         
-        # Query
-        prompt_parts.append(f"# User Query\n\n{query}\n\n")
+        if key is not None:
+            top = heapq.nlargest(k_est, chunks, key=key)
+        else:
+            try:
+                top = heapq.nlargest(k_est, chunks, key=SCORE_KEY)
+                key = SCORE_KEY
+            except KeyError:
+                top = heapq.nlargest(k_est, chunks, key=_fallback_score)
+                key = _fallback_score
         
-        # Instructions
-        prompt_parts.append("# Instructions\n\n")
-        prompt_parts.append("Based on the code context above, please provide a detailed response to the user's query.\n")
+        yield from top
         
-        return ''.join(prompt_parts)
+        if len(chunks) > k_est:
+            # Budget outlasted the estimate; nlargest matches sorted()[:k]
+            yield from sorted(chunks, key=key, reverse=True)[k_est:]
+    
+    def _prompt_buffer(
+        self,
+        as_bytes: bool
+    ) -> Tuple[Callable[[str], Any], Callable[[], Union[str, bytes]]]:
+        """
+        Create a prompt buffer.
+        
+        In bytes mode every piece is encoded once as it is written, so the
+        finished prompt never exists as a str that must be encoded again.
+        
+        Returns:
+            (write, getvalue) pair
+        """
+        if as_bytes:
+            buf = bytearray()
+            extend = buf.extend
+            
+            def write(text: str):
+                extend(text.encode('utf-8'))
+            
+            return write, lambda: bytes(buf)
+        
+        sio = io.StringIO()
+        return sio.write, sio.getvalue
+    
+    def _write_header(self, write: Callable[[str], Any], system_instruction: Optional[str]):
+        """Write the system instruction and context heading."""
+        if system_instruction:
+            write(system_instruction)
+            write("\n\n")
+        
+        write("# Relevant Code Context\n\n")
+    
+    def _write_chunk(self, write: Callable[[str], Any], i: int, chunk: Dict[str, Any], content: str):
+        """Write one fenced chunk block from a chunk dict."""
+        self._write_block(
+            write,
+            i,
+            chunk.get('file_path', 'unknown'),
+            chunk.get('start_line', 0),
+            chunk.get('end_line', 0),
+            chunk.get('language', ''),
+            content
+        )
+    
+    def _write_block(
+        self,
+        write: Callable[[str], Any],
+        i: int,
+        file_path: str,
+        start_line: int,
+        end_line: int,
+        language: str,
+        content: str
+    ):
+        """Write one fenced chunk block."""
+        write(
+            f"## Chunk {i}: {file_path} (lines {start_line}-{end_line})\n\n"
+            f"```{language}\n{content}\n```\n\n"
+        )
+    
+    def _write_footer(self, write: Callable[[str], Any], query: str):
+        """Write the user query and instructions."""
+        write(
+            f"# User Query\n\n{query}\n\n"
+            "# Instructions\n\n"
+            "Based on the code context above, please provide a detailed response to the user's query.\n"
+        )
     
     def _estimate_tokens(self, text: str) -> int:
-        """Estimate token count (rough approximation)."""
-        # Rough: 1 token ≈ 4 characters for code
-        return len(text) // 4
+        """Count tokens with the local tokenizer."""
+        return count_tokens(text)
     
     def _truncate_to_tokens(self, text: str, max_tokens: int) -> str:
-        """Truncate text to approximately max_tokens."""
-        # Rough: keep max_tokens * 4 characters
-        max_chars = max_tokens * 4
+        """Truncate text to at most max_tokens tokens."""
+        enc = get_encoding()
+        
+        if enc is None:
+            # Rough: keep max_tokens * 4 characters
+            max_chars = max_tokens * 4
+            
+            if len(text) <= max_chars:
+                return text
+            
+            return text[:max_chars] + TRUNCATION_MARKER
+        
+        # Only a prefix survives, so encode just enough of it; widen the
+        # window in the rare case it is too sparse to fill the budget
+        window = max_tokens * TRUNCATE_CHARS_PER_TOKEN
+        
+        while True:
+            prefix = text[:window]
+            tokens = enc.encode_ordinary(prefix)
+            
+            if len(tokens) > max_tokens:
+                break
+            if len(prefix) == len(text):
+                return text
+            
+            window *= 2
         
-        if len(text) <= max_chars:
-            return text
+        # Decode bytes so a token boundary inside a UTF-8 sequence is dropped
+        # rather than turned into a replacement character
+        kept = enc.decode_bytes(tokens[:max_tokens]).decode('utf-8', errors='ignore')
         
-        return text[:max_chars] + "\n... [truncated]"
+        return kept + TRUNCATION_MARKER
     
     def pack_with_health(
         self,
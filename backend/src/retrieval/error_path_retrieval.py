@@ -4,12 +4,66 @@ Advanced Error-Path Retrieval
 Traces error propagation through call graph using weighted traversal.
 """
 
-from typing import List, Dict, Any, Optional, Set, Tuple
+from typing import List, Dict, Any, Optional, Set, Tuple, NamedTuple
+import asyncio
+import heapq
 import logging
-from collections import deque
+import threading
+from collections import OrderedDict
+from operator import itemgetter
 
 logger = logging.getLogger(__name__)
 
+# Sort key for (score, path) pairs
+SCORE_KEY = itemgetter(0)
+
+# Maximum (graph, function, file) caller lists kept across retrievers
+CALLER_CACHE_SIZE = 4096
+
+# (graph, function, file) -> callers (LRU); the graph only changes on reindex
+_CALLER_CACHE: "OrderedDict[Tuple[Any, str, str], List[Dict[str, Any]]]" = OrderedDict()
+_CALLER_CACHE_LOCK = threading.Lock()
+
+
+def invalidate_caller_cache():
+    """Forget cached caller lookups; call after the call graph is rewritten."""
+    with _CALLER_CACHE_LOCK:
+        _CALLER_CACHE.clear()
+
+
+class PathBuffer(NamedTuple):
+    """
+    A call path stored column-wise, error location first.
+    
+    Node i sits at depth i. Columns avoid one dict per node while paths
+    are scored and ranked; to_nodes() builds the external format.
+    """
+    functions: Tuple[str, ...]
+    files: Tuple[str, ...]
+    call_types: Tuple[Optional[str], ...]
+    # Number of 'direct' call types, counted during traversal
+    direct_calls: int
+    
+    @property
+    def depth(self) -> int:
+        """Depth of the last node."""
+        return len(self.functions) - 1
+    
+    def to_nodes(self) -> List[Dict[str, Any]]:
+        """Materialize the path as a list of node dicts."""
+        nodes = []
+        
+        for depth, (function, file, call_type) in enumerate(
+            zip(self.functions, self.files, self.call_types)
+        ):
+            node = {'function': function, 'file': file, 'depth': depth}
+            # The error location itself has no call type
+            if call_type is not None:
+                node['call_type'] = call_type
+            nodes.append(node)
+        
+        return nodes
+
 
 class ErrorPathRetriever:
     """
@@ -32,6 +86,13 @@ class ErrorPathRetriever:
         """
         self.neo4j_client = neo4j_client
         self.semantic_search = semantic_search
+        
+        # Identifies the graph in the shared caller cache
+        self._graph_key = getattr(neo4j_client, 'uri', None) or id(neo4j_client)
+    
+    def invalidate_cache(self):
+        """Forget cached caller lookups (the cache is shared by all retrievers)."""
+        invalidate_caller_cache()
     
     def find_error_paths(
         self,
@@ -64,96 +125,241 @@ class ErrorPathRetriever:
         }
         
         # BFS traversal backward through call graph
-        paths = self._backward_traversal(start_node, max_depth)
+        paths = self._backward_traversal(start_node, max_depth, max_paths)
         
         # Weight and rank paths
-        ranked_paths = self._rank_paths(paths)
+        return self._rank_paths(paths, max_paths)
+    
+    async def afind_error_paths(
+        self,
+        error_function: str,
+        error_file: str,
+        max_depth: int = 3,
+        max_paths: int = 5
+    ) -> List[Dict[str, Any]]:
+        """
+        Find possible execution paths leading to error without blocking the event loop.
+        
+        Same contract as find_error_paths(). The traversal and its graph
+        queries run on a worker thread, so the loop keeps serving other
+        requests while Neo4j round trips are in flight, and independent
+        lookups can be overlapped with asyncio.gather().
         
-        return ranked_paths[:max_paths]
+        Args:
+            error_function: Function where error occurred
+            error_file: File containing error
+            max_depth: Maximum traversal depth
+            max_paths: Maximum paths to return
+        
+        Returns:
+            List of execution paths
+        """
+        return await asyncio.to_thread(
+            self.find_error_paths, error_function, error_file, max_depth, max_paths
+        )
     
     def _backward_traversal(
         self,
         start_node: Dict[str, Any],
-        max_depth: int
-    ) -> List[List[Dict[str, Any]]]:
+        max_depth: int,
+        max_paths: Optional[int] = None
+    ) -> List[PathBuffer]:
         """
         Traverse backward through call graph (BFS).
         
         Returns all paths from root callers to error location.
+        
+        Each function is expanded at most once, at the shallowest depth it
+        is reached, which keeps the traversal O(V + E) on fan-in heavy
+        graphs. Cycles are checked against the nodes on each path, so
+        the error location itself can never be re-entered.
+        
+        With max_paths, open paths whose best reachable score is below the
+        max_paths-th best finished path are pruned before they are queried.
         """
+        start_key = (start_node['function'], start_node['file'])
+        
+        # Traversal tree, one entry per queued node; paths are rebuilt from
+        # parent links only once they finish
+        keys: List[Tuple[str, str]] = [start_key]
+        call_types: List[Optional[str]] = [None]
+        parents: List[int] = [-1]
+        # Direct calls on the path from the error location to each node
+        directs: List[int] = [0]
+        
+        def path_to(node: int) -> PathBuffer:
+            direct_calls = directs[node]
+            path_keys, path_call_types = [], []
+            while node >= 0:
+                path_keys.append(keys[node])
+                path_call_types.append(call_types[node])
+                node = parents[node]
+            path_keys.reverse()
+            path_call_types.reverse()
+            functions, files = zip(*path_keys)
+            return PathBuffer(functions, files, tuple(path_call_types), direct_calls)
+        
+        def on_path(node: int, key: Tuple[str, str]) -> bool:
+            while node >= 0:
+                if keys[node] == key:
+                    return True
+                node = parents[node]
+            return False
+        
         all_paths = []
-        queue = deque([[start_node]])
-        visited = set()
+        level = [0]
+        # (function, file) -> shallowest depth it has been queued at
+        expanded: Dict[Tuple[str, str], int] = {start_key: 0}
+        # Scores of the best max_paths finished paths (min-heap)
+        best: List[float] = []
+        
+        def finish(node: int):
+            path = path_to(node)
+            all_paths.append(path)
+            if max_paths:
+                score = self._calculate_path_score(path)
+                if len(best) < max_paths:
+                    heapq.heappush(best, score)
+                elif score > best[0]:
+                    heapq.heapreplace(best, score)
         
-        while queue:
-            current_path = queue.popleft()
-            current_node = current_path[-1]
+        # Nodes in a level share a depth, so each level is one graph query
+        for depth in range(1, max_depth + 1):
+            if max_paths and len(best) == max_paths:
+                # Can't reach the current top max_paths: don't expand
+                level = [
+                    node for node in level
+                    if self._path_score_bound(depth - 1, directs[node], max_depth) >= best[0]
+                ]
             
-            # Check depth
-            if current_node['depth'] >= max_depth:
-                all_paths.append(current_path)
-                continue
+            if not level:
+                break
             
-            # Get callers of current function
-            callers = self._get_callers(
-                current_node['function'],
-                current_node['file']
-            )
+            callers_by_key = self._get_callers_batch([keys[node] for node in level])
             
-            if not callers:
-                # No more callers - this is a root
-                all_paths.append(current_path)
-                continue
+            next_level = []
             
-            # Expand path with each caller
-            for caller in callers:
-                caller_key = f"{caller['function']}:{caller['file']}"
+            for node in level:
+                callers = callers_by_key.get(keys[node])
                 
-                # Avoid cycles
-                if caller_key in visited:
+                if not callers:
+                    # No more callers - this is a root
+                    finish(node)
                     continue
                 
-                visited.add(caller_key)
-                
-                new_path = current_path + [{
-                    'function': caller['function'],
-                    'file': caller['file'],
-                    'depth': current_node['depth'] + 1,
-                    'call_type': caller.get('call_type', 'direct'),
-                }]
-                
-                queue.append(new_path)
+                # Expand path with each caller
+                for caller in callers:
+                    caller_key = (caller['function'], caller['file'])
+                    
+                    # Avoid cycles
+                    if on_path(node, caller_key):
+                        continue
+                    
+                    # Already expanded at this depth or shallower
+                    if expanded.get(caller_key, max_depth + 1) <= depth:
+                        continue
+                    
+                    expanded[caller_key] = depth
+                    
+                    call_type = caller.get('call_type', 'direct')
+                    keys.append(caller_key)
+                    call_types.append(call_type)
+                    parents.append(node)
+                    directs.append(directs[node] + (call_type == 'direct'))
+                    next_level.append(len(keys) - 1)
+            
+            level = next_level
+        
+        # Paths still open at max depth
+        for node in level:
+            all_paths.append(path_to(node))
         
         return all_paths
     
     def _get_callers(self, function_name: str, file_path: str) -> List[Dict[str, Any]]:
         """Get all functions that call this function."""
-        if not self.neo4j_client:
-            return []
+        return self._get_callers_batch([(function_name, file_path)]).get(
+            (function_name, file_path), []
+        )
+    
+    def _get_callers_batch(
+        self,
+        pairs: List[Tuple[str, str]]
+    ) -> Dict[Tuple[str, str], List[Dict[str, Any]]]:
+        """
+        Get the callers of several functions in one query.
+        
+        Lookups are served from the shared caller cache where possible;
+        only the misses go to the graph.
+        
+        Args:
+            pairs: (function_name, file_path) of each callee
+        
+        Returns:
+            Callers keyed by (function_name, file_path); callees without
+            callers are absent
+        """
+        if not self.neo4j_client or not pairs:
+            return {}
+        
+        callers: Dict[Tuple[str, str], List[Dict[str, Any]]] = {}
+        misses = []
+        
+        with _CALLER_CACHE_LOCK:
+            for pair in dict.fromkeys(pairs):
+                key = (self._graph_key,) + pair
+                cached = _CALLER_CACHE.get(key)
+                
+                if cached is None:
+                    misses.append(pair)
+                else:
+                    _CALLER_CACHE.move_to_end(key)
+                    if cached:
+                        callers[pair] = cached
+        
+        if not misses:
+            return callers
         
         query = """
+        UNWIND $pairs AS p
         MATCH (caller:Function)-[c:CALLS]->(callee:Function)
-        WHERE callee.name = $function_name 
-        AND callee.file = $file_path
-        RETURN caller.name as function, caller.file as file,
+        WHERE callee.name = p.name
+        AND callee.file = p.file
+        RETURN p.name as callee_name, p.file as callee_file,
+               caller.name as function, caller.file as file,
                c.call_type as call_type
         """
         
         results = self.neo4j_client.execute_query(query, {
-            'function_name': function_name,
-            'file_path': file_path,
+            'pairs': [{'name': name, 'file': file} for name, file in misses],
         })
         
-        return [
-            {
+        fetched: Dict[Tuple[str, str], List[Dict[str, Any]]] = {pair: [] for pair in misses}
+        
+        for r in results:
+            fetched[(r['callee_name'], r['callee_file'])].append({
                 'function': r['function'],
                 'file': r['file'],
                 'call_type': r.get('call_type', 'direct'),
-            }
-            for r in results
-        ]
+            })
+        
+        with _CALLER_CACHE_LOCK:
+            for pair, found in fetched.items():
+                # Empty lists are cached too: roots are looked up as often as callers
+                _CALLER_CACHE[(self._graph_key,) + pair] = found
+                if found:
+                    callers[pair] = found
+            
+            while len(_CALLER_CACHE) > CALLER_CACHE_SIZE:
+                _CALLER_CACHE.popitem(last=False)
+        
+        return callers
     
-    def _rank_paths(self, paths: List[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    def _rank_paths(
+        self,
+        paths: List[PathBuffer],
+        limit: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
         """
         Rank paths by likelihood of causing error.
         
@@ -162,45 +368,54 @@ class ErrorPathRetriever:
         - Call types (direct > indirect)
         - Code health (unhealthy code = more likely)
         - Semantic similarity to error
+        
+        Only the `limit` best paths are materialized as node dicts.
         """
-        ranked = []
+        scored = ((self._calculate_path_score(path), path) for path in paths)
         
-        for path in paths:
-            score = self._calculate_path_score(path)
-            
-            ranked.append({
-                'path': path,
+        # Sort by score descending; a bounded heap when only the best few are wanted
+        if limit is None:
+            best = sorted(scored, key=SCORE_KEY, reverse=True)
+        else:
+            best = heapq.nlargest(limit, scored, key=SCORE_KEY)
+        
+        return [
+            {
+                'path': path.to_nodes(),
                 'score': score,
-                'length': len(path),
-                'root_function': path[-1]['function'] if path else None,
-                'root_file': path[-1]['file'] if path else None,
-            })
+                'length': len(path.functions),
+                'root_function': path.functions[-1] if path.functions else None,
+                'root_file': path.files[-1] if path.files else None,
+            }
+            for score, path in best
+        ]
+    
+    def _path_score_bound(self, depth: int, direct_calls: int, max_depth: int) -> float:
+        """
+        Best score any extension of an open path can reach by max_depth.
+        
+        Each extra node costs 5 and earns at most 10 for a direct call, so
+        the bound assumes every remaining level is a direct call.
         
-        # Sort by score descending
-        ranked.sort(key=lambda x: x['score'], reverse=True)
+        Args:
+            depth: Depth of the path's last node
+            direct_calls: Direct calls on the path so far
+            max_depth: Maximum traversal depth
+        """
+        score = 100.0 - (depth + 1) * 5 + direct_calls * 10 + (max_depth - depth) * 5
         
-        return ranked
+        return 0.0 if score < 0 else (100.0 if score > 100 else score)
     
-    def _calculate_path_score(self, path: List[Dict[str, Any]]) -> float:
+    def _calculate_path_score(self, path: PathBuffer) -> float:
         """Calculate relevance score for a path."""
-        if not path:
+        if not path.functions:
             return 0.0
         
-        # Base score
-        score = 100.0
-        
-        # Penalty for length (prefer shorter paths)
-        length_penalty = len(path) * 5
-        score -= length_penalty
-        
-        # Bonus for direct calls
-        direct_calls = sum(1 for node in path if node.get('call_type') == 'direct')
-        score += direct_calls * 10
+        # Base score, penalty for length (prefer shorter paths), bonus for direct calls
+        score = 100.0 - len(path.functions) * 5 + path.direct_calls * 10
         
-        # Normalize to 0-100
-        score = max(0, min(100, score))
-        
-        return score
+        # Normalize to 0-100 (inline: no min/max builtin calls)
+        return 0.0 if score < 0 else (100.0 if score > 100 else score)
     
     def get_error_propagation_context(
         self,
@@ -217,23 +432,26 @@ class ErrorPathRetriever:
             'total_functions': 0,
         }
         
-        # Collect unique functions
-        functions = set()
-        for path_data in paths:
-            for node in path_data['path']:
-                func_key = f"{node['function']}:{node['file']}"
-                functions.add((node['function'], node['file']))
+        # Collect unique functions, in path order
+        functions: Dict[Tuple[str, str], None] = dict.fromkeys(
+            (node['function'], node['file'])
+            for path_data in paths
+            for node in path_data['path']
+        )
         
         context['total_functions'] = len(functions)
         
-        # Retrieve code for each function
-        for func_name, file_path in functions:
-            # This would use semantic search or direct file reading
-            context['code_snippets'][f"{func_name}:{file_path}"] = {
+        # Retrieve code for each function; keys become "function:file"
+        # strings only here, where the context leaves for JSON
+        # (this would use semantic search or direct file reading)
+        context['code_snippets'] = {
+            f"{func_name}:{file_path}": {
                 'function': func_name,
                 'file': file_path,
                 'code': '# Code would be retrieved here',
             }
+            for func_name, file_path in functions
+        }
         
         return context
 
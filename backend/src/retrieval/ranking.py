@@ -4,10 +4,15 @@ Hybrid Ranking
 Combines semantic similarity, graph relevance, code health, and recency.
 """
 
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
+from bisect import bisect_left
 import logging
 from datetime import datetime
 
+import numpy as np
+
+from ._ranking_numba import topk_indices, dedupe_spans
+
 logger = logging.getLogger(__name__)
 
 
@@ -28,6 +33,9 @@ class HybridRanker:
     HEALTH_WEIGHT = 0.10
     RECENCY_WEIGHT = 0.05
     
+    # Same weights as a vector, in signal row order
+    WEIGHTS = np.array([SEMANTIC_WEIGHT, GRAPH_WEIGHT, HEALTH_WEIGHT, RECENCY_WEIGHT])
+    
     def __init__(
         self,
         use_graph: bool = True,
@@ -51,7 +59,8 @@ class HybridRanker:
         results: List[Dict[str, Any]],
         graph_scores: Optional[Dict[str, float]] = None,
         health_scores: Optional[Dict[str, float]] = None,
-        normalize: bool = True
+        normalize: bool = True,
+        top_k: Optional[int] = None
     ) -> List[Dict[str, Any]]:
         """
         Rank results using hybrid scoring.
@@ -61,6 +70,8 @@ class HybridRanker:
             graph_scores: Optional dict of chunk_id -> graph relevance score
             health_scores: Optional dict of file_path -> health score
             normalize: Whether to normalize final scores to 0-1
+            top_k: Only select and return the k best results; results is
+                then left in its input order
         
         Returns:
             Ranked list of results with hybrid scores
@@ -68,39 +79,55 @@ class HybridRanker:
         if not results:
             return []
         
-        # Calculate hybrid scores
-        for result in results:
-            chunk_id = result.get('chunk_id', '')
-            file_path = result.get('file_path', '')
-            
-            # Semantic score (already provided)
-            semantic_score = result.get('score', 0.0)
-            
-            # Graph relevance score
-            graph_score = 0.0
-            if self.use_graph and graph_scores:
-                graph_score = graph_scores.get(chunk_id, 0.0)
-            
-            # Code health score
-            health_score = 0.0
-            if self.use_health and health_scores:
-                health_score = health_scores.get(file_path, 0.5)  # Default to 0.5
-                health_score = health_score / 100.0  # Normalize to 0-1
-            
-            # Recency score
-            recency_score = 0.0
-            if self.use_recency:
-                recency_score = self._calculate_recency_score(result)
-            
-            # Hybrid score
-            hybrid_score = (
-                self.SEMANTIC_WEIGHT * semantic_score +
-                self.GRAPH_WEIGHT * graph_score +
-                self.HEALTH_WEIGHT * health_score +
-                self.RECENCY_WEIGHT * recency_score
+        n = len(results)
+        
+        # One row per signal (semantic, graph, health, recency), one column per result
+        signals = np.zeros((4, n))
+        signals[0] = np.fromiter((r.get('score', 0.0) for r in results), dtype=np.float64, count=n)
+        
+        if self.use_graph and graph_scores:
+            signals[1] = np.fromiter(
+                (graph_scores.get(r.get('chunk_id', ''), 0.0) for r in results),
+                dtype=np.float64, count=n
             )
-            
+        
+        if self.use_health and health_scores:
+            # Default to 0.5, normalize to 0-1
+            signals[2] = np.fromiter(
+                (health_scores.get(r.get('file_path', ''), 0.5) for r in results),
+                dtype=np.float64, count=n
+            )
+            signals[2] /= 100.0
+        
+        if self.use_recency:
+            signals[3] = np.fromiter(
+                (self._calculate_recency_score(r) for r in results),
+                dtype=np.float64, count=n
+            )
+        
+        # Hybrid score: a single weighted sum over all results
+        hybrid = self.WEIGHTS @ signals
+        
+        if top_k is not None and top_k < n:
+            # Partial selection: O(n log k) instead of a full sort
+            order = topk_indices(hybrid, top_k)
+            ranked = [results[i] for i in order.tolist()]
+        else:
+            # Sort by hybrid score (stable, so ties keep their input order)
+            order = np.argsort(-hybrid, kind='stable')
+            results[:] = [results[i] for i in order.tolist()]
+            ranked = results
+        
+        ranked_hybrid = hybrid[order]
+        
+        for result, hybrid_score, (semantic_score, graph_score, health_score, recency_score) in zip(
+            ranked,
+            ranked_hybrid.tolist(),
+            signals[:, order].T.tolist()
+        ):
             result['hybrid_score'] = hybrid_score
+            # Flat sort key read by ContextPacker
+            result['_score'] = hybrid_score
             result['score_breakdown'] = {
                 'semantic': semantic_score,
                 'graph': graph_score,
@@ -108,20 +135,17 @@ class HybridRanker:
                 'recency': recency_score
             }
         
-        # Sort by hybrid score
-        results.sort(key=lambda x: x.get('hybrid_score', 0), reverse=True)
-        
-        # Normalize if requested
-        if normalize and results:
-            max_score = results[0]['hybrid_score']
-            min_score = results[-1]['hybrid_score']
+        # Normalize if requested (against every candidate, not just the top k)
+        if normalize:
+            max_score = float(hybrid.max())
+            min_score = float(hybrid.min())
             
             if max_score > min_score:
-                for result in results:
-                    normalized = (result['hybrid_score'] - min_score) / (max_score - min_score)
-                    result['normalized_score'] = normalized
+                normalized = (ranked_hybrid - min_score) / (max_score - min_score)
+                for result, normalized_score in zip(ranked, normalized.tolist()):
+                    result['normalized_score'] = normalized_score
         
-        return results
+        return ranked
     
     def _calculate_recency_score(self, result: Dict[str, Any]) -> float:
         """
@@ -152,6 +176,12 @@ class HybridRanker:
         error_file = query_context.get('file')
         error_function = query_context.get('function')
         
+        # Nothing to boost: order is unchanged
+        if not error_file and not error_function:
+            return results
+        
+        boosted = False
+        
         for result in results:
             boost = 0.0
             
@@ -159,17 +189,19 @@ class HybridRanker:
             if error_file and result.get('file_path') == error_file:
                 boost += 0.2
             
-            # Same function boost (if we had function info)
-            if error_function:
-                # Would check if result contains the function
+            # Same function boost: the chunk mentions the function
+            if error_function and error_function in result.get('content', ''):
                 boost += 0.1
             
             # Apply boost
             if boost > 0:
                 result['hybrid_score'] = result.get('hybrid_score', 0) * (1 + boost)
+                result['_score'] = result['hybrid_score']
+                boosted = True
         
         # Re-sort
-        results.sort(key=lambda x: x.get('hybrid_score', 0), reverse=True)
+        if boosted:
+            results.sort(key=lambda x: x.get('hybrid_score', 0), reverse=True)
         
         return results
     
@@ -191,44 +223,52 @@ class HybridRanker:
         if not results:
             return []
         
-        unique_results = [results[0]]  # Always keep top result
+        if dedupe_spans is not None:
+            # Compiled kernel over flat int columns
+            n = len(results)
+            file_ids: Dict[Any, int] = {}
+            keep = dedupe_spans(
+                np.fromiter(
+                    (file_ids.setdefault(r.get('file_path'), len(file_ids)) for r in results),
+                    dtype=np.int64, count=n
+                ),
+                np.fromiter((r.get('start_line', 0) for r in results), dtype=np.int64, count=n),
+                np.fromiter((r.get('end_line', 0) for r in results), dtype=np.int64, count=n)
+            )
+            unique_results = [r for r, kept_result in zip(results, keep.tolist()) if kept_result]
+            
+            logger.info(f"Deduplicated: {len(results)} -> {len(unique_results)}")
+            
+            return unique_results
+        
+        unique_results = []
+        # file_path -> (starts, ends) of kept spans; kept spans never overlap,
+        # so both lists are sorted
+        kept: Dict[Any, Tuple[List[int], List[int]]] = {}
         
-        for result in results[1:]:
-            is_duplicate = False
+        # Results are visited in rank order, so a chunk is only ever dropped
+        # in favour of a higher-ranked one
+        for result in results:
+            start = result.get('start_line', 0)
+            end = result.get('end_line', 0)
             
-            for unique in unique_results:
-                # Check if from same file and overlapping lines
-                if (result.get('file_path') == unique.get('file_path') and
-                    self._chunks_overlap(result, unique)):
-                    is_duplicate = True
-                    break
+            # Empty spans overlap nothing
+            if end > start:
+                starts, ends = kept.setdefault(result.get('file_path'), ([], []))
+                
+                # Only the last kept span starting before this end can overlap
+                i = bisect_left(starts, end)
+                if i and ends[i - 1] > start:
+                    continue
+                
+                starts.insert(i, start)
+                ends.insert(i, end)
             
-            if not is_duplicate:
-                unique_results.append(result)
+            unique_results.append(result)
         
         logger.info(f"Deduplicated: {len(results)} -> {len(unique_results)}")
         
         return unique_results
-    
-    def _chunks_overlap(self, chunk1: Dict[str, Any], chunk2: Dict[str, Any]) -> bool:
-        """Check if two chunks overlap significantly."""
-        start1 = chunk1.get('start_line', 0)
-        end1 = chunk1.get('end_line', 0)
-        start2 = chunk2.get('start_line', 0)
-        end2 = chunk2.get('end_line', 0)
-        
-        # Calculate overlap
-        overlap_start = max(start1, start2)
-        overlap_end = min(end1, end2)
-        
-        if overlap_end <= overlap_start:
-            return False  # No overlap
-        
-        overlap_lines = overlap_end - overlap_start
-        total_lines = max(end1 - start1, end2 - start2)
-        
-        # If overlap is more than 80% of the smaller chunk
-        return overlap_lines / total_lines > 0.8
 
 
 def main():
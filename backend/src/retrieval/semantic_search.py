@@ -93,11 +93,7 @@ class SemanticSearch:
             List of similar chunks
         """
         # Find the chunk in metadata
-        chunk_metadata = None
-        for idx, meta in self.vector_store.metadata.items():
-            if meta.get('chunk_id') == chunk_id:
-                chunk_metadata = meta
-                break
+        chunk_metadata = self.vector_store.get_chunk(chunk_id)
         
         if not chunk_metadata:
             logger.warning(f"Chunk not found: {chunk_id}")
@@ -137,6 +133,9 @@ class SemanticSearch:
         """
         Perform multiple searches in parallel.
         
+        All queries are embedded in one batched forward pass and looked up
+        with a single index search.
+        
         Args:
             queries: List of search queries
             top_k_per_query: Results per query
@@ -144,12 +143,20 @@ class SemanticSearch:
         Returns:
             Dictionary mapping queries to results
         """
-        results = {}
+        # Results are keyed by query, so repeats are searched once
+        unique_queries = list(dict.fromkeys(queries))
         
-        for query in queries:
-            results[query] = self.search(query, top_k=top_k_per_query)
+        if not unique_queries:
+            return {}
         
-        return results
+        query_embeddings = np.ascontiguousarray(
+            self.embedding_service.encode(unique_queries, normalize=True),
+            dtype=np.float32
+        )
+        
+        batch_results = self.vector_store.search_batch(query_embeddings, k=top_k_per_query)
+        
+        return dict(zip(unique_queries, batch_results))
     
     def get_context_chunks(
         self,
@@ -173,10 +180,7 @@ class SemanticSearch:
         # Search for chunks from the same file
         results = []
         
-        for idx, meta in self.vector_store.metadata.items():
-            if meta.get('file_path') != file_path:
-                continue
-            
+        for meta in self.vector_store.get_file_chunks(file_path):
             chunk_start = meta.get('start_line', 0)
             chunk_end = meta.get('end_line', 0)
             
@@ -212,7 +216,8 @@ def main():
     
     vector_store = VectorStore(
         dimension=embedding_service.embedding_dim,
-        index_path=settings.vector_db_path
+        index_path=settings.vector_db_path,
+        index_type=settings.vector_index_type
     )
     
     # Load existing index
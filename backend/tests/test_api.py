@@ -6,14 +6,22 @@ import pytest
 from fastapi.testclient import TestClient
 
 from src.app.main import app
+from src.app.routes.indexing import indexing_sessions
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def client():
-    """Create test client."""
+    """Create one test client shared by every test."""
     return TestClient(app)
 
 
+@pytest.fixture
+def indexing_client(client):
+    """Shared test client; indexing sessions started by the test are dropped."""
+    yield client
+    indexing_sessions.clear()
+
+
 class TestHealthEndpoints:
     """Test health check endpoints."""
     
@@ -39,14 +47,14 @@ class TestHealthEndpoints:
 class TestIndexingEndpoints:
     """Test indexing API endpoints."""
     
-    def test_start_indexing(self, client):
+    def test_start_indexing(self, indexing_client):
         """Test POST /index/start."""
         payload = {
             "repo_path": "/fake/path",
             "force_reindex": False
         }
         
-        response = client.post("/index/start", json=payload)
+        response = indexing_client.post("/index/start", json=payload)
         
         assert response.status_code == 200
         data = response.json()
@@ -0,0 +1,167 @@
+"""
+Unit Tests for Context Packer
+"""
+
+import pytest
+from src.retrieval import context_packer as context_packer_module
+from src.retrieval.context_packer import ContextPacker, PackChunk, count_tokens, get_encoding
+
+
+def make_chunk(i, score, content="def f():\n    pass\n" * 4, **extra):
+    """Build a retrieved chunk."""
+    return {
+        'chunk_id': f'c{i}',
+        'file_path': f'mod{i}.py',
+        'start_line': 1,
+        'end_line': 8,
+        'content': content,
+        'language': 'python',
+        'score': score,
+        **extra,
+    }
+
+
+@pytest.fixture
+def packer():
+    """Create a packer with a small budget."""
+    return ContextPacker(max_tokens=400, system_reserved=100, output_reserved=100)
+
+
+class TestContextPacker:
+    """Test suite for ContextPacker."""
+    
+    def test_pack_orders_by_score(self, packer):
+        """Test chunks are packed best-first."""
+        chunks = [make_chunk(i, score) for i, score in enumerate([0.1, 0.9, 0.5])]
+        
+        packed = packer.pack(chunks, "what does f do?")
+        
+        assert [c['chunk_id'] for c in packed['chunks']] == ['c1', 'c2', 'c0']
+        assert packed['truncated_count'] == 0
+        assert packed['total_tokens'] <= packer.available_tokens
+    
+    def test_pack_uses_precomputed_token_count(self, packer):
+        """Test an ingest-time token_count is trusted over the estimate."""
+        chunks = [make_chunk(0, 0.9, token_count=7)]
+        
+        packed = packer.pack(chunks, "q")
+        
+        assert packed['chunks'][0]['packed_tokens'] == 7
+    
+    def test_pack_truncates_last_chunk(self, packer):
+        """Test the chunk that overflows the budget is truncated."""
+        chunks = [
+            make_chunk(0, 0.9, token_count=120),
+            make_chunk(1, 0.8, content="x = 1\n" * 200),
+        ]
+        
+        packed = packer.pack(chunks, "q")
+        
+        assert packed['total_chunks'] == 2
+        assert packed['truncated_count'] == 1
+        last = packed['chunks'][-1]
+        assert last['truncated'] is True
+        assert last['content'].endswith("[truncated]")
+        assert packed['total_tokens'] <= packer.available_tokens
+    
+    def test_count_tokens(self):
+        """Test local token counting with or without tiktoken."""
+        text = "def add(a, b):\n    return a + b\n"
+        
+        assert count_tokens("") == 0
+        assert count_tokens(text) > 0
+        
+        if get_encoding() is None:
+            assert count_tokens(text) == len(text) // 4
+    
+    def test_truncate_to_tokens_is_exact(self, packer, monkeypatch):
+        """Test BPE truncation keeps whole characters within the budget."""
+        tiktoken = pytest.importorskip("tiktoken")
+        # Byte-level encoding: one token per UTF-8 byte
+        enc = tiktoken.Encoding(
+            name="bytes",
+            pat_str=r"\S+|\s+",
+            mergeable_ranks={bytes([i]): i for i in range(256)},
+            special_tokens={},
+        )
+        monkeypatch.setattr(context_packer_module, 'get_encoding', lambda: enc)
+        
+        assert packer._truncate_to_tokens("short", 10) == "short"
+        
+        truncated = packer._truncate_to_tokens("é" * 10, 5)
+        kept = truncated[:-len(context_packer_module.TRUNCATION_MARKER)]
+        assert truncated.endswith("[truncated]")
+        assert kept == "éé"
+        
+        sparse = " " * 100 + "x"
+        assert packer._truncate_to_tokens(sparse, 60).startswith(" " * 60)
+    
+    def test_build_prompt_fences_code(self, packer):
+        """Test each chunk is fenced on its own lines."""
+        packed = packer.pack([make_chunk(0, 0.9, content="x = 1")], "what is x?")
+        
+        prompt = packer.build_prompt(packed, "what is x?", system_instruction="Be brief.")
+        
+        assert prompt.startswith("Be brief.\n\n# Relevant Code Context\n\n")
+        assert "## Chunk 1: mod0.py (lines 1-8)\n\n```python\nx = 1\n```\n\n" in prompt
+        assert "\\n" not in prompt
+        assert "# User Query\n\nwhat is x?\n\n# Instructions\n\n" in prompt
+    
+    def test_pack_and_build_matches_two_pass(self, packer):
+        """Test the fused path produces the same prompt as pack + build_prompt."""
+        chunks = [
+            make_chunk(0, 0.2, token_count=60),
+            make_chunk(1, 0.9, token_count=80),
+            make_chunk(2, 0.5, content="y = 2\n" * 200),
+        ]
+        
+        packed = packer.pack(chunks, "q")
+        prompt, stats = packer.pack_and_build(chunks, "q", system_instruction="sys")
+        
+        assert prompt == packer.build_prompt(packed, "q", system_instruction="sys")
+        assert stats == [
+            (c['chunk_id'], c['truncated'], c['packed_tokens']) for c in packed['chunks']
+        ]
+        assert stats[-1][1] is True
+    
+    def test_pack_prefers_ranker_score(self, packer):
+        """Test the precomputed _score key orders chunks."""
+        chunks = [make_chunk(i, 0.0, _score=score) for i, score in enumerate([0.3, 0.7])]
+        
+        packed = packer.pack(chunks, "q")
+        
+        assert [c['chunk_id'] for c in packed['chunks']] == ['c1', 'c0']
+    
+    def test_pack_beyond_candidate_estimate(self):
+        """Test packing continues past the nlargest window in score order."""
+        packer = ContextPacker(max_tokens=10000, system_reserved=0, output_reserved=0)
+        chunks = [make_chunk(i, i / 100, token_count=5) for i in range(100)]
+        
+        packed = packer.pack(chunks, "q")
+        
+        assert packed['total_chunks'] == 100
+        assert [c['chunk_id'] for c in packed['chunks']] == [f'c{i}' for i in reversed(range(100))]
+    
+    def test_build_prompt_as_bytes(self, packer):
+        """Test the bytes prompt is the UTF-8 encoding of the str prompt."""
+        chunks = [make_chunk(0, 0.9, content="s = 'héllo'")]
+        packed = packer.pack(chunks, "qué?")
+        
+        text = packer.build_prompt(packed, "qué?")
+        data = packer.build_prompt(packed, "qué?", as_bytes=True)
+        fused, _ = packer.pack_and_build(chunks, "qué?", as_bytes=True)
+        
+        assert isinstance(data, bytes)
+        assert data == text.encode('utf-8') == fused
+    
+    def test_pack_views_matches_dict_path(self, packer):
+        """Test packing PackChunk views gives the same prompt as dicts."""
+        chunks = [
+            make_chunk(0, 0.2, token_count=60),
+            make_chunk(1, 0.9, token_count=80),
+            make_chunk(2, 0.5, content="y = 2\n" * 200),
+        ]
+        views = [PackChunk.from_chunk(c) for c in chunks]
+        
+        assert views[1].score == 0.9 and views[1].token_count == 80
+        assert packer.pack_views(views, "q", "sys") == packer.pack_and_build(chunks, "q", "sys")
@@ -0,0 +1,120 @@
+"""
+Unit Tests for Diff Generator
+"""
+
+import os
+
+import pytest
+from src.patching.diff_generator import DiffGenerator
+
+
+ORIGINAL = """def hello():
+    print("Hello")
+    return True
+"""
+
+MODIFIED = """def hello(name):
+    print(f"Hello {name}")
+    return True
+"""
+
+
+@pytest.fixture
+def generator():
+    """Create diff generator."""
+    return DiffGenerator()
+
+
+class TestDiffGenerator:
+    """Test suite for DiffGenerator."""
+    
+    def test_generate_diff(self, generator):
+        """Test unified diff headers and hunk lines."""
+        diff = generator.generate_diff(ORIGINAL, MODIFIED, "test.py")
+        lines = diff.splitlines()
+        
+        assert lines[0] == "--- a/test.py"
+        assert lines[1] == "+++ b/test.py"
+        assert lines[2].startswith("@@ -1,3 +1,3 @@")
+        assert "+def hello(name):" in lines
+        assert "-def hello():" in lines
+    
+    def test_identical_content_has_no_diff(self, generator):
+        """Test that unchanged content yields an empty diff."""
+        assert generator.generate_diff(ORIGINAL, ORIGINAL, "test.py") == ''
+    
+    def test_generate_patch_counts(self, generator):
+        """Test addition and deletion counts in generated patch."""
+        patch = generator.generate_patch([
+            {
+                'file_path': 'test.py',
+                'original_content': ORIGINAL,
+                'modified_content': MODIFIED,
+            }
+        ])
+        
+        assert patch['total_files'] == 1
+        assert patch['total_additions'] == 2
+        assert patch['total_deletions'] == 2
+    
+    @pytest.mark.parametrize("original,modified", [
+        (ORIGINAL, MODIFIED),
+        ("", "new file\n"),
+        ("a\nb\nc\n", "a\nc\n"),
+        ("a\nb", "a\nb\nc"),
+        ("a\nb\n", "a\nB"),
+    ])
+    def test_apply_round_trip(self, generator, original, modified):
+        """Test that applying a generated diff reproduces the modified content."""
+        diff = generator.generate_diff(original, modified, "test.py")
+        
+        assert generator._apply_unified_diff(original, diff) == modified
+    
+    def test_apply_patch_writes_file(self, generator, tmp_path):
+        """Test applying a patch to a file on disk."""
+        target = tmp_path / "test.py"
+        target.write_text(ORIGINAL, encoding='utf-8')
+        diff = generator.generate_diff(ORIGINAL, MODIFIED, "test.py")
+        
+        dry = generator.apply_patch(str(target), diff)
+        assert dry['success'] is True
+        assert target.read_text(encoding='utf-8') == ORIGINAL
+        
+        result = generator.apply_patch(str(target), diff, dry_run=False)
+        assert result['success'] is True
+        assert target.read_text(encoding='utf-8') == MODIFIED
+    
+    @pytest.mark.skipif(not os.path.isdir('/proc/self/fd'), reason="needs /proc to list open files")
+    def test_apply_patch_replaces_closed_file(self, generator, tmp_path, monkeypatch):
+        """Test the file is closed before it is replaced (Windows can't replace open files)."""
+        target = tmp_path / "test.py"
+        target.write_text(ORIGINAL, encoding='utf-8')
+        diff = generator.generate_diff(ORIGINAL, MODIFIED, "test.py")
+        open_at_replace = []
+        replace = generator._replace
+        
+        def spy(tmp, file_path):
+            fds = os.listdir('/proc/self/fd')
+            open_at_replace.extend(
+                fd for fd in fds
+                if os.path.realpath(f'/proc/self/fd/{fd}') == os.path.realpath(file_path)
+            )
+            replace(tmp, file_path)
+        
+        monkeypatch.setattr(generator, '_replace', spy)
+        result = generator.apply_patch(str(target), diff, dry_run=False)
+        
+        assert result['success'] is True
+        assert open_at_replace == []
+        assert target.read_text(encoding='utf-8') == MODIFIED
+    
+    def test_apply_mismatched_patch_fails(self, generator, tmp_path):
+        """Test that a hunk whose context doesn't match is rejected."""
+        target = tmp_path / "test.py"
+        target.write_text("something else\n", encoding='utf-8')
+        diff = generator.generate_diff(ORIGINAL, MODIFIED, "test.py")
+        
+        result = generator.apply_patch(str(target), diff, dry_run=False)
+        
+        assert result['success'] is False
+        assert target.read_text(encoding='utf-8') == "something else\n"
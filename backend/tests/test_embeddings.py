@@ -4,7 +4,9 @@ Unit Tests for Embedding Service
 
 import pytest
 import numpy as np
+from pathlib import Path
 
+from src.embeddings import embedding_service as embedding_module
 from src.embeddings.embedding_service import EmbeddingService
 
 
@@ -12,27 +14,31 @@ from src.embeddings.embedding_service import EmbeddingService
 pytest.importorskip("sentence_transformers")
 
 
-@pytest.fixture
-def mock_model_path(tmp_path):
-    """Mock model path (tests will need actual model or mocking)."""
-    return str(tmp_path / "bge-m3")
+# Where models/download_bge_m3.py saves the model
+REAL_MODEL_PATH = Path(__file__).parent.parent / "models" / "bge-m3"
+
+
+@pytest.fixture(scope="session")
+def embedding_service():
+    """One EmbeddingService for the session, so BGE-M3 is loaded once."""
+    if not REAL_MODEL_PATH.exists():
+        pytest.skip("Requires BGE-M3 model download")
+    return EmbeddingService(str(REAL_MODEL_PATH), use_gpu=False)
 
 
 class TestEmbeddingService:
     """Test suite for EmbeddingService."""
     
-    @pytest.mark.skip(reason="Requires BGE-M3 model download")
-    def test_initialization(self, mock_model_path):
+    def test_initialization(self, embedding_service):
         """Test service initialization."""
-        service = EmbeddingService(mock_model_path, use_gpu=False)
+        service = embedding_service
         
         assert service.device == 'cpu'
         assert service.embedding_dim > 0
     
-    @pytest.mark.skip(reason="Requires BGE-M3 model download")
-    def test_encode_single_text(self, mock_model_path):
+    def test_encode_single_text(self, embedding_service):
         """Test encoding single text."""
-        service = EmbeddingService(mock_model_path, use_gpu=False)
+        service = embedding_service
         
         text = "def hello(): pass"
         embedding = service.encode(text)
@@ -40,22 +46,30 @@ class TestEmbeddingService:
         assert isinstance(embedding, np.ndarray)
         assert embedding.shape[0] == service.embedding_dim
     
-    @pytest.mark.skip(reason="Requires BGE-M3 model download")
-    def test_encode_batch(self, mock_model_path):
+    def test_encode_batch(self, embedding_service):
         """Test batch encoding."""
-        service = EmbeddingService(mock_model_path, use_gpu=False)
+        service = embedding_service
         
-        texts = ["def func1(): pass", "def func2(): pass"]
+        # Mixed lengths, so batches are formed out of input order
+        texts = [
+            "def func1(): pass",
+            "def func2(items):\n    total = 0\n    for item in items:\n        total += item.price * item.quantity\n    return total",
+            "x = 1",
+            "def func1(): pass",
+        ]
         embeddings = service.encode(texts)
         
         assert isinstance(embeddings, np.ndarray)
-        assert embeddings.shape[0] == 2
+        assert embeddings.shape[0] == 4
         assert embeddings.shape[1] == service.embedding_dim
+        
+        # Rows come back in input order
+        for text, embedding in zip(texts, embeddings):
+            assert np.allclose(embedding, service.encode(text, use_cache=False), atol=1e-5)
     
-    @pytest.mark.skip(reason="Requires BGE-M3 model download")
-    def test_similarity(self, mock_model_path):
+    def test_similarity(self, embedding_service):
         """Test similarity calculation."""
-        service = EmbeddingService(mock_model_path, use_gpu=False)
+        service = embedding_service
         
         text1 = "authentication function"
         text2 = "login handler"
@@ -67,16 +81,22 @@ class TestEmbeddingService:
         
         assert -1 <= sim_12 <= 1
         assert -1 <= sim_13 <= 1
+        
+        # int8 path stays close to the float32 one
+        assert abs(service.similarity(text1, text2, quantized=True) - sim_12) < 0.02
+        assert abs(service.similarity(text1, text3, quantized=True) - sim_13) < 0.02
         # Authentication/login should be more similar than authentication/database
         # (This might not always hold, depends on model)
     
-    @pytest.mark.skip(reason="Requires BGE-M3 model download")
-    def test_caching(self, mock_model_path):
+    def test_caching(self, embedding_service):
         """Test embedding caching."""
-        service = EmbeddingService(mock_model_path, use_gpu=False)
+        service = embedding_service
         
         text = "def test(): pass"
         
+        # The service is shared, so start from an empty cache
+        service.clear_cache()
+        
         # First encoding
         service.encode(text, use_cache=True)
         assert service.get_cache_size() == 1
@@ -88,3 +108,19 @@ class TestEmbeddingService:
         # Clear cache
         service.clear_cache()
         assert service.get_cache_size() == 0
+    
+    def test_cache_is_bounded(self, embedding_service, monkeypatch):
+        """Test the cache evicts least recently used texts and counts hits."""
+        service = embedding_service
+        service.clear_cache()
+        monkeypatch.setattr(embedding_module, 'EMBEDDING_CACHE_SIZE', 2)
+        
+        service.encode(["a = 1", "b = 2"])
+        service.encode("a = 1")
+        service.encode("c = 3")
+        
+        stats = service.get_cache_stats()
+        assert list(service._cache) == ["a = 1", "c = 3"]
+        assert (stats['size'], stats['hits'], stats['misses']) == (2, 1, 3)
+        
+        service.clear_cache()
@@ -2,24 +2,70 @@
 Unit Tests for Error Memory Database
 """
 
+import sqlite3
+
 import pytest
-import tempfile
-from pathlib import Path
 
 from src.memory.error_memory import ErrorMemoryDB
 
 
+def _create_v1_db(tmp_path, rows_sql: str):
+    """Write a database with the v1 (rowid) schema, foreign keys off, plus rows."""
+    db_path = tmp_path / 'legacy.db'
+    legacy = sqlite3.connect(str(db_path))
+    legacy.executescript('''
+        CREATE TABLE debug_sessions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            session_id TEXT NOT NULL UNIQUE,
+            error_hash TEXT,
+            query TEXT NOT NULL,
+            retrieved_chunks TEXT,
+            reasoning_tier TEXT,
+            llm_calls INTEGER DEFAULT 0,
+            total_tokens INTEGER DEFAULT 0,
+            success BOOLEAN,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            completed_at TIMESTAMP
+        );
+        CREATE TABLE error_resolutions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            error_hash TEXT NOT NULL,
+            resolution_type TEXT NOT NULL,
+            patch_applied TEXT,
+            llm_model TEXT,
+            success BOOLEAN NOT NULL,
+            resolution_time_ms INTEGER,
+            resolved_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            notes TEXT
+        );
+        CREATE TABLE conversation_history (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            session_id TEXT NOT NULL,
+            role TEXT NOT NULL,
+            content TEXT NOT NULL,
+            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+    ''' + rows_sql)
+    legacy.close()
+    return db_path
+
+
 @pytest.fixture
 def temp_db():
-    """Create temporary database for testing."""
-    with tempfile.NamedTemporaryFile(suffix='.db', delete=False) as f:
-        db_path = f.name
+    """Create an in-memory database for testing (no disk IO)."""
+    db = ErrorMemoryDB(':memory:')
+    yield db
     
-    db = ErrorMemoryDB(db_path)
+    db.close()
+
+
+@pytest.fixture
+def file_db(tmp_path):
+    """Create an on-disk database, for tests that need the reader pool."""
+    db = ErrorMemoryDB(str(tmp_path / 'errors.db'))
     yield db
     
     db.close()
-    Path(db_path).unlink()
 
 
 class TestErrorMemoryDB:
@@ -55,8 +101,12 @@ class TestErrorMemoryDB:
         temp_db.save_error_snapshot(error_data)
         temp_db.save_error_snapshot(error_data)
         
-        # Check occurrence count (would need to query database)
-        # For now, just verify no errors
+        row = temp_db.conn.execute(
+            'SELECT occurrence_count FROM error_snapshots WHERE error_hash = ?',
+            ('duplicate_123',)
+        ).fetchone()
+        
+        assert row['occurrence_count'] == 2
     
     def test_save_error_resolution(self, temp_db):
         """Test saving error resolution."""
@@ -122,3 +172,163 @@ class TestErrorMemoryDB:
         assert stats['total_errors'] >= 3
         assert 'resolved_errors' in stats
         assert 'top_error_types' in stats
+    
+    def test_save_error_snapshots(self, temp_db):
+        """Test bulk saving snapshots, counting repeated hashes."""
+        errors = [
+            {'error_hash': f'bulk_{i % 3}', 'error_type': 'BulkError', 'error_message': 'Test'}
+            for i in range(5)
+        ]
+        
+        hashes = temp_db.save_error_snapshots(errors)
+        
+        assert hashes == ['bulk_0', 'bulk_1', 'bulk_2', 'bulk_0', 'bulk_1']
+        counts = dict(temp_db.conn.execute(
+            'SELECT error_hash, occurrence_count FROM error_snapshots ORDER BY error_hash'
+        ).fetchall())
+        assert counts == {'bulk_0': 2, 'bulk_1': 2, 'bulk_2': 1}
+        assert temp_db.get_error_stats()['total_errors'] == 3
+    
+    def test_batch_commits_once(self, temp_db):
+        """Test that writes inside batch() are committed together."""
+        session_id = 'batch_session_123'
+        
+        with temp_db.batch():
+            temp_db.create_debug_session(session_id, 'Batched query')
+            temp_db.save_conversation_turn(session_id, 'user', 'Hello')
+            temp_db.save_conversation_turn(session_id, 'assistant', 'Hi there!')
+            assert temp_db.conn.in_transaction
+        
+        assert not temp_db.conn.in_transaction
+        assert len(temp_db.get_conversation_history(session_id)) == 2
+    
+    def test_batch_rolls_back_on_error(self, temp_db):
+        """Test that a failing batch leaves no partial writes."""
+        session_id = 'rollback_session_123'
+        
+        with pytest.raises(RuntimeError):
+            with temp_db.batch():
+                temp_db.create_debug_session(session_id, 'Rolled back query')
+                temp_db.save_conversation_turn(session_id, 'user', 'Hello')
+                raise RuntimeError("boom")
+        
+        assert temp_db.get_conversation_history(session_id) == []
+    
+    def test_save_conversation_turns(self, temp_db):
+        """Test saving several conversation turns at once."""
+        session_id = 'bulk_session_123'
+        temp_db.create_debug_session(session_id, 'Bulk query')
+        
+        temp_db.save_conversation_turns(session_id, [
+            ('user', 'Hello'),
+            ('assistant', 'Hi there!'),
+            ('user', 'Thanks'),
+        ])
+        
+        history = temp_db.get_conversation_history(session_id)
+        
+        assert [turn['role'] for turn in history] == ['user', 'assistant', 'user']
+    
+    def test_reader_connections_are_read_only(self, file_db):
+        """Test that pooled reader connections reject writes."""
+        import sqlite3
+        
+        with file_db._ro() as conn:
+            with pytest.raises(sqlite3.OperationalError):
+                conn.execute("INSERT INTO debug_sessions (session_id, query) VALUES ('x', 'y')")
+    
+    def test_rejects_empty_reader_pool(self, tmp_path):
+        """Test that a pool without readers is refused instead of blocking reads."""
+        with pytest.raises(ValueError):
+            ErrorMemoryDB(str(tmp_path / 'errors.db'), max_readers=0)
+    
+    def test_readers_see_committed_writes(self, file_db):
+        """Test that pooled readers see what the writer committed."""
+        session_id = 'pooled_session_123'
+        file_db.create_debug_session(session_id, 'Pooled query')
+        file_db.save_conversation_turns(session_id, [('user', 'Hello'), ('assistant', 'Hi there!')])
+        
+        assert len(file_db.get_conversation_history(session_id)) == 2
+        assert file_db.get_debug_session(session_id)['query'] == 'Pooled query'
+    
+    def test_similar_errors_query_uses_indexes(self, temp_db):
+        """Test that the get_similar_errors join is served by indexes."""
+        plan = temp_db.conn.execute('''
+            EXPLAIN QUERY PLAN
+            SELECT e.*, r.resolution_type, r.patch_applied
+            FROM error_snapshots e
+            JOIN error_resolutions r ON e.error_hash = r.error_hash
+            WHERE e.error_type = ? AND e.resolved = 1 AND r.success = 1
+            ORDER BY e.last_seen DESC
+            LIMIT ?
+        ''', ('TypeError', 10)).fetchall()
+        details = ' '.join(row['detail'] for row in plan)
+        
+        assert 'idx_snap_type_resolved_lastseen' in details
+        assert 'SEARCH r USING PRIMARY KEY' in details
+    
+    def test_retrieved_chunks_round_trip(self, temp_db):
+        """Test that retrieved chunks are stored and decoded as JSON."""
+        session_id = 'chunks_session_123'
+        chunks = [{'chunk_id': 'c1', 'score': 0.9}, {'chunk_id': 'c2', 'score': 0.5}]
+        
+        temp_db.create_debug_session(session_id, 'Chunk query')
+        temp_db.update_debug_session(session_id, {'retrieved_chunks': chunks, 'llm_calls': 2})
+        
+        session = temp_db.get_debug_session(session_id)
+        
+        assert session['retrieved_chunks'] == chunks
+        assert session['llm_calls'] == 2
+        assert temp_db.get_debug_session('missing') is None
+    
+    def test_migrates_v1_schema(self, tmp_path):
+        """Test that rowid-based v1 tables are rebuilt without losing rows."""
+        db_path = _create_v1_db(tmp_path, '''
+            INSERT INTO debug_sessions (session_id, query) VALUES ('legacy', 'Old query');
+            INSERT INTO conversation_history (session_id, role, content) VALUES ('legacy', 'user', 'Hello');
+        ''')
+        
+        db = ErrorMemoryDB(str(db_path))
+        try:
+            db.save_conversation_turn('legacy', 'assistant', 'Hi there!')
+            history = db.get_conversation_history('legacy')
+            table_sql = db.conn.execute(
+                "SELECT sql FROM sqlite_master WHERE name = 'conversation_history'"
+            ).fetchone()['sql']
+        finally:
+            db.close()
+        
+        assert [turn['content'] for turn in history] == ['Hello', 'Hi there!']
+        assert 'WITHOUT ROWID' in table_sql
+    
+    def test_migrates_v1_orphan_rows(self, tmp_path):
+        """Test that v1 rows without a parent (written with foreign keys off) migrate."""
+        db_path = _create_v1_db(tmp_path, '''
+            INSERT INTO conversation_history (session_id, role, content) VALUES ('gone', 'user', 'Hello');
+            INSERT INTO error_resolutions (error_hash, resolution_type, success) VALUES ('gone', 'patch', 1);
+        ''')
+        
+        db = ErrorMemoryDB(str(db_path))
+        try:
+            history = db.get_conversation_history('gone')
+            foreign_keys = db.conn.execute('PRAGMA foreign_keys').fetchone()[0]
+        finally:
+            db.close()
+        
+        assert [turn['content'] for turn in history] == ['Hello']
+        assert foreign_keys == 1
+    
+    def test_iter_conversation_history(self, temp_db):
+        """Test streaming conversation history in order."""
+        session_id = 'stream_session_123'
+        temp_db.create_debug_session(session_id, 'Stream query')
+        temp_db.save_conversation_turns(session_id, [
+            ('user', f'message {i}') for i in range(60)
+        ])
+        
+        turns = list(temp_db.iter_conversation_history(session_id))
+        
+        assert len(turns) == 60
+        assert turns[0] == {'role': 'user', 'content': 'message 0', 'timestamp': turns[0]['timestamp']}
+        assert turns[-1]['content'] == 'message 59'
+        assert len(temp_db.get_conversation_history(session_id)) == 50
@@ -0,0 +1,192 @@
+"""
+Unit Tests for Error-Path Retrieval
+"""
+
+import pytest
+import asyncio
+
+from src.retrieval.error_path_retrieval import ErrorPathRetriever, invalidate_caller_cache
+
+
+class FakeGraph:
+    """Call graph stub answering caller queries from an edge list."""
+    
+    def __init__(self, edges, indirect=()):
+        # callers whose calls are reported as indirect
+        self.indirect = set(indirect)
+        # callee -> [caller, ...]
+        self.callers = {}
+        for caller, callee in edges:
+            self.callers.setdefault(callee, []).append(caller)
+        self.queries = 0
+    
+    def execute_query(self, query, params):
+        self.queries += 1
+        return [
+            {
+                'callee_name': pair['name'],
+                'callee_file': pair['file'],
+                'function': caller,
+                'file': f"{caller}.py",
+                'call_type': 'indirect' if caller in self.indirect else 'direct',
+            }
+            for pair in params['pairs']
+            for caller in self.callers.get(pair['name'], [])
+        ]
+
+
+def _names(path):
+    return list(path.functions)
+
+
+class TestErrorPathRetriever:
+    """Test suite for ErrorPathRetriever."""
+    
+    @pytest.fixture(autouse=True)
+    def fresh_cache(self):
+        """Each test starts from an empty caller cache."""
+        invalidate_caller_cache()
+        yield
+        invalidate_caller_cache()
+    
+    def test_linear_chain(self):
+        """Test a single chain is returned root-last."""
+        graph = FakeGraph([('b', 'a'), ('c', 'b')])
+        retriever = ErrorPathRetriever(graph, None)
+        
+        paths = retriever._backward_traversal(
+            {'function': 'a', 'file': 'a.py', 'depth': 0}, max_depth=5
+        )
+        
+        assert [_names(p) for p in paths] == [['a', 'b', 'c']]
+        assert paths[0].depth == 2
+        assert paths[0].to_nodes() == [
+            {'function': 'a', 'file': 'a.py', 'depth': 0},
+            {'function': 'b', 'file': 'b.py', 'depth': 1, 'call_type': 'direct'},
+            {'function': 'c', 'file': 'c.py', 'depth': 2, 'call_type': 'direct'},
+        ]
+    
+    def test_cycle_through_origin_is_blocked(self):
+        """Test a caller cycle back to the error location terminates."""
+        graph = FakeGraph([('b', 'a'), ('a', 'b')])
+        retriever = ErrorPathRetriever(graph, None)
+        
+        paths = retriever._backward_traversal(
+            {'function': 'a', 'file': 'a.py', 'depth': 0}, max_depth=10
+        )
+        
+        assert all(_names(p).count('a') == 1 for p in paths)
+    
+    def test_fan_in_expands_each_function_once(self):
+        """Test shared ancestors are queried once, not once per branch."""
+        # Diamond layers: every node in one layer calls every node below it
+        layers = [['a'], ['b1', 'b2', 'b3'], ['c1', 'c2', 'c3'], ['d1', 'd2', 'd3']]
+        edges = [
+            (caller, callee)
+            for upper, lower in zip(layers[1:], layers)
+            for caller in upper
+            for callee in lower
+        ]
+        graph = FakeGraph(edges)
+        retriever = ErrorPathRetriever(graph, None)
+        
+        paths = retriever._backward_traversal(
+            {'function': 'a', 'file': 'a.py', 'depth': 0}, max_depth=3
+        )
+        
+        # One query per level, not per node
+        assert graph.queries == 3
+        assert {p.functions[-1] for p in paths} == {'d1', 'd2', 'd3'}
+    
+    def test_get_callers_batch_groups_by_callee(self):
+        """Test batched caller lookup returns callers per callee."""
+        graph = FakeGraph([('b', 'a'), ('c', 'a'), ('d', 'b')])
+        retriever = ErrorPathRetriever(graph, None)
+        
+        callers = retriever._get_callers_batch([('a', 'a.py'), ('b', 'b.py'), ('e', 'e.py')])
+        
+        assert graph.queries == 1
+        assert [c['function'] for c in callers[('a', 'a.py')]] == ['b', 'c']
+        assert [c['function'] for c in callers[('b', 'b.py')]] == ['d']
+        assert ('e', 'e.py') not in callers
+    
+    def test_caller_cache_skips_repeat_queries(self):
+        """Test repeat lookups are cached until invalidated."""
+        graph = FakeGraph([('b', 'a')])
+        retriever = ErrorPathRetriever(graph, None)
+        
+        first = retriever._get_callers_batch([('a', 'a.py'), ('b', 'b.py')])
+        second = ErrorPathRetriever(graph, None)._get_callers_batch([('a', 'a.py'), ('b', 'b.py')])
+        
+        assert graph.queries == 1
+        assert second == first
+        assert ('b', 'b.py') not in second
+        
+        retriever.invalidate_cache()
+        retriever._get_callers_batch([('a', 'a.py')])
+        
+        assert graph.queries == 2
+    
+    def test_prunes_paths_that_cannot_reach_top(self):
+        """Test open paths scoring below the best finished paths aren't expanded."""
+        # a <- b is a perfect direct root; a <- c <- d <- e is all indirect
+        graph = FakeGraph([('b', 'a'), ('c', 'a'), ('d', 'c'), ('e', 'd')], indirect='cde')
+        retriever = ErrorPathRetriever(graph, None)
+        start = {'function': 'a', 'file': 'a.py', 'depth': 0}
+        
+        pruned = retriever._backward_traversal(start, max_depth=3, max_paths=1)
+        pruned_queries = graph.queries
+        invalidate_caller_cache()
+        graph.queries = 0
+        full = retriever._backward_traversal(start, max_depth=3)
+        
+        assert pruned_queries < graph.queries
+        assert retriever._rank_paths(pruned, 1) == retriever._rank_paths(full, 1)
+    
+    def test_find_error_paths_without_graph(self):
+        """Test retrieval degrades to the error location alone."""
+        retriever = ErrorPathRetriever(None, None)
+        
+        paths = retriever.find_error_paths('a', 'a.py')
+        
+        assert len(paths) == 1
+        assert paths[0]['root_function'] == 'a'
+        assert paths[0]['path'] == [{'function': 'a', 'file': 'a.py', 'depth': 0}]
+    
+    def test_find_error_paths_limits_and_ranks(self):
+        """Test shorter paths rank first and max_paths is honoured."""
+        graph = FakeGraph([('b', 'a'), ('c', 'a'), ('d', 'c')])
+        retriever = ErrorPathRetriever(graph, None)
+        
+        paths = retriever.find_error_paths('a', 'a.py', max_paths=1)
+        
+        assert len(paths) == 1
+        assert paths[0]['root_function'] == 'b'
+        assert paths[0]['length'] == 2
+    
+    def test_error_propagation_context(self):
+        """Test each function on the paths gets one snippet entry."""
+        graph = FakeGraph([('b', 'a'), ('c', 'a'), ('d', 'b')])
+        retriever = ErrorPathRetriever(graph, None)
+        
+        paths = retriever.find_error_paths('a', 'a.py')
+        context = retriever.get_error_propagation_context(paths)
+        
+        assert context['total_functions'] == 4
+        assert context['code_snippets']['d:d.py']['function'] == 'd'
+    
+    def test_afind_error_paths_matches_sync(self):
+        """Test the async variant returns the same paths."""
+        graph = FakeGraph([('b', 'a'), ('c', 'b')])
+        retriever = ErrorPathRetriever(graph, None)
+        
+        async def find_both():
+            return await asyncio.gather(
+                retriever.afind_error_paths('a', 'a.py'),
+                retriever.afind_error_paths('b', 'b.py')
+            )
+        
+        from_a, from_b = asyncio.run(find_both())
+        
+        assert from_a == retriever.find_error_paths('a', 'a.py')
+        assert from_b[0]['root_function'] == 'c'
@@ -0,0 +1,141 @@
+"""
+Unit Tests for Multi-file Patch Planner
+"""
+
+import pytest
+from src.patching.multi_file_planner import MultiFilePatchPlanner
+
+
+@pytest.fixture
+def planner():
+    """Create planner without graph backends."""
+    return MultiFilePatchPlanner()
+
+
+class TestMultiFilePatchPlanner:
+    """Test suite for MultiFilePatchPlanner."""
+    
+    def test_dependency_order(self, planner):
+        """Test that dependencies are applied before dependents."""
+        changes = [
+            {
+                'file_path': 'tests/test_users.py',
+                'patched_content': '# Updated tests',
+                'dependencies': ['models/user.py', 'api/users.py'],
+            },
+            {
+                'file_path': 'api/users.py',
+                'patched_content': '# Updated API',
+                'dependencies': ['models/user.py'],
+            },
+            {
+                'file_path': 'models/user.py',
+                'patched_content': '# Updated user model',
+                'dependencies': [],
+            },
+        ]
+        
+        patch = planner.create_multi_file_patch(changes, description="Update users")
+        
+        assert patch.dependency_order == [
+            'models/user.py',
+            'api/users.py',
+            'tests/test_users.py',
+        ]
+    
+    def test_external_dependencies_ignored(self, planner):
+        """Test that dependencies outside the patch don't block ordering."""
+        changes = [
+            {
+                'file_path': 'app.py',
+                'patched_content': 'import os',
+                'dependencies': ['os.py'],
+            },
+        ]
+        
+        patch = planner.create_multi_file_patch(changes)
+        
+        assert patch.dependency_order == ['app.py']
+    
+    def test_circular_dependencies(self, planner):
+        """Test that cyclic files are left out of the order."""
+        changes = [
+            {'file_path': 'a.py', 'patched_content': '', 'dependencies': ['b.py']},
+            {'file_path': 'b.py', 'patched_content': '', 'dependencies': ['a.py']},
+            {'file_path': 'c.py', 'patched_content': '', 'dependencies': []},
+        ]
+        
+        patch = planner.create_multi_file_patch(changes)
+        
+        assert patch.dependency_order == ['c.py']
+    
+    def test_detect_multiple_changes_conflict(self, planner):
+        """Test that two changes to one file are reported as a conflict."""
+        changes = [
+            {'file_path': 'a.py', 'patched_content': 'x = 1\n'},
+            {'file_path': 'a.py', 'patched_content': 'x = 2\n'},
+        ]
+        
+        patch = planner.create_multi_file_patch(changes)
+        
+        assert len(patch.conflicts) == 1
+        assert patch.conflicts[0]['type'] == 'multiple_changes'
+        assert planner.validate_patch(patch)['valid'] is False
+    
+    def test_impact_line_counts(self, planner):
+        """Test that net line changes are split into additions and deletions."""
+        changes = [
+            {'file_path': 'a.py', 'original_content': 'a\n', 'patched_content': 'a\nb\nc\n'},
+            {'file_path': 'b.py', 'original_content': 'a\nb\nc\n', 'patched_content': 'a\n'},
+            {'file_path': 'c.py', 'original_content': '', 'patched_content': 'x\n', 'change_type': 'create'},
+        ]
+        
+        impact = planner.create_multi_file_patch(changes).impact_analysis
+        
+        assert impact['total_additions'] == 3
+        assert impact['total_deletions'] == 2
+        assert impact['files_modified'] == 2
+        assert impact['files_created'] == 1
+    
+    def test_patch_id_is_stable(self, planner):
+        """Test that identical change sets get identical patch IDs."""
+        changes = [
+            {'file_path': 'b.py', 'patched_content': 'y = 2\n'},
+            {'file_path': 'a.py', 'patched_content': 'x = 1\n'},
+        ]
+        
+        first = planner.create_multi_file_patch(changes, description="Same")
+        second = planner.create_multi_file_patch(list(reversed(changes)), description="Same")
+        other = planner.create_multi_file_patch(changes, description="Different")
+        
+        assert first.patch_id == second.patch_id
+        assert first.patch_id != other.patch_id
+        assert first.patch_id.startswith('mfp_')
+    
+    def test_affected_modules(self, planner):
+        """Test that affected modules are the parent directories of changed files."""
+        changes = [
+            {'file_path': 'api/users.py', 'patched_content': ''},
+            {'file_path': 'api/auth.py', 'patched_content': ''},
+            {'file_path': 'setup.py', 'patched_content': ''},
+        ]
+        
+        impact = planner.create_multi_file_patch(changes).impact_analysis
+        
+        assert sorted(impact['affected_modules']) == ['.', 'api']
+    
+    def test_repeated_plans_reuse_cached_passes(self, planner):
+        """Test that identical change sets give equal, independent results."""
+        changes = [
+            {'file_path': 'a.py', 'patched_content': '', 'dependencies': ['b.py']},
+            {'file_path': 'b.py', 'patched_content': ''},
+            {'file_path': 'b.py', 'patched_content': 'x'},
+        ]
+        
+        first = planner.create_multi_file_patch(changes)
+        first.conflicts[0]['count'] = 99
+        first.dependency_order.append('mutated.py')
+        second = planner.create_multi_file_patch(changes)
+        
+        assert second.dependency_order == ['b.py', 'a.py']
+        assert second.conflicts[0]['count'] == 2
@@ -3,7 +3,11 @@ Unit Tests for Hybrid Ranking
 """
 
 import pytest
+import numpy as np
+
+from src.retrieval import ranking
 from src.retrieval.ranking import HybridRanker
+from src.retrieval._ranking_numba import topk_indices, _topk_numpy
 
 
 class TestHybridRanker:
@@ -102,3 +106,93 @@ class TestHybridRanker:
         assert 'normalized_score' in ranked[0]
         assert ranked[0]['normalized_score'] == 1.0  # Top score normalized to 1.0
         assert ranked[1]['normalized_score'] == 0.0  # Bottom score normalized to 0.0
+    
+    def test_rank_ties_keep_input_order(self):
+        """Test equal hybrid scores keep their input order, sorting in place."""
+        ranker = HybridRanker()
+        
+        results = [
+            {'chunk_id': 'c1', 'score': 0.5},
+            {'chunk_id': 'c2', 'score': 0.9},
+            {'chunk_id': 'c3', 'score': 0.5},
+        ]
+        
+        ranked = ranker.rank(results)
+        
+        assert ranked is results
+        assert [r['chunk_id'] for r in ranked] == ['c2', 'c1', 'c3']
+        assert ranked[0]['hybrid_score'] == pytest.approx(0.60 * 0.9 + 0.05 * 0.5)
+        assert isinstance(ranked[0]['score_breakdown']['semantic'], float)
+    
+    def test_rank_top_k(self):
+        """Test top_k returns the same head as a full ranking."""
+        ranker = HybridRanker(use_graph=False, use_health=False, use_recency=False)
+        
+        results = [{'chunk_id': f"c{i}", 'score': (i * 7 % 10) / 10} for i in range(30)]
+        
+        full = [r['chunk_id'] for r in ranker.rank([dict(r) for r in results])]
+        top = ranker.rank(results, top_k=5)
+        
+        assert [r['chunk_id'] for r in top] == full[:5]
+        assert top[0]['normalized_score'] == 1.0
+        assert results[0]['chunk_id'] == 'c0'  # Input left unsorted
+    
+    @pytest.mark.parametrize('select', [topk_indices, _topk_numpy])
+    def test_topk_indices_match_stable_sort(self, select):
+        """Test partial selection agrees with a stable descending sort."""
+        scores = np.array([0.2, 0.8, 0.5, 0.8, 0.1, 0.5, 0.5, 0.9])
+        
+        for k in range(len(scores) + 2):
+            expected = np.argsort(-scores, kind='stable')[:k]
+            assert select(scores, k).tolist() == expected.tolist()
+    
+    def test_deduplication_nested_chunk(self):
+        """Test chunks overlapping a higher-ranked one are dropped, adjacent ones kept."""
+        ranker = HybridRanker()
+        
+        results = [
+            {'chunk_id': 'c1', 'file_path': 'test.py', 'start_line': 1, 'end_line': 100},
+            {'chunk_id': 'c2', 'file_path': 'other.py', 'start_line': 1, 'end_line': 100},
+            {'chunk_id': 'c3', 'file_path': 'test.py', 'start_line': 40, 'end_line': 50},
+            {'chunk_id': 'c4', 'file_path': 'test.py', 'start_line': 95, 'end_line': 120},
+            {'chunk_id': 'c5', 'file_path': 'test.py', 'start_line': 100, 'end_line': 120},
+        ]
+        
+        deduplicated = ranker.deduplicate(results)
+        
+        assert [r['chunk_id'] for r in deduplicated] == ['c1', 'c2', 'c5']
+    
+    def test_rerank_with_context(self):
+        """Test only results matching the error context are boosted."""
+        ranker = HybridRanker()
+        
+        results = [
+            {'chunk_id': 'c1', 'file_path': 'a.py', 'hybrid_score': 0.80, 'content': 'def other(): pass'},
+            {'chunk_id': 'c2', 'file_path': 'b.py', 'hybrid_score': 0.75, 'content': 'def pay(): raise'},
+            {'chunk_id': 'c3', 'file_path': 'c.py', 'hybrid_score': 0.70, 'content': 'def other(): pass'},
+        ]
+        
+        reranked = ranker.rerank_with_context(results, {'function': 'pay'})
+        
+        assert [r['chunk_id'] for r in reranked] == ['c2', 'c1', 'c3']
+        assert reranked[1]['hybrid_score'] == 0.80  # Unmatched results keep their score
+        
+        unchanged = ranker.rerank_with_context(reranked, {})
+        
+        assert [r['chunk_id'] for r in unchanged] == ['c2', 'c1', 'c3']
+    
+    def test_deduplication_kernel_matches_python(self, monkeypatch):
+        """Test the compiled and pure-Python deduplication agree."""
+        ranker = HybridRanker()
+        rng = np.random.default_rng(0)
+        
+        results = [
+            {'chunk_id': f"c{i}", 'file_path': f"f{rng.integers(3)}.py",
+             'start_line': int(start), 'end_line': int(start + rng.integers(0, 30))}
+            for i, start in enumerate(rng.integers(0, 100, size=200))
+        ]
+        
+        compiled = ranker.deduplicate(results)
+        monkeypatch.setattr(ranking, 'dedupe_spans', None)
+        
+        assert ranker.deduplicate(results) == compiled
@@ -0,0 +1,155 @@
+"""
+Unit Tests for Semantic Search
+"""
+
+import pytest
+import numpy as np
+
+from src.embeddings.vector_store import VectorStore
+from src.retrieval.semantic_search import SemanticSearch
+
+
+# Skip if faiss not available
+pytest.importorskip("faiss")
+
+
+class FakeEmbeddingService:
+    """Embeds text as a one-hot vector on its first character."""
+    
+    def __init__(self, dimension):
+        self.dimension = dimension
+        self.calls = []
+    
+    def encode(self, texts, normalize=True):
+        self.calls.append(texts)
+        single = isinstance(texts, str)
+        texts = [texts] if single else texts
+        
+        embeddings = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        for row, text in enumerate(texts):
+            embeddings[row, ord(text[0]) % self.dimension] = 1.0
+        
+        return embeddings[0] if single else embeddings
+
+
+@pytest.fixture
+def search():
+    """Semantic search over one chunk per letter a-d."""
+    store = VectorStore(dimension=8)
+    embedder = FakeEmbeddingService(8)
+    
+    letters = 'abcd'
+    store.add(
+        embedder.encode(list(letters)),
+        [
+            {'chunk_id': f"chunk_{c}", 'file_path': f"{c}.py", 'start_line': 1, 'end_line': 10}
+            for c in letters
+        ]
+    )
+    embedder.calls.clear()
+    
+    return SemanticSearch(store, embedder)
+
+
+class TestSemanticSearch:
+    """Test suite for SemanticSearch."""
+    
+    def test_multi_query_search_batches(self, search):
+        """Test multiple queries share one encode call and match single search."""
+        results = search.multi_query_search(['apple', 'cherry', 'apple'], top_k_per_query=1)
+        
+        assert len(search.embedding_service.calls) == 1
+        assert list(results) == ['apple', 'cherry']
+        assert results['apple'][0]['chunk_id'] == 'chunk_a'
+        assert results['cherry'][0]['chunk_id'] == 'chunk_c'
+        assert results['cherry'] == search.search('cherry', top_k=1)
+    
+    def test_multi_query_search_empty(self, search):
+        """Test no queries means no encoding."""
+        assert search.multi_query_search([]) == {}
+        assert search.embedding_service.calls == []
+    
+    def test_get_context_chunks(self, search):
+        """Test only overlapping chunks of the requested file are returned."""
+        search.vector_store.add(
+            search.embedding_service.encode(['a', 'a']),
+            [
+                {'chunk_id': 'chunk_a2', 'file_path': 'a.py', 'start_line': 100, 'end_line': 120},
+                {'chunk_id': 'chunk_a3', 'file_path': 'a.py', 'start_line': 15, 'end_line': 30},
+            ]
+        )
+        
+        chunks = search.get_context_chunks('a.py', start_line=12, end_line=25, expand_lines=5)
+        
+        assert [c['chunk_id'] for c in chunks] == ['chunk_a', 'chunk_a3']
+        assert search.get_context_chunks('missing.py', 1, 10) == []
+    
+    def test_chunk_indexes_survive_reload(self, search, tmp_path):
+        """Test file and chunk-id lookups are rebuilt on load and clear."""
+        store = search.vector_store
+        store.save(str(tmp_path))
+        
+        reloaded = VectorStore(dimension=8, index_path=str(tmp_path))
+        
+        assert reloaded.get_chunk('chunk_b')['file_path'] == 'b.py'
+        assert [c['chunk_id'] for c in reloaded.get_file_chunks('c.py')] == ['chunk_c']
+        
+        reloaded.clear()
+        
+        assert reloaded.get_chunk('chunk_b') is None
+        assert reloaded.get_file_chunks('c.py') == []
+    
+    def test_quantized_index_rescores_exactly(self, tmp_path):
+        """Test int8 search over many small adds returns exact FP32 scores and survives reload."""
+        rng = np.random.default_rng(0)
+        vectors = rng.standard_normal((200, 16)).astype(np.float32)
+        # A first file of near-duplicates gives a narrow first batch
+        vectors[:4] = vectors[0] + 0.01 * rng.standard_normal((4, 16))
+        
+        flat = VectorStore(dimension=16)
+        flat.add(vectors.copy(), [{'chunk_id': f"c{i}"} for i in range(200)])
+        
+        # One add per file, as the indexer does
+        quantized = VectorStore(dimension=16, index_type='quantized')
+        for start in range(0, 200, 4):
+            batch = vectors[start:start + 4].copy()
+            quantized.add(batch, [{'chunk_id': f"c{i}"} for i in range(start, start + 4)])
+        
+        queries = rng.standard_normal((3, 16)).astype(np.float32)
+        expected = flat.search_batch(queries.copy(), k=5)
+        
+        def assert_matches(results):
+            for got, want in zip(results, expected):
+                assert [r['id'] for r in got] == [r['id'] for r in want]
+                assert [r['score'] for r in got] == pytest.approx([r['score'] for r in want], abs=1e-6)
+        
+        assert_matches(quantized.search_batch(queries.copy(), k=5))
+        
+        quantized.save(str(tmp_path))
+        reloaded = VectorStore(dimension=16, index_path=str(tmp_path))
+        
+        assert reloaded.index_type == 'quantized'
+        assert_matches(reloaded.search_batch(queries.copy(), k=5))
+    
+    def test_quantized_resave_keeps_vectors(self, tmp_path):
+        """Test saving a loaded quantized store over its own files keeps the vectors."""
+        rng = np.random.default_rng(1)
+        vectors = rng.standard_normal((20, 8)).astype(np.float32)
+        
+        store = VectorStore(dimension=8, index_type='quantized')
+        store.add(vectors.copy(), [{'chunk_id': f"c{i}"} for i in range(20)])
+        store.save(str(tmp_path))
+        expected = store.search(vectors[0].copy(), k=3)
+        
+        loaded = VectorStore(dimension=8, index_path=str(tmp_path))
+        loaded.save()
+        reloaded = VectorStore(dimension=8, index_path=str(tmp_path))
+        
+        for results in (loaded.search(vectors[0].copy(), k=3), reloaded.search(vectors[0].copy(), k=3)):
+            assert [r['id'] for r in results] == [r['id'] for r in expected]
+            assert [r['score'] for r in results] == pytest.approx([r['score'] for r in expected], abs=1e-6)
+    
+    def test_unknown_index_type(self):
+        """Test unsupported index types are rejected."""
+        with pytest.raises(ValueError):
+            VectorStore(dimension=8, index_type='hnsw')
@@ -103,3 +103,15 @@ def calculate_sum(numbers):
         
         # Should have no major smells
         assert len(smells) == 0 or all(s['severity'] == 'low' for s in smells)
+    
+    def test_complexity_cached_by_content(self):
+        """Test repeated complexity estimates for the same code are cached."""
+        analyzer = StaticAnalyzer()
+        
+        code = "def f(x):\n    if x and y:\n        return 1\n    return 0"
+        
+        assert analyzer._estimate_cyclomatic_complexity(code, "python") == 3
+        assert analyzer._estimate_cyclomatic_complexity(code, "python") == 3
+        
+        info = analyzer._complexity.cache_info()
+        assert (info.hits, info.misses) == (1, 1)
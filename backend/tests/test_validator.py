@@ -0,0 +1,236 @@
+"""
+Unit Tests for Patch Validator
+"""
+
+import sys
+import time
+
+import pytest
+
+from src.patching import validator as validator_module
+from src.patching.validator import PatchValidator
+
+
+ORIGINAL = "def hello():\n    print('Hello')\n"
+
+PATCHED = "def hello() -> None:\n    print('Hello World')\n"
+
+
+@pytest.fixture
+def validator():
+    """Create patch validator."""
+    return PatchValidator()
+
+
+class TestPatchValidator:
+    """Test suite for PatchValidator."""
+    
+    def test_valid_python_patch(self, validator):
+        """Test a clean Python patch passes every check."""
+        result = validator.validate_patch("test.py", ORIGINAL, PATCHED, "python")
+        
+        assert result['valid'] is True
+        assert result['errors'] == []
+        assert set(result['checks']) == {'syntax', 'types', 'lint'}
+    
+    def test_python_syntax_error(self, validator):
+        """Test a broken Python patch is rejected."""
+        result = validator.validate_patch("test.py", ORIGINAL, "def hello(:\n", "python")
+        
+        assert result['valid'] is False
+        assert not result['checks']['syntax']['passed']
+        assert "Syntax error at line 1" in result['errors'][0]
+    
+    @pytest.mark.skipif(
+        not (validator_module.HAS_FLAKE8_API or validator_module.shutil.which('ruff')),
+        reason="no Python linter installed"
+    )
+    def test_lint_warnings_reported(self, validator):
+        """Test flake8 findings surface as warnings, not errors."""
+        result = validator.validate_patch("test.py", ORIGINAL, "x=1 \n", "python")
+        
+        assert result['valid'] is True
+        codes = [w.split(': ', 1)[1].split()[0] for w in result['checks']['lint']['warnings']]
+        assert 'W291' in codes
+    
+    @pytest.mark.skipif(
+        not (validator_module.HAS_MYPY_API or validator_module.shutil.which('pyright')),
+        reason="no Python type checker installed"
+    )
+    def test_type_errors_reported(self, validator):
+        """Test type checker findings surface as warnings."""
+        result = validator.validate_patch("test.py", ORIGINAL, "x: int = 'a'\n", "python")
+        
+        assert result['valid'] is True
+        assert not result['checks']['types']['passed']
+        assert any(':1: error:' in w for w in result['warnings'])
+    
+    def test_validate_patches_batch(self, validator):
+        """Test batch validation keeps per-file results in input order."""
+        patches = [
+            {'file_path': 'a/util.py', 'original_content': ORIGINAL,
+             'patched_content': PATCHED, 'language': 'python'},
+            {'file_path': 'b/util.py', 'original_content': ORIGINAL,
+             'patched_content': "x: int = 'a'\n", 'language': 'python'},
+            {'file_path': 'c/broken.py', 'original_content': ORIGINAL,
+             'patched_content': "def hello(:\n", 'language': 'python'},
+        ]
+        
+        results = validator.validate_patches(patches)
+        
+        assert [r['valid'] for r in results] == [True, True, False]
+        assert results[0]['warnings'] == []
+        if validator_module.HAS_MYPY_API:
+            assert not results[1]['checks']['types']['passed']
+            assert all('1_util.py' in w for w in results[1]['checks']['types']['errors'])
+        
+        single = validator.validate_patch(
+            patches[1]['file_path'], ORIGINAL, patches[1]['patched_content'], 'python'
+        )
+        assert single['checks']['types']['passed'] == results[1]['checks']['types']['passed']
+    
+    def test_repeat_validation_uses_cache(self, validator, monkeypatch):
+        """Test identical patched content is validated only once."""
+        first = validator.validate_patch("test.py", ORIGINAL, PATCHED, "python")
+        
+        def fail(*args, **kwargs):
+            raise AssertionError("checker ran on a cache hit")
+        
+        monkeypatch.setattr(validator, '_check_syntax_python', fail)
+        second = validator.validate_patch("lib/test.py", ORIGINAL, PATCHED, "python")
+        
+        assert second == first
+        second['errors'].append('mutated')
+        assert validator.validate_patch("test.py", ORIGINAL, PATCHED, "python")['errors'] == []
+        assert validator.validate_patches([
+            {'file_path': 'test.py', 'original_content': ORIGINAL,
+             'patched_content': PATCHED, 'language': 'python'},
+        ]) == [first]
+    
+    def test_cache_evicts_least_recently_used(self, validator, monkeypatch):
+        """Test the validation cache stays bounded."""
+        monkeypatch.setattr(validator_module, 'VALIDATION_CACHE_SIZE', 2)
+        
+        for name in ('a', 'b', 'c'):
+            validator.validate_patch("test.py", ORIGINAL, f"{name} = 1\n", "python")
+        
+        assert len(validator._cache) == 2
+        assert validator._cache_key("test.py", "a = 1\n", "python") not in validator._cache
+    
+    def test_cache_shared_across_threads(self, validator, monkeypatch):
+        """Test concurrent lookups and evictions on one validator don't race."""
+        from concurrent.futures import ThreadPoolExecutor
+        
+        monkeypatch.setattr(validator_module, 'VALIDATION_CACHE_SIZE', 2)
+        # Switch threads as often as possible so unguarded races show up
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        result = {'valid': True, 'checks': {}, 'errors': [], 'warnings': []}
+        keys = [bytes([i]) for i in range(8)]
+        
+        def hammer(offset):
+            for i in range(2000):
+                key = keys[(i + offset) % len(keys)]
+                validator._cache_put(key, result)
+                validator._cache_get(key)
+        
+        try:
+            with ThreadPoolExecutor(max_workers=8) as pool:
+                list(pool.map(hammer, range(8)))
+        finally:
+            sys.setswitchinterval(interval)
+        
+        assert len(validator._cache) <= 2
+    
+    def test_cache_keeps_file_names_apart(self, validator):
+        """Test identical content under another name reports its own name."""
+        first = validator.validate_patch("a.py", ORIGINAL, "x = 1 \n", "python")
+        second = validator.validate_patch("pkg/b.py", ORIGINAL, "x = 1 \n", "python")
+        
+        assert any('a.py:1' in w for w in first['warnings'])
+        assert any('b.py:1' in w for w in second['warnings'])
+        assert not any('a.py' in w for w in second['warnings'])
+    
+    def test_unchecked_language_skips_disk(self, validator, monkeypatch):
+        """Test no temp file is written when no external checker runs."""
+        def fail(*args, **kwargs):
+            raise AssertionError("temporary directory created")
+        
+        monkeypatch.setattr(validator_module.tempfile, 'TemporaryDirectory', fail)
+        result = validator.validate_patch("main.go", "", "package main\n", "go")
+        
+        assert result['valid'] is True
+        assert result['checks']['syntax']['passed']
+    
+    @pytest.mark.skipif(not validator_module.shutil.which('node'), reason="node not installed")
+    def test_javascript_syntax_worker(self, validator):
+        """Test JS syntax checks reuse one node worker."""
+        ok = validator.validate_patch("app.js", "", "module.exports = 1;\nreturn;\n", "javascript")
+        worker = validator._node
+        bad = validator.validate_patch("app.js", "", "function f( {\n", "javascript")
+        
+        assert ok['checks']['syntax']['passed']
+        assert not bad['checks']['syntax']['passed']
+        assert 'SyntaxError' in bad['errors'][0]
+        assert validator._node is worker
+        
+        validator.close()
+        assert validator._node is None
+    
+    @pytest.mark.skipif(not validator_module.shutil.which('node'), reason="node not installed")
+    def test_javascript_module_syntax(self, validator):
+        """Test ES module sources are parsed as modules."""
+        ok = validator.validate_patch("app.js", "", "import fs from 'fs';\nexport const a = 1;\n", "javascript")
+        bad = validator.validate_patch("app.js", "", "import fs from 'fs';\nexport const = 1;\n", "javascript")
+        
+        assert ok['checks']['syntax']['passed']
+        assert not bad['checks']['syntax']['passed']
+        assert 'SyntaxError' in bad['errors'][0]
+    
+    @pytest.mark.skipif(not validator_module.shutil.which('dmypy'), reason="dmypy not installed")
+    def test_type_check_with_mypy_daemon(self, validator, monkeypatch):
+        """Test the mypy daemon path reports per-file type errors."""
+        monkeypatch.setattr(validator, '_pyright', None)
+        monkeypatch.setattr(validator, '_dmypy', validator_module.shutil.which('dmypy'))
+        
+        result = validator.validate_patch("daemon.py", ORIGINAL, "y: str = 1\n", "python")
+        
+        assert validator._dmypy is not None
+        assert not result['checks']['types']['passed']
+        assert any(':1: error:' in w for w in result['warnings'])
+    
+    def test_checks_run_concurrently(self, validator, monkeypatch):
+        """Test type checking and linting overlap instead of adding up."""
+        def slow(result):
+            def check(*args, **kwargs):
+                time.sleep(0.3)
+                return result
+            return check
+        
+        monkeypatch.setattr(validator, '_check_types', slow({'passed': True, 'errors': []}))
+        monkeypatch.setattr(validator, '_run_linter', slow({'passed': True, 'warnings': []}))
+        
+        start = time.perf_counter()
+        result = validator.validate_patch("test.py", ORIGINAL, "z = 3\n", "python")
+        
+        assert result['valid'] is True
+        assert time.perf_counter() - start < 0.55
+    
+    def test_batch_validates_duplicates_once(self, validator, monkeypatch):
+        """Test identical patches to same-named files share a single validation."""
+        seen = []
+        original = validator._validate_uncached
+        
+        def spy(patches, keys):
+            seen.append(len(patches))
+            return original(patches, keys)
+        
+        monkeypatch.setattr(validator, '_validate_uncached', spy)
+        patch = {'file_path': 'dup.py', 'original_content': ORIGINAL,
+                 'patched_content': "w = 4\n", 'language': 'python'}
+        
+        results = validator.validate_patches([patch, dict(patch, file_path='lib/dup.py')])
+        
+        assert seen == [1]
+        assert results[0] == results[1]
+        assert results[0] is not results[1]
@@ -1,100 +1,159 @@
 import os
 import json
+from concurrent.futures import ThreadPoolExecutor
 
 # File extensions to include
 INCLUDE_EXT = {".ts", ".py", ".tsx"}
 
-# Folders to skip (anywhere in the path)
-SKIP_FOLDERS = {
+# Folders to skip (at any depth)
+SKIP_FOLDERS = frozenset({
     "venv", ".venv", "env", ".env",
     "node_modules", "__pycache__", ".git",
     ".pytest_cache", "site-packages", "_pytest",
     "dist", "build", ".next", "out",
     ".idea"
-}
+})
 
-def should_skip_folder(path):
-    """Return True if any skip folder appears anywhere in the path."""
-    parts = path.replace("\\", "/").split("/")
-    return any(p in SKIP_FOLDERS for p in parts)
+# Node types in a flat tree
+FOLDER = ord("d")
+FILE = ord("f")
 
+# Threads for file reads (IO-bound, the GIL is released while reading)
+READ_WORKERS = min(32, (os.cpu_count() or 1) * 4)
 
-def build_tree(root_path, current_path=""):
-    """Recursively build a tree structure, skipping unwanted folders."""
-    full_path = os.path.join(root_path, current_path)
+# Files read ahead of the writer; bounds how many contents are in memory
+READ_BATCH = READ_WORKERS * 4
 
-    if should_skip_folder(full_path):
-        return None
+def should_skip_folder(name):
+    """Return True if a folder with this name should be skipped."""
+    return name in SKIP_FOLDERS
 
-    tree = {
-        "name": os.path.basename(current_path) if current_path else os.path.basename(root_path),
-        "type": "folder",
-        "children": []
-    }
 
-    try:
-        entries = sorted(os.listdir(full_path))
-    except PermissionError:
-        return None  # Skip un-readable folders
-
-    for entry in entries:
-        entry_full = os.path.join(full_path, entry)
-        rel_entry = os.path.join(current_path, entry)
-
-        if os.path.isdir(entry_full):
-            subtree = build_tree(root_path, rel_entry)
-            if subtree:
-                tree["children"].append(subtree)
-        else:
-            ext = os.path.splitext(entry)[1]
-            if ext in INCLUDE_EXT:
-                tree["children"].append({"name": entry, "type": "file"})
+def read_file(full_path):
+    """Return a file's text, or a placeholder if it can't be read.
 
+    Bytes are decoded in one go; invalid UTF-8 becomes U+FFFD and line
+    endings are kept as they are on disk.
+    """
+    try:
+        with open(full_path, "rb") as file:
+            data = file.read()
+    except OSError:
+        return "<<Error reading file>>"
+    return data.decode("utf-8", "replace")
+
+
+def build_tree(root_path, file_paths=None):
+    """Walk root_path into a flat tree, skipping unwanted folders.
+
+    Nodes are stored in pre-order as parallel lists rather than one dict
+    per node: names[i], types[i] (FOLDER or FILE) and parents[i] (the
+    index of the containing folder, -1 for the root). Returns
+    (names, types, parents), with no nodes if the root can't be read.
+
+    If file_paths is given, (relative_path, full_path) of every included
+    file is appended to it during the same walk.
+    """
+    tree = ([], bytearray(), [])
+    _walk_folder(root_path, os.path.basename(root_path), "", -1, tree, file_paths)
     return tree
 
 
-def collect_file_contents(root_path):
-    """Return { relative_filepath: content } for valid file types."""
-    file_map = {}
+def _walk_folder(full_path, name, current_path, parent, tree, file_paths):
+    """Append a folder and everything under it to tree."""
+    names, types, parents = tree
+    index = len(names)
 
-    for folder, dirs, files in os.walk(root_path):
-
-        # Skip whole folder
-        if should_skip_folder(folder):
-            dirs[:] = []  # prevent recursion
-            continue
-
-        # Filter subdirectories in-place
-        dirs[:] = [d for d in dirs if not should_skip_folder(os.path.join(folder, d))]
+    try:
+        # scandir entries carry their type, so no stat per entry
+        with os.scandir(full_path) as it:
+            entries = sorted(it, key=lambda e: e.name)
+    except PermissionError:
+        return  # Skip un-readable folders
 
-        for f in files:
-            ext = os.path.splitext(f)[1]
-            if ext not in INCLUDE_EXT:
-                continue
+    names.append(name)
+    types.append(FOLDER)
+    parents.append(parent)
 
-            full_path = os.path.join(folder, f)
-            rel_path = os.path.relpath(full_path, root_path)
+    for entry in entries:
+        entry_name = entry.name
+        # entry.path is already joined; only the relative path is built here
+        rel_entry = current_path + os.sep + entry_name if current_path else entry_name
 
-            try:
-                with open(full_path, "r", encoding="utf-8") as file:
-                    file_map[rel_path] = file.read()
-            except:
-                file_map[rel_path] = "<<Error reading file>>"
+        if entry.is_dir(follow_symlinks=False):
+            if not should_skip_folder(entry_name):
+                _walk_folder(entry.path, entry_name, rel_entry, index, tree, file_paths)
+        else:
+            # Same result as os.path.splitext, leading dots included
+            stem, _, ext = entry_name.rpartition(".")
+            if stem.strip(".") and "." + ext in INCLUDE_EXT:
+                names.append(entry_name)
+                types.append(FILE)
+                parents.append(index)
+                if file_paths is not None:
+                    file_paths.append((rel_entry, entry.path))
+
+
+def write_tree(out, tree):
+    """Write a flat tree as nested {"name", "type", "children"} JSON.
+
+    Produces the same text as json.dumps of the nested dicts, without
+    building them.
+    """
+    names, types, parents = tree
+    if not names:
+        out.write("null")
+        return
+
+    open_folders = []
+    for index, name in enumerate(names):
+        parent = parents[index]
+        while open_folders and open_folders[-1] != parent:
+            open_folders.pop()
+            out.write("]}")
+
+        # Pre-order: a first child directly follows its folder
+        if index != parent + 1:
+            out.write(", ")
+
+        name_json = json.dumps(name, ensure_ascii=False)
+        if types[index] == FOLDER:
+            out.write('{"name": ' + name_json + ', "type": "folder", "children": [')
+            open_folders.append(index)
+        else:
+            out.write('{"name": ' + name_json + ', "type": "file"}')
 
-    return file_map
+    out.write("]}" * len(open_folders))
 
 
 def generate_output(root_directory, output_file):
-    tree = build_tree(root_directory)
-    files = collect_file_contents(root_directory)
+    """Write {"tree": ..., "files": {path: content}} to output_file.
 
-    output = {
-        "tree": tree,
-        "files": files,
-    }
+    File contents are read by a thread pool in bounded batches and
+    written in walk order, so only one batch is held in memory rather
+    than the whole repository.
+    """
+    file_paths = []
+    tree = build_tree(root_directory, file_paths=file_paths)
 
     with open(output_file, "w", encoding="utf-8") as out:
-        json.dump(output, out, indent=2)
+        out.write('{"tree": ')
+        write_tree(out, tree)
+        out.write(', "files": {')
+
+        with ThreadPoolExecutor(max_workers=READ_WORKERS) as pool:
+            for start in range(0, len(file_paths), READ_BATCH):
+                batch = file_paths[start:start + READ_BATCH]
+                contents = pool.map(read_file, [full for _, full in batch])
+
+                for i, ((rel_path, _), content) in enumerate(zip(batch, contents)):
+                    if start or i:
+                        out.write(", ")
+                    out.write(json.dumps(rel_path, ensure_ascii=False))
+                    out.write(": ")
+                    out.write(json.dumps(content, ensure_ascii=False))
+
+        out.write("}}")
 
     print(f"JSON output saved to {output_file}")
 
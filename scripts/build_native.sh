@@ -0,0 +1,22 @@
+#!/bin/bash
+
+# Compile hot backend modules with mypyc (run from backend/)
+# The compiled .so sits next to the .py source and is imported in its place.
+# Remove the .so files to go back to pure Python.
+
+set -e
+
+MODULES=(
+    src/patching/multi_file_planner.py
+)
+
+if ! command -v mypyc > /dev/null 2>&1; then
+    echo "❌ mypyc not found!"
+    echo "   Please run: pip install mypy"
+    exit 1
+fi
+
+echo "🔧 Compiling ${#MODULES[@]} module(s) with mypyc..."
+mypyc "${MODULES[@]}"
+
+echo "✅ Native extensions built"